@@ -0,0 +1,74 @@
+import time
+from typing import Sequence
+
+import click
+
+from benchmarks.results import Throughput, measure_factory
+from foobartory.config import FactoryConfig
+from foobartory.models import Factory, Robot
+from foobartory.multiprocess import run_multiprocess
+
+
+def measure_asyncio(config: FactoryConfig, speed: float, seed: int) -> Throughput:
+    factory = Factory(speed=speed, echo=None, config=config, seed=seed)
+    return measure_factory(factory, Robot, "asyncio")
+
+
+def measure_multiprocess(
+    workers: int, config: FactoryConfig, speed: float, seed: int
+) -> Throughput:
+    start = time.perf_counter()
+    result = run_multiprocess(workers, config=config, speed=speed, seed=seed)
+    wall_time = time.perf_counter() - start
+
+    return Throughput(
+        label=f"{workers} processes",
+        count=sum(result.produced.values()),
+        unit="items",
+        wall_time=wall_time,
+        elapsed=result.elapsed,
+    )
+
+
+def run(workers: Sequence[int], robots: int, speed: float, seed: int) -> None:
+    config = FactoryConfig(robot_max_number=robots)
+    click.echo(measure_asyncio(config, speed, seed))
+    for count in workers:
+        click.echo(measure_multiprocess(count, config, speed, seed))
+
+
+@click.command()
+@click.option(
+    "-w",
+    "--workers",
+    multiple=True,
+    type=click.IntRange(min=1),
+    default=[1, 2, 4],
+    help="Number of worker processes, can be repeated (1, 2 and 4 by default)",
+)
+@click.option(
+    "-r",
+    "--robots",
+    default=500,
+    type=click.IntRange(min=3),
+    help="Number of robots ending each run (500 by default)",
+)
+@click.option(
+    "--speed",
+    default=1e4,
+    type=float,
+    help="Speed of the factories, on the real clock (10000 by default)",
+)
+@click.option("--seed", default=0, type=int, help="Seed of the runs (0 by default)")
+def main(workers: Sequence[int], robots: int, speed: float, seed: int) -> None:
+    """Compare the throughput of the asyncio and multi-process backends.
+
+    Factories run on the real clock: the faster they go, the more their throughput
+    depends on the CPU time left to the robots.
+    """
+
+    run(workers, robots, speed, seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import asyncio
+import dataclasses
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List, Sequence, Tuple
+
+import click
+
+from foobartory import network
+from foobartory.config import FactoryConfig
+
+
+@dataclasses.dataclass(frozen=True)
+class LoadResult:
+    clients: int
+    batch_size: int
+    requests: int
+    operations: int
+    wall_time: float
+    latencies: Tuple[float, ...]
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.wall_time
+
+    @property
+    def operations_per_second(self) -> float:
+        return self.operations / self.wall_time
+
+    def percentile(self, rank: int) -> float:
+        """Latency of the requests at ``rank`` percent, in milliseconds."""
+
+        return statistics.quantiles(self.latencies, n=100)[rank - 1] * 1000
+
+    def __str__(self) -> str:
+        return (
+            f"{self.clients:>6} clients, batch {self.batch_size:>3}: "
+            f"{self.requests_per_second:>8,.0f} requests/s, "
+            f"{self.operations_per_second:>9,.0f} operations/s, "
+            f"latency p50 {self.percentile(50):.2f}ms p99 {self.percentile(99):.2f}ms"
+        )
+
+
+def serve(path: str) -> None:
+    """Run a coordinator which never reaches its maximum number of robots."""
+
+    config = FactoryConfig(robot_max_number=sys.maxsize)
+    asyncio.run(network.Coordinator(path, config).run())
+
+
+async def load(
+    connection: network.Connection, duration: float, latencies: List[float]
+) -> int:
+    """Send batches of deposits and a reservation, as a robot working infinitely
+    fast would, for ``duration`` wall seconds, and return the operations sent."""
+
+    operations = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for _ in range(connection.batch_size):
+            connection.defer("deposit", 1, "foo")
+        start = time.perf_counter()
+        await connection.request("reserve 1 0 0 0")
+        latencies.append(time.perf_counter() - start)
+        operations += connection.batch_size + 1
+    return operations
+
+
+async def measure_async(
+    path: str, clients: int, batch_size: int, duration: float
+) -> LoadResult:
+    connections = [
+        await network.Connection.open(path, batch_size, timeout=network.CONNECT_TIMEOUT)
+        for _ in range(clients)
+    ]
+    latencies: List[float] = []
+    start = time.perf_counter()
+    operations = await asyncio.gather(
+        *(load(connection, duration, latencies) for connection in connections)
+    )
+    wall_time = time.perf_counter() - start
+    for connection in connections:
+        await connection.close()
+
+    return LoadResult(
+        clients=clients,
+        batch_size=batch_size,
+        requests=sum(connection.requests for connection in connections),
+        operations=sum(operations),
+        wall_time=wall_time,
+        latencies=tuple(latencies),
+    )
+
+
+def run(
+    populations: Sequence[int], batch_sizes: Sequence[int], duration: float
+) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "coordinator.sock")
+        process = multiprocessing.Process(target=serve, args=(path,))
+        process.start()
+        try:
+            for clients in populations:
+                for batch_size in batch_sizes:
+                    click.echo(
+                        asyncio.run(measure_async(path, clients, batch_size, duration))
+                    )
+        finally:
+            process.terminate()
+            process.join()
+
+
+@click.command()
+@click.option(
+    "-c",
+    "--clients",
+    "populations",
+    multiple=True,
+    type=click.IntRange(min=1),
+    default=[1, 10, 100, 1000],
+    help="Number of robot connections, can be repeated (1, 10, 100 and 1000 by "
+    "default)",
+)
+@click.option(
+    "-b",
+    "--batch",
+    "batch_sizes",
+    multiple=True,
+    type=click.IntRange(min=1),
+    default=[1, network.BATCH_SIZE],
+    help=f"Deposits sent by request, can be repeated (1 and {network.BATCH_SIZE} by "
+    "default)",
+)
+@click.option(
+    "-d",
+    "--duration",
+    default=2,
+    type=float,
+    help="Wall seconds of each measure (2 by default)",
+)
+def main(
+    populations: Sequence[int], batch_sizes: Sequence[int], duration: float
+) -> None:
+    """Load a coordinator with robot connections, and measure how many requests it
+    serves."""
+
+    run(populations, batch_sizes, duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import dataclasses
+import time
+from typing import Optional
+
+from foobartory.models import Factory
+
+
+@dataclasses.dataclass(frozen=True)
+class Throughput:
+    """Work done by a benchmarked run, and the wall time it took."""
+
+    # What ran: a backend, or a population of robots
+    label: str
+    # Units of work done, such as items produced or activities performed
+    count: int
+    unit: str
+    wall_time: float
+    # Simulated seconds, for runs ending when the factory is complete
+    elapsed: Optional[float] = None
+    # Memory allocated per running robot, in bytes
+    memory_per_robot: Optional[float] = None
+
+    @property
+    def per_second(self) -> float:
+        return self.count / self.wall_time
+
+    def __str__(self) -> str:
+        text = f"{self.label:>14}: {self.per_second:>10,.0f} {self.unit}/s"
+        if self.memory_per_robot is not None:
+            text += f", {self.memory_per_robot:>6,.0f} bytes/robot"
+        if self.elapsed is not None:
+            text += f", {self.elapsed:>8,.0f} factory seconds in {self.wall_time:.2f}s"
+        return text
+
+
+def measure_factory(factory: Factory, robot_type: type, label: str) -> Throughput:
+    """Run a factory starting with two robots of ``robot_type`` until it is
+    complete, and count the items it produced.
+    """
+
+    factory.add_robot(robot_type(factory=factory))
+    factory.add_robot(robot_type(factory=factory))
+    start = time.perf_counter()
+    factory.run()
+    wall_time = time.perf_counter() - start
+
+    assert factory.elapsed is not None
+    return Throughput(
+        label=label,
+        count=sum(factory.produced.values()),
+        unit="items",
+        wall_time=wall_time,
+        elapsed=factory.elapsed,
+    )
@@ -0,0 +1,93 @@
+import sys
+import time
+import tracemalloc
+from typing import Sequence
+
+import click
+
+from benchmarks.results import Throughput
+from foobartory.config import FactoryConfig
+from foobartory.models import Factory, Robot
+
+
+def build_factory(robots: int, duration: float) -> Factory:
+    """A silent factory on a virtual clock, starting with the given number of robots,
+    and stopped after ``duration`` simulated seconds.
+    """
+
+    factory = Factory(
+        virtual_clock=True,
+        echo=None,
+        config=FactoryConfig(robot_max_number=sys.maxsize),
+    )
+    for _ in range(robots):
+        factory.add_robot(Robot(factory=factory))
+    assert factory._loop is not None
+    factory._loop.call_later(duration, factory.stop)
+    return factory
+
+
+def measure_memory(robots: int) -> float:
+    """Memory allocated per running robot, in bytes."""
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        factory = build_factory(robots, duration=0.1)
+        assert factory._loop is not None
+        during = []
+        # Measure while every robot is running its first activity
+        factory._loop.call_later(
+            0.05, lambda: during.append(tracemalloc.get_traced_memory()[0])
+        )
+        factory.run()
+    finally:
+        tracemalloc.stop()
+    return (during[0] - before) / robots
+
+
+def measure(robots: int, duration: float) -> Throughput:
+    factory = build_factory(robots, duration=duration)
+    start = time.perf_counter()
+    factory.run()
+    wall_time = time.perf_counter() - start
+
+    return Throughput(
+        label=f"{len(factory.robots)} robots",
+        count=sum(factory.activities.values()),
+        unit="events",
+        wall_time=wall_time,
+        memory_per_robot=measure_memory(robots),
+    )
+
+
+def run(populations: Sequence[int], duration: float) -> None:
+    for robots in populations:
+        click.echo(measure(robots, duration))
+
+
+@click.command()
+@click.option(
+    "-r",
+    "--robots",
+    "populations",
+    multiple=True,
+    type=click.IntRange(min=1),
+    default=[1_000, 10_000, 100_000],
+    help="Number of robots to simulate, can be repeated (1k, 10k and 100k by default)",
+)
+@click.option(
+    "-d",
+    "--duration",
+    default=20,
+    type=float,
+    help="Simulated seconds of each run (20 by default)",
+)
+def main(populations: Sequence[int], duration: float) -> None:
+    """Measure how the simulation scales with the number of robots."""
+
+    run(populations, duration)
+
+
+if __name__ == "__main__":
+    main()
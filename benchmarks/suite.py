@@ -0,0 +1,302 @@
+import asyncio
+import dataclasses
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import click
+
+from benchmarks import scaling
+from foobartory.decorators import activity
+from foobartory.inventory import ItemQueue, Stock
+from foobartory.models import Factory, Foo, Robot
+from foobartory.rng import RandomStream
+
+SPEEDS = (1_000, 10_000)
+# Benchmarks keep the best of several repetitions, to reduce the noise
+REPEAT = 5
+# Amount by which a metric can get worse when its baseline is zero, so that no
+# fraction of the baseline can be allowed. A compact stock stores no object per item:
+# a regression would add at least a pointer, of 8 bytes
+ABSOLUTE_THRESHOLDS = {"bytes": 8.0}
+
+
+@dataclasses.dataclass(frozen=True)
+class Measurement:
+    name: str
+    value: float
+    unit: str
+    # Either "higher" or "lower"
+    better: str
+
+    def __str__(self) -> str:
+        return f"{self.name:<32} {self.value:>14,.3f} {self.unit}"
+
+
+def events_per_second(quick: bool) -> List[Measurement]:
+    robots = 100 if quick else 1_000
+    best = max(scaling.measure(robots, duration=20).per_second for _ in range(REPEAT))
+    return [Measurement("events_per_second", best, "events/s", "higher")]
+
+
+def _time_to_ceiling(**options: Any) -> float:
+    durations = []
+    for _ in range(REPEAT):
+        factory = Factory(echo=None, seed=0, **options)
+        factory.add_robot(Robot(factory=factory))
+        factory.add_robot(Robot(factory=factory))
+        start = time.perf_counter()
+        factory.run()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def time_to_ceiling(quick: bool) -> List[Measurement]:
+    """Wall time of a full run, on a virtual clock and at several speeds."""
+
+    measurements = [
+        Measurement(
+            "time_to_ceiling_virtual_clock",
+            _time_to_ceiling(virtual_clock=True),
+            "s",
+            "lower",
+        )
+    ]
+    for speed in SPEEDS[-1:] if quick else SPEEDS:
+        measurements.append(
+            Measurement(
+                f"time_to_ceiling_speed_{speed}",
+                _time_to_ceiling(speed=speed),
+                "s",
+                "lower",
+            )
+        )
+    return measurements
+
+
+def _memory_per_item(stock_type: Callable[..., Any], items: int) -> float:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        stock = stock_type(Foo)
+        for _ in range(items):
+            stock.put_new()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # Compact stocks use almost no memory: ignore the noise of the allocator
+    return round((after - before) / items, 1)
+
+
+def memory(quick: bool) -> List[Measurement]:
+    items = 10_000 if quick else 100_000
+    return [
+        Measurement(
+            "memory_per_robot",
+            scaling.measure_memory(100 if quick else 1_000),
+            "bytes",
+            "lower",
+        ),
+        Measurement(
+            "memory_per_item", _memory_per_item(Stock, items), "bytes", "lower"
+        ),
+        Measurement(
+            "memory_per_item_provenance",
+            _memory_per_item(ItemQueue, items),
+            "bytes",
+            "lower",
+        ),
+    ]
+
+
+async def _noop(robot: Robot) -> None:
+    pass
+
+
+def decorator_overhead(quick: bool) -> List[Measurement]:
+    """Time added by the ``activity`` decorator to an activity that does nothing."""
+
+    calls = 10_000 if quick else 100_000
+    factory = Factory(echo=None)
+    robot = Robot(factory)
+    robot._current_activity = _noop.__name__
+    decorated = activity(_noop)
+
+    async def measure(func: Callable[[Robot], Any]) -> float:
+        start = time.perf_counter()
+        for _ in range(calls):
+            await func(robot)
+        return time.perf_counter() - start
+
+    loop = asyncio.new_event_loop()
+    try:
+        raw = min(loop.run_until_complete(measure(_noop)) for _ in range(REPEAT))
+        wrapped = min(
+            loop.run_until_complete(measure(decorated)) for _ in range(REPEAT)
+        )
+    finally:
+        loop.close()
+    return [
+        Measurement(
+            "activity_decorator_overhead", (wrapped - raw) / calls * 1e9, "ns", "lower"
+        )
+    ]
+
+
+def decision_cost(quick: bool) -> List[Measurement]:
+    """Time to evaluate each ``must_*`` rule of a robot."""
+
+    number = 10_000 if quick else 100_000
+    factory = Factory(echo=None)
+    robot = Robot(factory)
+    for _ in range(3):
+        factory.foo_queue.put_new()
+        factory.bar_queue.put_new()
+    measurements = []
+    for rule in (
+        "must_buy_robot",
+        "must_harvest_foo",
+        "must_sell_foobar",
+        "must_create_foobar",
+    ):
+        seconds = min(
+            timeit.repeat(
+                f"robot.{rule}", globals={"robot": robot}, number=number, repeat=REPEAT
+            )
+        )
+        measurements.append(
+            Measurement(f"{rule}_cost", seconds / number * 1e9, "ns", "lower")
+        )
+    return measurements
+
+
+def draw_cost(quick: bool) -> List[Measurement]:
+    """Time to draw a number from the random stream of a robot."""
+
+    number = 10_000 if quick else 100_000
+    stream = RandomStream(seed=0, key=0)
+    measurements = []
+    for name, statement in (
+        ("random_draw_cost", "stream.random()"),
+        ("uniform_draw_cost", "stream.uniform(0.5, 2)"),
+    ):
+        seconds = min(
+            timeit.repeat(
+                statement, globals={"stream": stream}, number=number, repeat=REPEAT
+            )
+        )
+        measurements.append(Measurement(name, seconds / number * 1e9, "ns", "lower"))
+    return measurements
+
+
+BENCHMARKS = (
+    events_per_second,
+    time_to_ceiling,
+    memory,
+    decorator_overhead,
+    decision_cost,
+    draw_cost,
+)
+
+
+def run(quick: bool = False) -> List[Measurement]:
+    measurements = []
+    for benchmark in BENCHMARKS:
+        for measurement in benchmark(quick):
+            click.echo(measurement)
+            measurements.append(measurement)
+    return measurements
+
+
+def to_dict(measurements: List[Measurement]) -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "metrics": {
+            measurement.name: {
+                "value": measurement.value,
+                "unit": measurement.unit,
+                "better": measurement.better,
+            }
+            for measurement in measurements
+        },
+    }
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Compare two results, and return the names of the regressed metrics.
+
+    A metric regresses when it is worse than in the baseline by more than
+    ``threshold``, as a fraction of the baseline value. When the baseline value is
+    zero, the metric regresses when it is worse by more than the absolute threshold
+    of its unit, in :data:`ABSOLUTE_THRESHOLDS`, or by any amount for other units.
+    """
+
+    regressions = []
+    click.echo(f"{'metric':<32} {'baseline':>14} {'current':>14} {'change':>8}")
+    for name, reference in baseline["metrics"].items():
+        if name not in current["metrics"]:
+            continue
+        value = current["metrics"][name]["value"]
+        sign = -1 if reference["better"] == "higher" else 1
+        if reference["value"]:
+            change = (value - reference["value"]) / abs(reference["value"])
+            regressed = sign * change > threshold
+            shown = f"{change:>+8.1%}"
+        else:
+            regressed = sign * value > ABSOLUTE_THRESHOLDS.get(reference["unit"], 0.0)
+            shown = f"{'n/a':>8}"
+        if regressed:
+            regressions.append(name)
+        click.echo(
+            f"{name:<32} {reference['value']:>14,.3f} {value:>14,.3f} "
+            f"{shown}{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+@click.group()
+def main() -> None:
+    """Benchmark the simulation engine, and compare the results with a baseline."""
+
+
+@main.command(name="run")
+@click.option("-o", "--output", type=click.Path(dir_okay=False, writable=True))
+@click.option("--quick", is_flag=True, help="Use smaller sizes, for a quick check")
+def run_command(output: Optional[str], quick: bool) -> None:
+    """Run the benchmarks, and optionally save the results as JSON."""
+
+    result = to_dict(run(quick=quick))
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+
+
+@main.command(name="compare")
+@click.argument("baseline", type=click.File())
+@click.argument("current", type=click.File())
+@click.option(
+    "-t",
+    "--threshold",
+    default=0.2,
+    type=float,
+    help="Fraction by which a metric can get worse (0.2 by default)",
+)
+def compare_command(baseline: Any, current: Any, threshold: float) -> None:
+    """Fail if a metric of CURRENT regressed from BASELINE past the threshold."""
+
+    regressions = compare(json.load(baseline), json.load(current), threshold)
+    if regressions:
+        click.echo(f"{len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import platform
+from typing import Any, Dict, Sequence
+
+import click
+
+from benchmarks.results import measure_factory
+from foobartory.config import FactoryConfig
+from foobartory.models import Factory, Robot
+from foobartory.threads import ThreadFactory, ThreadRobot, gil_enabled
+
+
+def run(threads: Sequence[int], robots: int, speed: float, seed: int) -> None:
+    click.echo(
+        f"{platform.python_implementation()} {platform.python_version()}, "
+        f"GIL {'enabled' if gil_enabled() else 'disabled'}"
+    )
+    options: Dict[str, Any] = dict(
+        speed=speed, echo=None, config=FactoryConfig(robot_max_number=robots), seed=seed
+    )
+    click.echo(measure_factory(Factory(**options), Robot, "asyncio"))
+    for count in threads:
+        factory = ThreadFactory(count, **options)
+        click.echo(measure_factory(factory, ThreadRobot, f"{count} threads"))
+
+
+@click.command()
+@click.option(
+    "-t",
+    "--threads",
+    multiple=True,
+    type=click.IntRange(min=1),
+    default=[1, 2, 4, 8],
+    help="Number of threads, can be repeated (1, 2, 4 and 8 by default)",
+)
+@click.option(
+    "-r",
+    "--robots",
+    default=500,
+    type=click.IntRange(min=3),
+    help="Number of robots ending each run (500 by default)",
+)
+@click.option(
+    "--speed",
+    default=1e4,
+    type=float,
+    help="Speed of the factories, on the real clock (10000 by default)",
+)
+@click.option("--seed", default=0, type=int, help="Seed of the runs (0 by default)")
+def main(threads: Sequence[int], robots: int, speed: float, seed: int) -> None:
+    """Compare the throughput of the asyncio backend and of thread pools.
+
+    Run it on interpreters with and without a global interpreter lock, to see how
+    the robots scale with the number of threads.
+    """
+
+    run(threads, robots, speed, seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import asyncio
+import concurrent.futures
+import dataclasses
+import functools
+import os
+import statistics
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from foobartory.clock import VirtualClockEventLoop, cancel_pending_tasks
+from foobartory.config import ACTIVITIES, FactoryConfig
+from foobartory.models import Factory, Robot
+from foobartory.strategy import Strategy
+
+if TYPE_CHECKING:
+    from foobartory.cache import ResultCache
+
+
+@dataclasses.dataclass(frozen=True)
+class RunResult:
+    """The summary of a single factory run."""
+
+    # Seed running the factory again, or None if the run cannot be reproduced alone
+    seed: Optional[int]
+    elapsed: float
+    account: int
+    produced: Dict[str, int]
+    # Messages printed by the factory, when they are captured
+    output: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_factory(cls, factory: Factory, output: Sequence[str] = ()) -> "RunResult":
+        assert factory.elapsed is not None
+        return cls(
+            seed=factory.seed,
+            elapsed=factory.elapsed,
+            account=factory.account,
+            produced={name: factory.produced[name] for name in ACTIVITIES},
+            output=tuple(output),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class Distribution:
+    """Summary statistics of a sample of values."""
+
+    count: int
+    mean: float
+    stdev: float
+    min: float
+    p50: float
+    p90: float
+    max: float
+
+    @classmethod
+    def from_values(cls, values: Sequence[float]) -> "Distribution":
+        ordered = sorted(values)
+        return cls(
+            count=len(ordered),
+            mean=statistics.fmean(ordered),
+            stdev=statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+            min=ordered[0],
+            p50=_percentile(ordered, 0.5),
+            p90=_percentile(ordered, 0.9),
+            max=ordered[-1],
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"mean={self.mean:.2f} stdev={self.stdev:.2f} min={self.min:.2f} "
+            f"p50={self.p50:.2f} p90={self.p90:.2f} max={self.max:.2f}"
+        )
+
+
+def _percentile(ordered: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sample."""
+
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclasses.dataclass(frozen=True)
+class BatchResult:
+    """The results of many independent factory runs, combined into distributions."""
+
+    runs: List[RunResult]
+
+    @property
+    def elapsed(self) -> Distribution:
+        """Simulated time needed to reach the maximum number of robots."""
+
+        return Distribution.from_values([run.elapsed for run in self.runs])
+
+    @property
+    def account(self) -> Distribution:
+        return Distribution.from_values([run.account for run in self.runs])
+
+    @property
+    def produced(self) -> Dict[str, Distribution]:
+        return {
+            name: Distribution.from_values([run.produced[name] for run in self.runs])
+            for name in ACTIVITIES
+        }
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "runs": len(self.runs),
+            "elapsed": dataclasses.asdict(self.elapsed),
+            "account": dataclasses.asdict(self.account),
+            "produced": {
+                name: dataclasses.asdict(distribution)
+                for name, distribution in self.produced.items()
+            },
+        }
+
+
+def run_factory(
+    seed: int,
+    config: FactoryConfig = FactoryConfig(),
+    strategy: Union[str, Type[Strategy]] = "greedy",
+    parameters: Optional[Mapping[str, float]] = None,
+) -> RunResult:
+    """Run a silent factory on a virtual clock, from 2 robots to the maximum.
+
+    Robots choose their activities with ``strategy``, set with ``parameters``.
+    """
+
+    factory = Factory(
+        virtual_clock=True,
+        echo=None,
+        config=config,
+        seed=seed,
+        strategy=strategy,
+        strategy_parameters=parameters,
+    )
+    factory.add_robot(Robot(factory=factory))
+    factory.add_robot(Robot(factory=factory))
+    factory.run()
+    return RunResult.from_factory(factory)
+
+
+async def run_factories(
+    seeds: Sequence[int],
+    config: FactoryConfig = FactoryConfig(),
+    capture_output: bool = False,
+    speed: float = 1,
+) -> List[RunResult]:
+    """Run a factory per seed, from 2 robots to the maximum, on the running loop.
+
+    The factories run concurrently at ``speed``, each with its own state. With
+    ``capture_output``, the messages of each factory are kept in its result instead of
+    being dropped.
+    """
+
+    outputs: List[List[str]] = [[] for _ in seeds]
+    factories = []
+    for seed, output in zip(seeds, outputs):
+        factory = Factory(
+            speed=speed,
+            echo=output.append if capture_output else None,
+            config=config,
+            seed=seed,
+        )
+        factory.add_robot(Robot(factory=factory))
+        factory.add_robot(Robot(factory=factory))
+        factories.append(factory)
+
+    await asyncio.gather(*(factory.run_async() for factory in factories))
+    return [
+        RunResult.from_factory(factory, output)
+        for factory, output in zip(factories, outputs)
+    ]
+
+
+def run_on_one_loop(
+    seeds: Sequence[int],
+    config: FactoryConfig = FactoryConfig(),
+    capture_output: bool = False,
+) -> List[RunResult]:
+    """Run a factory per seed, all on the same virtual clock.
+
+    Each factory gets the same result as if it was run alone by :func:`run_factory`.
+    """
+
+    loop = VirtualClockEventLoop()
+    try:
+        return loop.run_until_complete(run_factories(seeds, config, capture_output))
+    finally:
+        cancel_pending_tasks(loop)
+        loop.close()
+
+
+def run_batch(
+    runs: int,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    config: FactoryConfig = FactoryConfig(),
+    strategy: Union[str, Type[Strategy]] = "greedy",
+    parameters: Optional[Mapping[str, float]] = None,
+    cache: Optional["ResultCache"] = None,
+) -> BatchResult:
+    """Run ``runs`` factories, seeded from ``seed`` onwards, in a pool of processes.
+
+    Runs are sent to the workers in chunks, so that each process executes many
+    simulations for a single launch. Robots choose their activities with
+    ``strategy``, set with ``parameters``. With ``cache``, the runs it holds are not
+    run again, and the new ones are saved in it.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    seeds = range(seed, seed + runs)
+    keys: Dict[int, str] = {}
+    results: Dict[int, RunResult] = {}
+    if cache is not None:
+        keys = {s: cache.key(s, config, strategy, parameters) for s in seeds}
+        found = cache.get_many(list(keys.values()))
+        results = {s: found[key] for s, key in keys.items() if key in found}
+    missing = [s for s in seeds if s not in results]
+    chunksize = max(1, len(missing) // (workers * 4))
+    run = functools.partial(
+        run_factory, config=config, strategy=strategy, parameters=parameters
+    )
+
+    if workers == 1 or len(missing) <= 1:
+        new = [run(s) for s in missing]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            new = list(executor.map(run, missing, chunksize=chunksize))
+    if cache is not None:
+        cache.put_many((keys[s], result) for s, result in zip(missing, new))
+    results.update(zip(missing, new))
+    return BatchResult(runs=[results[s] for s in seeds])
+
+
+def format_batch(result: BatchResult, config: FactoryConfig = FactoryConfig()) -> str:
+    lines = [
+        f"time to {config.robot_max_number} robots (s): {result.elapsed}",
+        f"final account (€): {result.account}",
+    ]
+    for name, distribution in result.produced.items():
+        lines.append(f"{name}: {distribution}")
+    return "\n".join(lines)
@@ -0,0 +1,232 @@
+import dataclasses
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Type, Union
+
+from foobartory.batch import RunResult
+from foobartory.config import FactoryConfig
+from foobartory.strategy import Strategy, import_path, load
+
+# Runs kept by default, the least recently used being evicted first. A run takes about
+# 300 bytes, so that the database stays around 30 MB.
+MAX_ENTRIES = 100_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    elapsed REAL NOT NULL,
+    account INTEGER NOT NULL,
+    produced TEXT NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_used ON runs (used);
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """Digest of the source code of the package, which changes with any edit."""
+
+    digest = hashlib.sha256()
+    for path in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+@functools.lru_cache(maxsize=None)
+def strategy_version(strategy: Type[Strategy]) -> str:
+    """Digest of the source code of the module of ``strategy``, so that the runs of a
+    plug-in strategy are not used again once it is edited."""
+
+    try:
+        source = Path(inspect.getfile(strategy)).read_bytes()
+    except (OSError, TypeError):
+        raise ValueError(
+            f"Cannot cache the runs of {import_path(strategy)}: its source is missing"
+        ) from None
+    return hashlib.sha256(source).hexdigest()[:16]
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheInfo:
+    path: str
+    entries: int
+    # Entries saved by other versions of the code, which are never used again
+    stale: int
+    size: int
+
+    def __str__(self) -> str:
+        return (
+            f"{self.path}: {self.entries} runs, {self.stale} from other code "
+            f"versions, {self.size / 1e6:.1f} MB"
+        )
+
+
+class ResultCache:
+    """Results of factory runs saved in the SQLite database at ``path``, by
+    :meth:`key`.
+
+    Beyond ``max_entries`` runs, the least recently used ones are evicted. Runs all
+    take about the same space, so this bounds the size of the database, without
+    measuring it: SQLite only frees its pages once they are empty, so the size of the
+    file lags behind the runs removed. The cache is only meant to be used from a
+    single process at a time.
+    """
+
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+
+    @staticmethod
+    def key(
+        seed: int,
+        config: FactoryConfig = FactoryConfig(),
+        strategy: Union[str, Type[Strategy]] = "greedy",
+        parameters: Optional[Mapping[str, float]] = None,
+    ) -> str:
+        """Key of the run of a factory, from everything its result depends on.
+
+        Strategies are identified by their class, the source code of its module, and
+        all their parameters, so that runs with default parameters are found whether
+        these are given or not.
+        """
+
+        strategy_class = load(strategy)
+        parameters = {**strategy_class.defaults(config), **(parameters or {})}
+        description = json.dumps(
+            [
+                code_version(),
+                dataclasses.asdict(config),
+                seed,
+                import_path(strategy_class),
+                strategy_version(strategy_class),
+                sorted((name, float(value)) for name, value in parameters.items()),
+            ]
+        )
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __len__(self) -> int:
+        (count,) = self._connection.execute("SELECT COUNT(*) FROM runs").fetchone()
+        return count
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, RunResult]:
+        """Return the cached results of the runs with the given keys, when any."""
+
+        found: Dict[str, RunResult] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._connection:
+            for chunk in _chunks(unique):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    "SELECT key, seed, elapsed, account, produced FROM runs "
+                    f"WHERE key IN ({placeholders})",
+                    chunk,
+                )
+                for key, seed, elapsed, account, produced in rows:
+                    found[key] = RunResult(
+                        seed=seed,
+                        elapsed=elapsed,
+                        account=account,
+                        produced=json.loads(produced),
+                    )
+                self._connection.executemany(
+                    "UPDATE runs SET used = ? WHERE key = ?",
+                    [(time.time(), key) for key in chunk if key in found],
+                )
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, results: Iterable[Tuple[str, RunResult]]) -> None:
+        """Save the results of runs by key, then evict the least recently used runs
+        beyond ``max_entries``."""
+
+        now = time.time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        key,
+                        code_version(),
+                        result.seed,
+                        result.elapsed,
+                        result.account,
+                        json.dumps(result.produced),
+                        now,
+                    )
+                    for key, result in results
+                ],
+            )
+            self._evict(self.max_entries)
+
+    def prune(self, max_entries: Optional[int] = None, stale: bool = False) -> int:
+        """Remove the runs of other code versions with ``stale``, then the least
+        recently used runs beyond ``max_entries``, and shrink the database file.
+        Return the number of runs removed.
+        """
+
+        removed = 0
+        with self._connection:
+            if stale:
+                removed += self._connection.execute(
+                    "DELETE FROM runs WHERE version != ?", (code_version(),)
+                ).rowcount
+            if max_entries is not None:
+                removed += self._evict(max_entries)
+        if removed:
+            self._connection.execute("VACUUM")
+        return removed
+
+    def _evict(self, max_entries: int) -> int:
+        """Remove the least recently used runs beyond ``max_entries``, keeping the
+        space they took in the file for new runs."""
+
+        excess = len(self) - max_entries
+        if excess <= 0:
+            return 0
+        return self._connection.execute(
+            "DELETE FROM runs WHERE key IN "
+            "(SELECT key FROM runs ORDER BY used LIMIT ?)",
+            (excess,),
+        ).rowcount
+
+    def info(self) -> CacheInfo:
+        (stale,) = self._connection.execute(
+            "SELECT COUNT(*) FROM runs WHERE version != ?", (code_version(),)
+        ).fetchone()
+        return CacheInfo(
+            path=self.path,
+            entries=len(self),
+            stale=stale,
+            size=os.path.getsize(self.path),
+        )
+
+
+def _chunks(keys: List[str], size: int = 500) -> Iterable[List[str]]:
+    """Split ``keys`` in chunks, below the number of parameters SQLite accepts."""
+
+    for start in range(0, len(keys), size):
+        end = start + size
+        yield keys[start:end]
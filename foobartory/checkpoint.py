@@ -0,0 +1,264 @@
+import array
+import asyncio
+import concurrent.futures
+import dataclasses
+import json
+import os
+import struct
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from foobartory.config import ACTIVITIES, FactoryConfig
+from foobartory.inventory import Reservation, Stock
+from foobartory.models import Bar, Factory, Foo, FooBar, Robot, RobotState
+from foobartory.strategy import import_path
+
+MAGIC = b"FOOBARTORY"
+VERSION = 4
+
+_HEADER = struct.Struct("<10sHI")
+# Current activity, activity in progress, remaining seconds, rank of the sleep, numbers
+# drawn from the random stream, and whether a reservation follows. Robots are stored
+# by id.
+_ROBOT = struct.Struct("<BBdQQ?")
+# Numbers of reserved foo, bar and foobar, followed by their ids, and euros
+_RESERVATION = struct.Struct("<IIIq")
+_NO_ACTIVITY = 255
+
+
+@dataclasses.dataclass(frozen=True)
+class FactoryState:
+    """Everything needed to resume the run of a factory."""
+
+    seed: int
+    config: FactoryConfig
+    # Import path of the strategy class, its parameters and its own state
+    strategy: str
+    strategy_parameters: Dict[str, float]
+    strategy_state: Dict[str, Any]
+    # Factory seconds since the start of the run
+    run_time: float
+    account: int
+    # Head and tail of the foo, bar and foobar stocks
+    stocks: Tuple[Tuple[int, int], ...]
+    produced: Dict[str, int]
+    activities: Dict[str, int]
+    robots: Tuple[RobotState, ...]
+
+
+def capture(factory: Factory) -> FactoryState:
+    """Capture the state of a running factory, from its event loop."""
+
+    queues = (factory.foo_queue, factory.bar_queue, factory.foobar_queue)
+    if not all(isinstance(queue, Stock) for queue in queues):
+        raise ValueError("Only factories without provenance can be saved")
+    return FactoryState(
+        seed=factory.seed,
+        config=factory.config,
+        strategy=import_path(type(factory.strategy)),
+        strategy_parameters=dict(factory.strategy.parameters),
+        strategy_state=factory.strategy.getstate(),
+        run_time=factory.run_time(),
+        account=factory.account,
+        stocks=tuple(queue.getstate() for queue in queues),  # type: ignore
+        produced=dict(factory.produced),
+        activities=dict(factory.activities),
+        robots=tuple(robot.getstate() for robot in factory.robots),
+    )
+
+
+def restore(state: FactoryState, **options: Any) -> Factory:
+    """Build a factory from a saved state, ready to resume its run.
+
+    ``options`` are passed to :class:`Factory`, except the configuration, the seed and
+    the strategy, which come from the state.
+    """
+
+    factory = Factory(
+        config=state.config,
+        seed=state.seed,
+        strategy=state.strategy,
+        strategy_parameters=state.strategy_parameters,
+        **options,
+    )
+    factory.resumed_at = state.run_time
+    factory.account = state.account
+    factory.produced.update(state.produced)
+    factory.activities.update(state.activities)
+    queues = (factory.foo_queue, factory.bar_queue, factory.foobar_queue)
+    for queue, stock in zip(queues, state.stocks):
+        queue.setstate(stock)  # type: ignore
+
+    held = factory.ledger.held
+    for robot_state in state.robots:
+        robot = Robot(factory=factory)
+        robot.setstate(robot_state)
+        reservation = robot_state.reservation
+        if reservation is not None:
+            held["foo"] += len(reservation.foo)
+            held["bar"] += len(reservation.bar)
+            held["foobar"] += len(reservation.foobar)
+            held["euros"] += reservation.euros
+        factory.robots.append(robot)
+    factory.strategy.setstate(state.strategy_state)
+    return factory
+
+
+def encode(state: FactoryState) -> bytes:
+    """Encode a state as a compressed binary checkpoint."""
+
+    meta = json.dumps(
+        {
+            "seed": state.seed,
+            "config": dataclasses.asdict(state.config),
+            "strategy": state.strategy,
+            "strategy_parameters": state.strategy_parameters,
+            "strategy_state": state.strategy_state,
+            "run_time": state.run_time,
+            "account": state.account,
+            "stocks": state.stocks,
+            "produced": state.produced,
+            "activities": state.activities,
+        }
+    ).encode()
+    chunks: List[bytes] = [meta]
+    codes = {name: code for code, name in enumerate(ACTIVITIES)}
+    for robot in state.robots:
+        reservation = robot.reservation
+        chunks.append(
+            _ROBOT.pack(
+                codes[robot.current_activity],
+                _NO_ACTIVITY if robot.in_progress is None else codes[robot.in_progress],
+                -1.0 if robot.remaining is None else robot.remaining,
+                robot.rank,
+                robot.random,
+                reservation is not None,
+            )
+        )
+        if reservation is not None:
+            chunks.append(
+                _RESERVATION.pack(
+                    len(reservation.foo),
+                    len(reservation.bar),
+                    len(reservation.foobar),
+                    reservation.euros,
+                )
+            )
+            items = reservation.foo + reservation.bar + reservation.foobar
+            chunks.append(array.array("q", [item.id for item in items]).tobytes())
+    header = _HEADER.pack(MAGIC, VERSION, len(meta))
+    return header + zlib.compress(b"".join(chunks))
+
+
+def decode(data: bytes) -> FactoryState:
+    """Decode a checkpoint produced by :func:`encode`."""
+
+    try:
+        magic, version, meta_size = _HEADER.unpack_from(data)
+    except struct.error:
+        raise ValueError("Not a factory checkpoint")
+    if magic != MAGIC:
+        raise ValueError("Not a factory checkpoint")
+    if version != VERSION:
+        raise ValueError(f"Unsupported checkpoint version {version}")
+    header_size = _HEADER.size
+    try:
+        payload = zlib.decompress(data[header_size:])
+    except zlib.error:
+        raise ValueError("Corrupted checkpoint")
+
+    meta = json.loads(payload[:meta_size])
+    robots = []
+    offset = meta_size
+    while offset < len(payload):
+        (
+            current,
+            in_progress,
+            remaining,
+            rank,
+            drawn,
+            reserved,
+        ) = _ROBOT.unpack_from(payload, offset)
+        offset += _ROBOT.size
+        reservation: Optional[Reservation] = None
+        if reserved:
+            foo, bar, foobar, euros = _RESERVATION.unpack_from(payload, offset)
+            offset += _RESERVATION.size
+            ids = array.array("q")
+            end = offset + ids.itemsize * (foo + bar + foobar)
+            ids.frombytes(payload[offset:end])
+            offset = end
+            foobars = foo + bar
+            reservation = Reservation(
+                foo=[Foo(id=id) for id in ids[:foo]],
+                bar=[Bar(id=id) for id in ids[foo:foobars]],
+                foobar=[FooBar(id=id) for id in ids[foobars:]],
+                euros=euros,
+            )
+        robots.append(
+            RobotState(
+                current_activity=ACTIVITIES[current],
+                in_progress=(
+                    None if in_progress == _NO_ACTIVITY else ACTIVITIES[in_progress]
+                ),
+                remaining=None if remaining < 0 else remaining,
+                random=drawn,
+                reservation=reservation,
+                rank=rank,
+            )
+        )
+
+    return FactoryState(
+        seed=meta["seed"],
+        config=FactoryConfig(**meta["config"]),
+        strategy=meta["strategy"],
+        strategy_parameters=meta["strategy_parameters"],
+        strategy_state=meta["strategy_state"],
+        run_time=meta["run_time"],
+        account=meta["account"],
+        stocks=tuple(tuple(stock) for stock in meta["stocks"]),  # type: ignore
+        produced=meta["produced"],
+        activities=meta["activities"],
+        robots=tuple(robots),
+    )
+
+
+def save(state: FactoryState, path: str) -> None:
+    """Write a checkpoint atomically: if interrupted, the previous one is kept."""
+
+    data = encode(state)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(data)
+    os.replace(temporary_path, path)
+
+
+def load(path: str) -> FactoryState:
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+class Checkpointer:
+    """Save a running factory to ``path``, ``interval`` factory seconds after the
+    previous checkpoint was written.
+
+    The state is captured on the event loop, between two steps of the robots, so
+    that it is consistent. It is then encoded, compressed and written by a thread,
+    while the robots keep working.
+    """
+
+    def __init__(self, path: str, interval: float = 60) -> None:
+        self.path = path
+        self.interval = interval
+
+    async def run(self, factory: Factory) -> None:
+        loop = asyncio.get_running_loop()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            while True:
+                await asyncio.sleep(self.interval / factory.speed)
+                state = capture(factory)
+                await loop.run_in_executor(executor, save, state, self.path)
+        finally:
+            # When the run ends, let the checkpoint being written complete
+            executor.shutdown(wait=True)
@@ -1,9 +1,24 @@
+import asyncio
+import contextlib
+import json
 import logging
+import os
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 import click
+from click.core import ParameterSource
 
+from foobartory import batch as batch_module
+from foobartory import cache as cache_module
+from foobartory import checkpoint, config, dashboard, decorators
+from foobartory import estimate as estimate_module
+from foobartory import logs, network, optimizer
+from foobartory.config import FactoryConfig
+from foobartory.eventlog import EventLog
+from foobartory.metrics import Metrics
 from foobartory.models import Factory, Robot
+from foobartory.tracing import Tracer
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +35,104 @@ def configure_logging(verbosity: int) -> None:
     )
 
 
-@click.command(name="foobartory")
+def load_config(
+    path: Optional[str], settings: Sequence[str], max_robots: Optional[int]
+) -> FactoryConfig:
+    """Load the configuration of the factories from the TOML file at ``path``, then
+    from the environment, then from the ``NAME=VALUE`` settings."""
+
+    try:
+        factory_config = (
+            FactoryConfig() if path is None else FactoryConfig.from_toml(path)
+        )
+        factory_config = factory_config.update_from_env()
+        values: Dict[str, Any] = {}
+        for setting in settings:
+            name, separator, value = setting.partition("=")
+            if not separator:
+                raise ValueError(f"Expected NAME=VALUE, got {setting!r}")
+            values[name.strip()] = value.strip()
+        if max_robots is not None:
+            values["robot_max_number"] = max_robots
+        return factory_config.update(values)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+
+def _number(text: str) -> Union[int, float]:
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_parameters(settings: Sequence[str]) -> Dict[str, float]:
+    """Parse the ``NAME=VALUE`` parameters of a strategy."""
+
+    parameters: Dict[str, float] = {}
+    for setting in settings:
+        name, separator, value = setting.partition("=")
+        try:
+            if not separator:
+                raise ValueError(f"Expected NAME=VALUE, got {setting!r}")
+            parameters[name.strip()] = _number(value.strip())
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--strategy-param")
+    return parameters
+
+
+def parse_space(
+    settings: Sequence[str],
+) -> Tuple[Dict[str, List[float]], Dict[str, Tuple[float, float]]]:
+    """Parse the ``NAME=VALUES`` parameters of a search, into lists of values
+    (``sell_min=1,3,5``) for a grid search, and bounds (``sell_min=1:5``) for an
+    evolutionary search."""
+
+    values: Dict[str, List[float]] = {}
+    bounds: Dict[str, Tuple[float, float]] = {}
+    for setting in settings:
+        name, separator, text = setting.partition("=")
+        try:
+            if not separator:
+                raise ValueError(f"Expected NAME=VALUES, got {setting!r}")
+            low, colon, high = text.partition(":")
+            if colon:
+                bounds[name.strip()] = (_number(low), _number(high))
+            else:
+                values[name.strip()] = [_number(value) for value in text.split(",")]
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--param")
+    return values, bounds
+
+
+@contextlib.contextmanager
+def open_cache(path: Optional[str]) -> Iterator[Optional[cache_module.ResultCache]]:
+    """Open the result cache at ``path``, if any, and report how much it was used."""
+
+    if path is None:
+        yield None
+        return
+    with cache_module.ResultCache(path) as cache:
+        yield cache
+        click.echo(
+            f"[*] {cache.hits} of {cache.hits + cache.misses} runs found in {path}",
+            err=True,
+        )
+
+
+cache_option = click.option(
+    "--cache",
+    "cache_path",
+    type=click.Path(dir_okay=False, writable=True),
+    envvar="FOOBARTORY_CACHE",
+    help=(
+        "SQLite file caching the results of the runs, so that they are not run "
+        "again (FOOBARTORY_CACHE by default)"
+    ),
+)
+
+
+@click.group(name="foobartory", invoke_without_command=True)
 @click.option(
     "-s",
     "--speed",
@@ -28,27 +140,606 @@ def configure_logging(verbosity: int) -> None:
     type=float,
     help="Fasten the factory by the given factory (1 by default)",
 )
+@click.option(
+    "--virtual-clock",
+    is_flag=True,
+    help="Simulate time instead of sleeping, to complete the run instantly",
+)
+@click.option(
+    "-c",
+    "--config",
+    "config_path",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Load the rules of the factory from a TOML file",
+)
+@click.option(
+    "--set",
+    "settings",
+    multiple=True,
+    metavar="NAME=VALUE",
+    help="Change a rule of the factory, such as foobar_sell_max=4. Can be repeated",
+)
+@click.option(
+    "--max-robots",
+    type=click.IntRange(min=config.MIN_ROBOT_MAX_NUMBER),
+    help=f"Number of robots ending the run ({config.ROBOT_MAX_NUMBER} by default)",
+)
+@click.option(
+    "--seed",
+    type=int,
+    help="Seed of the random numbers, to reproduce a run on a virtual clock",
+)
+@click.option(
+    "--strategy",
+    "strategy_name",
+    default="greedy",
+    metavar="NAME",
+    help=(
+        "Strategy choosing the activities of the robots: greedy (by default), "
+        "dispatch, or the import path of a class, package.module:Class"
+    ),
+)
+@click.option(
+    "--strategy-param",
+    "strategy_settings",
+    multiple=True,
+    metavar="NAME=VALUE",
+    help="Change a parameter of the strategy, such as sell_min=5. Can be repeated",
+)
+@click.option(
+    "--metrics",
+    "metrics_path",
+    type=click.Path(dir_okay=False, writable=True, allow_dash=True),
+    help="Write the metrics of the run to this file, or to stdout with -",
+)
+@click.option(
+    "--metrics-format",
+    default="json",
+    type=click.Choice(["json", "prometheus"]),
+    help="Format of the metrics (json by default)",
+)
+@click.option(
+    "--trace",
+    "trace_path",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write a timeline of the robots activities, to open in Perfetto",
+)
+@click.option(
+    "--events",
+    "events_path",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Record every completed activity in a binary log, to analyze with NumPy",
+)
+@click.option(
+    "--checkpoint",
+    "checkpoint_path",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Regularly save the factory to this file, to resume it later",
+)
+@click.option(
+    "--checkpoint-interval",
+    default=60,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Factory seconds between two checkpoints (60 by default)",
+)
+@click.option(
+    "--resume",
+    "resume_path",
+    type=click.Path(exists=True, dir_okay=False),
+    help=(
+        "Resume the factory saved in this checkpoint, with its rules, seed and "
+        "strategy"
+    ),
+)
+@click.option(
+    "--dashboard",
+    "show_dashboard",
+    is_flag=True,
+    help="Show a live panel of the factory instead of a line per new robot",
+)
+@click.option(
+    "-q",
+    "--quiet",
+    is_flag=True,
+    help="Do not print a line for each new robot",
+)
 @click.option(
     "-v",
     "--verbose",
     count=True,
     help="Use multiple times to increase verbosity",
 )
-def cli(speed: float, verbose: int) -> None:
+@click.option(
+    "--log-async",
+    is_flag=True,
+    help="Write the logs and messages from a background thread",
+)
+@click.option(
+    "--log-sample",
+    default=1,
+    type=click.IntRange(min=1),
+    metavar="N",
+    help="Log only one activity out of N, for each activity",
+)
+@click.option(
+    "--log-rate",
+    type=click.FloatRange(min=0, min_open=True),
+    metavar="N",
+    help="Log at most N activities per second, for each activity",
+)
+@click.option(
+    "--log-summary",
+    type=click.FloatRange(min=0, min_open=True),
+    metavar="SECONDS",
+    help="Log a summary of the activities every SECONDS, instead of each of them",
+)
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    speed: float,
+    virtual_clock: bool,
+    config_path: Optional[str],
+    settings: Sequence[str],
+    max_robots: Optional[int],
+    seed: Optional[int],
+    strategy_name: str,
+    strategy_settings: Sequence[str],
+    metrics_path: Optional[str],
+    metrics_format: str,
+    trace_path: Optional[str],
+    events_path: Optional[str],
+    checkpoint_path: Optional[str],
+    checkpoint_interval: float,
+    resume_path: Optional[str],
+    show_dashboard: bool,
+    quiet: bool,
+    verbose: int,
+    log_async: bool,
+    log_sample: int,
+    log_rate: Optional[float],
+    log_summary: Optional[float],
+) -> None:
     configure_logging(verbose)
+    if resume_path is not None:
+        saved = {
+            "--config": config_path is not None,
+            "--set": bool(settings),
+            "--max-robots": max_robots is not None,
+            "--seed": seed is not None,
+            "--strategy": (
+                ctx.get_parameter_source("strategy_name") is not ParameterSource.DEFAULT
+            ),
+            "--strategy-param": bool(strategy_settings),
+        }
+        conflicts = [option for option, given in saved.items() if given]
+        if conflicts:
+            raise click.UsageError(
+                f"{', '.join(conflicts)} cannot be used with --resume: the rules, "
+                "seed and strategy of a resumed factory are saved in its checkpoint"
+            )
+    ctx.obj = load_config(config_path, settings, max_robots)
+    if ctx.invoked_subcommand is not None:
+        return
 
     banner_path = Path(__file__).parent / Path("banner.txt")
     with open(banner_path) as f:
         click.echo(f.read())
 
     click.echo("[*] Starting factory...")
-    factory = Factory(speed=speed)
+    metrics = None if metrics_path is None else Metrics()
+    tracer = None if trace_path is None else Tracer(trace_path)
+    event_log = None if events_path is None else EventLog(events_path)
+    writer = logs.LogWriter() if log_async else None
+    log_sampler = None
+    if log_sample > 1 or log_rate is not None or log_summary is not None:
+        log_sampler = logs.ActivitySampler(
+            decorators.logger, log_sample, log_rate, log_summary
+        )
+    echo: Optional[Callable[[str], None]] = (
+        click.echo if writer is None else writer.echo
+    )
+    if quiet or show_dashboard:
+        echo = None
+    options: Dict[str, Any] = dict(
+        speed=speed,
+        virtual_clock=virtual_clock,
+        echo=echo,
+        metrics=metrics,
+        tracer=tracer,
+        event_log=event_log,
+        log_sampler=log_sampler,
+        checkpointer=(
+            None
+            if checkpoint_path is None
+            else checkpoint.Checkpointer(checkpoint_path, checkpoint_interval)
+        ),
+    )
+    if resume_path is not None:
+        try:
+            state = checkpoint.load(resume_path)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--resume")
+        factory = checkpoint.restore(state, **options)
+        click.echo(
+            f"[*] Resuming after {state.run_time:.1f} seconds, "
+            f"with {len(factory.robots)} robots"
+        )
+    else:
+        try:
+            factory = Factory(
+                config=ctx.obj,
+                seed=seed,
+                strategy=strategy_name,
+                strategy_parameters=parse_parameters(strategy_settings),
+                **options,
+            )
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        # Append the robots separately so they both have a distinct id
+        factory.add_robot(Robot(factory=factory))
+        factory.add_robot(Robot(factory=factory))
+
+    observers = []
+    if show_dashboard:
+        # A snapshot per frame, or per factory second on a virtual clock
+        interval = 1 if virtual_clock else speed / dashboard.FPS
+        observers.append(dashboard.Dashboard(interval).run)
+    if writer is not None:
+        writer.start()
+    try:
+        factory.run(*observers)
+    finally:
+        if log_sampler is not None:
+            log_sampler.flush()
+        if writer is not None:
+            writer.stop()
+        if tracer is not None:
+            tracer.close()
+        if event_log is not None:
+            event_log.close()
+
+    if virtual_clock:
+        click.echo(f"[*] Simulated time: {factory.elapsed:.1f} seconds")
 
-    # Append the robots separately so they both have a distinct id
-    factory.add_robot(Robot(factory=factory))
-    factory.add_robot(Robot(factory=factory))
+    if metrics is not None and metrics_path is not None:
+        metrics.write(metrics_path, metrics_format)
+
+
+@cli.command()
+@click.option(
+    "-n",
+    "--runs",
+    default=1000,
+    type=click.IntRange(min=1),
+    help="Number of factories to simulate (1000 by default)",
+)
+@click.option(
+    "--seed",
+    default=0,
+    type=int,
+    help="Seed of the first run, the following runs use the next seeds (0 by default)",
+)
+@click.option(
+    "-w",
+    "--workers",
+    default=os.cpu_count(),
+    type=click.IntRange(min=1),
+    help="Number of worker processes (the number of CPUs by default)",
+)
+@click.option(
+    "--engine",
+    default="objects",
+    type=click.Choice(["objects", "vectorized"]),
+    help="Simulate robots as objects, or all factories at once with NumPy arrays",
+)
+@click.option(
+    "--strategy",
+    "strategy_name",
+    default="greedy",
+    metavar="NAME",
+    help="Strategy choosing the activities of the robots (greedy by default)",
+)
+@click.option(
+    "--strategy-param",
+    "strategy_settings",
+    multiple=True,
+    metavar="NAME=VALUE",
+    help="Change a parameter of the strategy. Can be repeated",
+)
+@cache_option
+@click.option("--json", "as_json", is_flag=True, help="Output the results as JSON")
+@click.pass_obj
+def batch(
+    factory_config: FactoryConfig,
+    runs: int,
+    seed: int,
+    workers: int,
+    engine: str,
+    strategy_name: str,
+    strategy_settings: Sequence[str],
+    cache_path: Optional[str],
+    as_json: bool,
+) -> None:
+    """Run many independent factories on a virtual clock, and summarize them."""
+
+    parameters = parse_parameters(strategy_settings)
+    if engine == "vectorized":
+        if strategy_name != "greedy" or parameters:
+            raise click.UsageError(
+                "The vectorized engine only runs the default greedy strategy"
+            )
+        if cache_path is not None:
+            raise click.UsageError("The vectorized engine does not cache its runs")
+        from foobartory import vectorized
+
+        result = vectorized.simulate(
+            count=runs, seed=seed, config=factory_config
+        ).to_batch_result()
+    else:
+        with open_cache(cache_path) as cache:
+            result = batch_module.run_batch(
+                runs=runs,
+                seed=seed,
+                workers=workers,
+                config=factory_config,
+                strategy=strategy_name,
+                parameters=parameters,
+                cache=cache,
+            )
+    if as_json:
+        click.echo(json.dumps(result.to_dict(), indent=2))
+    else:
+        click.echo(batch_module.format_batch(result, factory_config))
+
+
+@cli.command()
+@click.option(
+    "--strategy",
+    "strategy_name",
+    default="greedy",
+    metavar="NAME",
+    help="Strategy whose parameters to search (greedy by default)",
+)
+@click.option(
+    "-p",
+    "--param",
+    "space",
+    multiple=True,
+    required=True,
+    metavar="NAME=VALUES",
+    help=(
+        "Values of a parameter to search: a list such as sell_min=1,3,5 for a grid "
+        "search, or bounds such as sell_min=1:5 for an evolutionary search. Can be "
+        "repeated"
+    ),
+)
+@click.option(
+    "-n",
+    "--runs",
+    default=100,
+    type=click.IntRange(min=2),
+    help="Number of factories simulated per parameter set (100 by default)",
+)
+@click.option(
+    "--seed",
+    default=0,
+    type=int,
+    help="Seed of the first run of each parameter set (0 by default)",
+)
+@click.option(
+    "-w",
+    "--workers",
+    default=os.cpu_count(),
+    type=click.IntRange(min=1),
+    help="Number of worker processes (the number of CPUs by default)",
+)
+@click.option(
+    "--population",
+    default=8,
+    type=click.IntRange(min=2),
+    help="Parameter sets per generation of an evolutionary search (8 by default)",
+)
+@click.option(
+    "--generations",
+    default=5,
+    type=click.IntRange(min=1),
+    help="Generations of an evolutionary search (5 by default)",
+)
+@click.option(
+    "--top",
+    default=5,
+    type=click.IntRange(min=1),
+    help="Number of parameter sets to report (5 by default)",
+)
+@cache_option
+@click.option("--json", "as_json", is_flag=True, help="Output the results as JSON")
+@click.pass_obj
+def optimize(
+    factory_config: FactoryConfig,
+    strategy_name: str,
+    space: Sequence[str],
+    runs: int,
+    seed: int,
+    workers: int,
+    population: int,
+    generations: int,
+    top: int,
+    cache_path: Optional[str],
+    as_json: bool,
+) -> None:
+    """Search the parameters of a strategy minimizing the mean time to reach the
+    maximum number of robots, on seeded factories run in parallel."""
+
+    values, bounds = parse_space(space)
+    try:
+        with open_cache(cache_path) as cache, optimizer.Search(
+            strategy_name,
+            runs=runs,
+            seed=seed,
+            workers=workers,
+            config=factory_config,
+            cache=cache,
+        ) as search:
+            if not bounds:
+                optimizer.grid_search(search, values)
+            else:
+                # Parameters given a single value stay fixed
+                for name, numbers in values.items():
+                    if len(numbers) > 1:
+                        raise ValueError("Cannot mix lists of values and bounds")
+                    bounds[name] = (numbers[0], numbers[0])
+                optimizer.evolve(search, bounds, population, generations, seed)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    ranking = search.ranking[:top]
+    if as_json:
+        click.echo(json.dumps([e.to_dict() for e in ranking], indent=2))
+        return
+    click.echo(
+        f"{len(search.evaluations)} parameter sets of {strategy_name}, "
+        f"{runs} runs each, by mean time to {factory_config.robot_max_number} robots "
+        f"(s) [{optimizer.CONFIDENCE:.0%} confidence interval]:"
+    )
+    for evaluation in ranking:
+        click.echo(str(evaluation))
+
+
+@cli.group(name="cache")
+def cache_group() -> None:
+    """Inspect or prune the cache of the results of the runs."""
+
+
+@cache_group.command()
+@cache_option
+def info(cache_path: Optional[str]) -> None:
+    """Show the number of runs in the cache, and its size."""
+
+    if cache_path is None:
+        raise click.UsageError("Missing option '--cache'")
+    with cache_module.ResultCache(cache_path) as cache:
+        click.echo(str(cache.info()))
+
+
+@cache_group.command()
+@cache_option
+@click.option(
+    "--max-entries",
+    type=click.IntRange(min=0),
+    help="Keep at most this number of runs, the least recently used being removed",
+)
+@click.option(
+    "--stale",
+    is_flag=True,
+    help="Remove the runs saved by other versions of the code",
+)
+def prune(cache_path: Optional[str], max_entries: Optional[int], stale: bool) -> None:
+    """Remove runs from the cache, and shrink its file."""
+
+    if cache_path is None:
+        raise click.UsageError("Missing option '--cache'")
+    with cache_module.ResultCache(cache_path) as cache:
+        removed = cache.prune(max_entries, stale)
+        click.echo(f"[*] Removed {removed} runs")
+        click.echo(str(cache.info()))
+
+
+@cli.command()
+@click.option(
+    "--robots",
+    default=2,
+    type=click.IntRange(min=1),
+    help="Number of robots at the start (2 by default)",
+)
+@click.option("--curve", is_flag=True, help="Also show when each robot is bought")
+@click.option("--json", "as_json", is_flag=True, help="Output the estimate as JSON")
+@click.pass_obj
+def estimate(
+    factory_config: FactoryConfig, robots: int, curve: bool, as_json: bool
+) -> None:
+    """Estimate the time to reach the maximum number of robots, without simulating."""
+
+    try:
+        result = estimate_module.Estimate.from_config(factory_config, robots)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    if as_json:
+        click.echo(json.dumps(result.to_dict(), indent=2))
+        return
+    click.echo(
+        f"time to {factory_config.robot_max_number} robots (s): {result.elapsed:.2f}"
+    )
+    click.echo(
+        f"robot time per robot bought (s): {result.robot_time:.2f} "
+        f"(work={result.work:.2f} switches={result.switches:.2f})"
+    )
+    click.echo(f"lag of the first sale (s): {result.lag:.2f}")
+    if curve:
+        for count, time in result.curve:
+            click.echo(f"{count} robots: {time:.2f}")
+
+
+@cli.command()
+@click.option(
+    "--socket",
+    "path",
+    required=True,
+    type=click.Path(dir_okay=False),
+    help="Path of the Unix socket to listen to",
+)
+@click.pass_context
+def coordinator(ctx: click.Context, path: str) -> None:
+    """Run the factory as a coordinator, serving robots run by worker processes."""
+
+    coordinator = network.Coordinator(
+        path, ctx.obj, speed=ctx.find_root().params["speed"], echo=click.echo
+    )
+    try:
+        asyncio.run(coordinator.run())
+    except ConnectionError as e:
+        raise click.ClickException(str(e))
+    click.echo(
+        f"[*] Served {coordinator.messages} messages "
+        f"of {coordinator.commands} commands"
+    )
+
+
+@cli.command()
+@click.option(
+    "--socket",
+    "path",
+    required=True,
+    type=click.Path(dir_okay=False),
+    help="Path of the Unix socket of the coordinator",
+)
+@click.option("--seed", default=0, type=int, help="Seed of the robots (0 by default)")
+@click.option(
+    "--batch",
+    "batch_size",
+    default=network.BATCH_SIZE,
+    type=click.IntRange(min=1),
+    help=f"Operations sent together by each robot ({network.BATCH_SIZE} by default)",
+)
+@click.pass_context
+def worker(ctx: click.Context, path: str, seed: int, batch_size: int) -> None:
+    """Run robots adopted from a coordinator, until it has all its robots, with the
+    strategy of the main options."""
 
-    factory.run()
+    params = ctx.find_root().params
+    strategy_parameters = parse_parameters(params["strategy_settings"])
+    try:
+        worker = network.Worker(
+            path,
+            ctx.obj,
+            params["speed"],
+            seed,
+            batch_size,
+            params["strategy_name"],
+            strategy_parameters,
+        )
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    asyncio.run(worker.run())
 
 
 def main():
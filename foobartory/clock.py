@@ -0,0 +1,103 @@
+import asyncio
+import heapq
+import itertools
+import selectors
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class _VirtualSelector(selectors.DefaultSelector):  # type: ignore
+    """A selector that never blocks while timers are pending.
+
+    Instead of waiting for the next timer to expire, it polls for I/O and, if nothing
+    is ready, advances the virtual clock up to the timer.
+    """
+
+    def __init__(self, advance: Callable[[float], None]) -> None:
+        super().__init__()
+        self._advance = advance
+
+    def select(
+        self, timeout: Optional[float] = None
+    ) -> List[Tuple[selectors.SelectorKey, int]]:
+        if timeout is None:
+            # Nothing is scheduled: only real I/O (or another thread) can wake us up.
+            return super().select(None)
+
+        ready = super().select(0)
+        if not ready:
+            self._advance(timeout)
+        return ready
+
+
+class _OrderedTimerHandle(asyncio.TimerHandle):
+    """A timer ordered by deadline, then by scheduling order."""
+
+    __slots__ = ("_sequence",)
+
+    def __init__(self, sequence: int, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._sequence = sequence
+
+    def __lt__(self, other: "_OrderedTimerHandle") -> bool:  # type: ignore
+        # The deadline is a private attribute, read directly as timers are compared
+        # on every operation on the heap
+        when, other_when = self._when, other._when  # type: ignore
+        if when == other_when:
+            return self._sequence < other._sequence
+        return when < other_when
+
+
+class VirtualClockEventLoop(asyncio.SelectorEventLoop):  # type: ignore
+    """An event loop running on a simulated clock.
+
+    The loop keeps its own notion of time, starting at 0. Whenever there is no callback
+    ready to run, it jumps straight to the next scheduled timer instead of sleeping,
+    so that ``asyncio.sleep`` returns immediately in wall-clock time while the
+    simulated time still elapses.
+
+    Timers due at the same time run in the order they were scheduled. This way, the
+    events of a task only depend on its own timers, and not on the timers of other
+    tasks sharing the loop.
+    """
+
+    def __init__(self) -> None:
+        self._virtual_time = 0.0
+        self._timers = itertools.count()
+        super().__init__(selector=_VirtualSelector(self._advance))
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def call_at(  # type: ignore
+        self, when: float, callback: Callable[..., Any], *args: Any, context: Any = None
+    ) -> asyncio.TimerHandle:
+        # Same as the base implementation, with ordered timers
+        self._check_closed()  # type: ignore
+        timer = _OrderedTimerHandle(
+            next(self._timers), when, callback, args, self, context
+        )
+        heapq.heappush(self._scheduled, timer)  # type: ignore
+        timer._scheduled = True  # type: ignore
+        return timer
+
+    def _advance(self, delay: float) -> None:
+        if delay <= 0:
+            return
+        # Jump exactly to the next timer, rather than accumulating rounding errors
+        scheduled = self._scheduled  # type: ignore
+        when = scheduled[0].when() if scheduled else None
+        if when is not None and when - self._virtual_time <= delay:
+            self._virtual_time = when
+        else:
+            self._virtual_time += delay
+
+
+def cancel_pending_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    """Cancel all the tasks still pending in the given loop, and wait for them."""
+
+    tasks = asyncio.all_tasks(loop)
+    if not tasks:
+        return
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
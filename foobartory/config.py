@@ -1,4 +1,9 @@
+import dataclasses
+import os
+from typing import Any, Callable, Mapping, NamedTuple, cast
+
 ROBOT_MAX_NUMBER = 30
+MIN_ROBOT_MAX_NUMBER = 3
 ROBOT_COST_EUROS = 3
 ROBOT_COST_FOO = 6
 SWITCH_ACTIVITY_DELAY = 5
@@ -8,5 +13,124 @@ BAR_MINING_MAX_DELAY = 2
 FOOBAR_PRICE = 1
 FOOBAR_SUCCESS_RATE = 0.6
 FOOBAR_CREATION_DELAY = 2
+FOOBAR_SELL_MIN = 3
 FOOBAR_SELL_MAX = 5
 FOOBAR_SELL_DELAY = 10
+
+# Activities of the robots, in the order of their codes in compact formats
+ACTIVITIES = ("harvest_foo", "harvest_bar", "create_foobar", "sell_foobar", "buy_robot")
+
+# Prefix of the environment variables overriding the settings of a factory
+ENV_PREFIX = "FOOBARTORY_"
+
+
+class Delays(NamedTuple):
+    """Durations of the activities, in seconds of the event loop."""
+
+    switch_activity: float
+    foo_mining: float
+    bar_mining_min: float
+    bar_mining_max: float
+    foobar_creation: float
+    foobar_sell: float
+
+
+@dataclasses.dataclass(frozen=True)
+class FactoryConfig:
+    """The rules of a factory, durations being in factory seconds.
+
+    Each factory has its own configuration, so that differently configured factories
+    can run in the same process. A configuration can be loaded from a TOML file, and
+    updated from the environment (``FOOBARTORY_FOOBAR_SELL_MAX=4``, for instance) or
+    from any mapping of setting names to values.
+    """
+
+    robot_max_number: int = ROBOT_MAX_NUMBER
+    robot_cost_euros: int = ROBOT_COST_EUROS
+    robot_cost_foo: int = ROBOT_COST_FOO
+    switch_activity_delay: float = SWITCH_ACTIVITY_DELAY
+    foo_mining_delay: float = FOO_MINING_DELAY
+    bar_mining_min_delay: float = BAR_MINING_MIN_DELAY
+    bar_mining_max_delay: float = BAR_MINING_MAX_DELAY
+    foobar_price: int = FOOBAR_PRICE
+    foobar_success_rate: float = FOOBAR_SUCCESS_RATE
+    foobar_creation_delay: float = FOOBAR_CREATION_DELAY
+    foobar_sell_min: int = FOOBAR_SELL_MIN
+    foobar_sell_max: int = FOOBAR_SELL_MAX
+    foobar_sell_delay: float = FOOBAR_SELL_DELAY
+
+    def __post_init__(self) -> None:
+        for field in dataclasses.fields(self):
+            if getattr(self, field.name) < 0:
+                raise ValueError(f"{field.name} must be positive")
+        if self.robot_max_number < MIN_ROBOT_MAX_NUMBER:
+            # Factories start with 2 robots, and the run ends on buying one more
+            raise ValueError(
+                f"robot_max_number must be at least {MIN_ROBOT_MAX_NUMBER}"
+            )
+        if self.bar_mining_min_delay > self.bar_mining_max_delay:
+            raise ValueError(
+                "bar_mining_min_delay must not exceed bar_mining_max_delay"
+            )
+        if not 1 <= self.foobar_sell_min <= self.foobar_sell_max:
+            raise ValueError("foobar_sell_min must be between 1 and foobar_sell_max")
+        if self.foobar_success_rate > 1:
+            raise ValueError("foobar_success_rate must not exceed 1")
+
+    @classmethod
+    def from_toml(cls, path: str) -> "FactoryConfig":
+        """Load a configuration from the settings at the top level of a TOML file."""
+
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib  # type: ignore
+
+        with open(path, "rb") as f:
+            return cls().update(tomllib.load(f))
+
+    def update(self, values: Mapping[str, Any]) -> "FactoryConfig":
+        """Return a copy of the configuration with the given settings.
+
+        Values are converted to the type of their setting, so they can be strings.
+        """
+
+        fields = {field.name: field for field in dataclasses.fields(self)}
+        changes = {}
+        for name, value in values.items():
+            name = name.lower()
+            if name not in fields:
+                raise ValueError(f"Unknown setting: {name}")
+            type_ = cast(Callable[[Any], Any], fields[name].type)
+            try:
+                if type_ is int and isinstance(value, float) and not value.is_integer():
+                    raise ValueError
+                changes[name] = type_(value)
+            except ValueError:
+                raise ValueError(f"Invalid value for {name}: {value!r}") from None
+        return dataclasses.replace(self, **changes)
+
+    def update_from_env(
+        self, environ: Mapping[str, str] = os.environ
+    ) -> "FactoryConfig":
+        """Return a copy of the configuration, with the settings from ``environ``."""
+
+        return self.update(
+            {
+                field.name: environ[ENV_PREFIX + field.name.upper()]
+                for field in dataclasses.fields(self)
+                if ENV_PREFIX + field.name.upper() in environ
+            }
+        )
+
+    def delays(self, speed: float) -> Delays:
+        """Durations of the activities of a factory running at ``speed``."""
+
+        return Delays(
+            switch_activity=self.switch_activity_delay / speed,
+            foo_mining=self.foo_mining_delay / speed,
+            bar_mining_min=self.bar_mining_min_delay / speed,
+            bar_mining_max=self.bar_mining_max_delay / speed,
+            foobar_creation=self.foobar_creation_delay / speed,
+            foobar_sell=self.foobar_sell_delay / speed,
+        )
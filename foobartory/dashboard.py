@@ -0,0 +1,91 @@
+import collections
+import math
+import time
+from typing import TYPE_CHECKING, Callable, Deque, Optional, Tuple
+
+import click
+
+from foobartory.config import ACTIVITIES
+from foobartory.snapshots import Snapshot, watch
+
+if TYPE_CHECKING:
+    from foobartory.models import Factory
+
+# Maximum number of redraws per second
+FPS = 4
+# Factory seconds over which the rates are measured
+RATE_WINDOW = 30
+BAR_WIDTH = 30
+
+
+class Dashboard:
+    """A panel summarizing a running factory, redrawn at most ``fps`` times per
+    second.
+
+    The panel is rendered from snapshots of the factory taken every ``interval``
+    factory seconds, so that its cost does not depend on the number of events.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        fps: float = FPS,
+        draw: Optional[Callable[[str], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.interval = interval
+        self.fps = fps
+        self._draw = _redraw if draw is None else draw
+        self._clock = clock
+        # Recent (time, robots, actions), to measure the rates
+        self._history: Deque[Tuple[float, int, int]] = collections.deque()
+
+    async def run(self, factory: "Factory") -> None:
+        drawn_at = -math.inf
+        ceiling = factory.config.robot_max_number
+        async for snapshot in watch(factory, self.interval):
+            panel = self.render(snapshot, ceiling, factory.speed)
+            now = self._clock()
+            if factory.finished or now - drawn_at >= 1 / self.fps:
+                self._draw(panel)
+                drawn_at = now
+
+    def render(self, snapshot: Snapshot, ceiling: int, speed: float = 1) -> str:
+        """Render the panel of a snapshot, and record it to measure the rates."""
+
+        history = self._history
+        history.append((snapshot.time, snapshot.robots, snapshot.actions))
+        while history[-1][0] - history[0][0] > RATE_WINDOW:
+            history.popleft()
+        start, robots, actions = history[0]
+        elapsed = snapshot.time - start
+        actions_rate = (snapshot.actions - actions) / elapsed if elapsed else 0.0
+        robots_rate = (snapshot.robots - robots) / elapsed if elapsed else 0.0
+        if snapshot.robots >= ceiling:
+            eta = "reached"
+        elif robots_rate > 0:
+            eta = f"{(ceiling - snapshot.robots) / robots_rate:.0f}s"
+        else:
+            eta = "-"
+
+        filled = min(BAR_WIDTH, BAR_WIDTH * snapshot.robots // ceiling)
+        counts = snapshot.activity_counts
+        activities = "  ".join(f"{name} {counts.get(name, 0)}" for name in ACTIVITIES)
+        return "\n".join(
+            [
+                f"Foobartory  time {snapshot.time:.1f}s  speed x{speed:g}",
+                f"Robots      {'#' * filled}{'.' * (BAR_WIDTH - filled)} "
+                f"{snapshot.robots}/{ceiling}",
+                f"Account     {snapshot.account} EUR",
+                f"Stocks      foo {snapshot.foo}  bar {snapshot.bar}  "
+                f"foobar {snapshot.foobar}",
+                f"Activities  {activities}",
+                f"Actions/s   {actions_rate:.1f}",
+                f"ETA         {eta}",
+            ]
+        )
+
+
+def _redraw(panel: str) -> None:
+    click.clear()
+    click.echo(panel)
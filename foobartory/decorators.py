@@ -1,6 +1,6 @@
 import functools
 import logging
-from typing import TYPE_CHECKING, Awaitable, Callable
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
 if TYPE_CHECKING:
     from foobartory.models import Robot
@@ -8,18 +8,56 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
-def activity(func: Callable[["Robot"], Awaitable]):
+def activity(func: Callable[..., Awaitable]):
     """A decorator to add a check before performing an activity.
 
     When a robot is changing its current activity, it must sleep for several seconds.
+    If the factory has metrics, a tracer or an event log, the time spent switching
+    and performing the activity is recorded.
     """
 
     @functools.wraps(func)
-    async def wrapper(self: "Robot"):
-        await self.check_activity(func.__name__)
-        await func(self)
-        if not self._stopped:
-            logger.info("[*] %s did %s", self, func.__name__)
-            logger.debug(self._factory)
+    async def wrapper(self: "Robot", *args: Any):
+        factory = self._factory
+        metrics, tracer, event_log = factory.metrics, factory.tracer, factory.event_log
+        self._in_progress = func.__name__
+        self._reservation = args[0] if args else None
+        if metrics is None and tracer is None and event_log is None:
+            await self.check_activity(func.__name__)
+            await func(self, *args)
+        else:
+            started_at = factory.run_time()
+            await self.check_activity(func.__name__)
+            switched_at = factory.run_time()
+            result = await func(self, *args)
+            ended_at = factory.run_time()
+            if metrics is not None:
+                metrics.observe_activity(
+                    func.__name__,
+                    switch=switched_at - started_at,
+                    duration=ended_at - switched_at,
+                )
+            if tracer is not None:
+                tracer.span(
+                    func.__name__, self._id, switched_at, ended_at - switched_at
+                )
+                factory.trace_counters()
+            if event_log is not None:
+                self._record_event(
+                    event_log,
+                    func.__name__,
+                    result,
+                    ended_at,
+                    switch=switched_at - started_at,
+                    duration=ended_at - switched_at,
+                )
+        self._in_progress = self._reservation = None
+        factory.activities[func.__name__] += 1
+        factory.notify_change()
+        if not self._stopped and logger.isEnabledFor(logging.INFO):
+            sampler = factory.log_sampler
+            if sampler is None or sampler.keep(func.__name__):
+                logger.info("[*] %s did %s", self, func.__name__)
+                logger.debug(self._factory)
 
     return wrapper
@@ -0,0 +1,147 @@
+import collections
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from foobartory.config import ACTIVITIES, FactoryConfig
+from foobartory.strategy import Choice, Greedy, Strategy
+
+if TYPE_CHECKING:
+    from foobartory.models import Factory, Robot
+
+ROLES = ACTIVITIES
+# Number of robots below which roles cannot all be staffed
+MIN_FLEET = 4
+# Default number of switches of surplus work beyond which a robot is reassigned
+SWITCH_MARGIN = 2
+
+
+def workload(config: FactoryConfig) -> Dict[str, float]:
+    """Share of the robot time each activity takes to buy a robot, on average."""
+
+    sold = config.robot_cost_euros / config.foobar_price
+    attempts = sold / config.foobar_success_rate
+    bar_mining = (config.bar_mining_min_delay + config.bar_mining_max_delay) / 2
+    times = {
+        "harvest_foo": (config.robot_cost_foo + attempts) * config.foo_mining_delay,
+        "harvest_bar": sold * bar_mining,
+        "create_foobar": attempts * config.foobar_creation_delay,
+        "sell_foobar": sold / config.foobar_sell_max * config.foobar_sell_delay,
+        # Buying takes no time, but a robot waiting for it saves two switches
+        "buy_robot": config.foo_mining_delay,
+    }
+    total = sum(times.values())
+    return {role: time / total for role, time in times.items()}
+
+
+class Dispatcher(Strategy):
+    """Assign a role to each robot of a factory, so that robots stop switching
+    between activities, and stop rushing to the same stock.
+
+    Roles are shared out in proportion to the :func:`workload` of each activity, each
+    new robot taking the role with the largest deficit. A robot performs its role
+    whenever it can, and waits for a change of the factory otherwise. It is only
+    reassigned when the stock it fills holds more work than ``switch_margin``
+    switches beyond what its consumers need. Sellers wait for full sales, and buy
+    robots as long as no robot has the buyer role.
+
+    Until the factory has ``min_fleet`` robots, the first robot only harvests Foo,
+    and the others choose greedily. Each decision costs the same, whatever the number
+    of robots.
+    """
+
+    waits = True
+
+    def __init__(self, factory: "Factory", **parameters: float) -> None:
+        super().__init__(factory, **parameters)
+        config = factory.config
+        if not config.foobar_price or not config.foobar_success_rate:
+            raise ValueError("Robots can only be dispatched if FooBars earn money")
+        self.weights = workload(config)
+        self.roles: Dict["Robot", str] = {}
+        self.counts: "collections.Counter[str]" = collections.Counter()
+        self._greedy = Greedy(factory)
+        self._min_fleet = self.parameters["min_fleet"]
+        if self._min_fleet < MIN_FLEET:
+            raise ValueError(f"min_fleet must be at least {MIN_FLEET}")
+        self._margin = self.parameters["switch_margin"] * config.switch_activity_delay
+
+    @classmethod
+    def defaults(cls, config: FactoryConfig) -> Dict[str, float]:
+        return {"min_fleet": MIN_FLEET, "switch_margin": SWITCH_MARGIN}
+
+    def choose(self, robot: "Robot") -> Choice:
+        factory = self.factory
+        if len(factory.robots) < self._min_fleet:
+            if robot is factory.robots[0] and not robot.must_buy_robot:
+                return "harvest_foo", ()
+            return self._greedy.choose(robot)
+
+        role = self.roles.get(robot) or self._assign(robot)
+        if self.counts[role] > 1 and self._surplus(role) > self._margin:
+            role = self._assign(robot, exclude=role)
+
+        config, ledger = factory.config, factory.ledger
+        if role == "buy_robot" or (
+            role == "sell_foobar" and not self.counts["buy_robot"]
+        ):
+            if robot.must_buy_robot:
+                return "buy_robot", (
+                    ledger.reserve(
+                        foo=config.robot_cost_foo, euros=config.robot_cost_euros
+                    ),
+                )
+            if role == "buy_robot":
+                return "wait", ()
+        if role == "sell_foobar":
+            if factory.foobar_queue.qsize() < config.foobar_sell_max:
+                return "wait", ()
+            return "sell_foobar", (
+                ledger.reserve_foobar(config.foobar_sell_min, config.foobar_sell_max),
+            )
+        if role == "create_foobar":
+            if not robot.must_create_foobar:
+                return "wait", ()
+            return "create_foobar", (ledger.reserve(foo=1, bar=1),)
+        return role, ()
+
+    def getstate(self) -> Dict[str, Any]:
+        return {"roles": [self.roles.get(robot) for robot in self.factory.robots]}
+
+    def setstate(self, state: Dict[str, Any]) -> None:
+        self.roles = {
+            robot: role
+            for robot, role in zip(self.factory.robots, state["roles"])
+            if role is not None
+        }
+        self.counts = collections.Counter(self.roles.values())
+
+    def _assign(self, robot: "Robot", exclude: Optional[str] = None) -> str:
+        """Give ``robot`` the role with the largest deficit, other than ``exclude``."""
+
+        previous = self.roles.pop(robot, None)
+        if previous is not None:
+            self.counts[previous] -= 1
+        robots = len(self.roles) + 1
+        role = max(
+            (role for role in ROLES if role != exclude),
+            key=lambda role: self.weights[role] * robots - self.counts[role],
+        )
+        self.roles[robot] = role
+        self.counts[role] += 1
+        return role
+
+    def _surplus(self, role: str) -> float:
+        """Robot seconds of work in the stock filled by ``role``, beyond what its
+        consumers need."""
+
+        factory, config, counts = self.factory, self.factory.config, self.counts
+        if role == "harvest_foo":
+            needed = config.robot_cost_foo + counts["create_foobar"]
+            return (factory.foo_queue.qsize() - needed) * config.foo_mining_delay
+        if role == "harvest_bar":
+            bar_mining = (config.bar_mining_min_delay + config.bar_mining_max_delay) / 2
+            return (factory.bar_queue.qsize() - counts["create_foobar"]) * bar_mining
+        if role == "create_foobar":
+            needed = config.foobar_sell_max * counts["sell_foobar"]
+            attempt = config.foobar_creation_delay / config.foobar_success_rate
+            return (factory.foobar_queue.qsize() - needed) * attempt
+        return 0.0
@@ -0,0 +1,132 @@
+import dataclasses
+from typing import Dict, List, Tuple
+
+from foobartory.config import FactoryConfig
+
+# Both constants are fitted by least squares to the mean time of 20 simulated runs,
+# for rules varying the delays, the price and cost in euros, and the success rate of
+# FooBars. The tests also check the estimate on rules outside this set.
+#
+# Robot time spent on the Foo, Bar and FooBars still in stock when robots are bought,
+# relative to the work needed to buy them: greedy robots rushing to the same stock
+# overshoot it
+OVERPRODUCTION = 1.2
+# Switches per robot bought, beyond those of the cycle of activities: to buy the robot
+# and back, and to refill the Foo it cost, often by several robots at once
+PURCHASE_SWITCHES = 4
+
+
+@dataclasses.dataclass(frozen=True)
+class Estimate:
+    """A fluid model of a factory whose robots choose their activities greedily.
+
+    Each robot bought costs ``robot_time`` seconds of robot work, harvesting, creating,
+    selling and switching between activities. With ``n`` robots, the next one is
+    bought after ``robot_time / n`` seconds, so that reaching ``N`` robots from
+    ``robots`` takes ``robot_time * (1 / robots + ... + 1 / (N - 1))`` seconds, plus
+    the ``lag`` of the first sale.
+
+    Greedy robots switch activities in a cycle: they switch to create each FooBar, and
+    back to replace the Foo it used. They also switch once to harvest the Bar of each
+    FooBar created, and once for each sale.
+    """
+
+    config: FactoryConfig
+    # Robots at the start of the run
+    robots: int
+    # Robot seconds spent working, and switching, per robot bought
+    work: float
+    switches: float
+    # Factory seconds the first sale waits for, that the fluid model misses
+    lag: float
+
+    @classmethod
+    def from_config(cls, config: FactoryConfig, robots: int = 2) -> "Estimate":
+        if not config.foobar_price or not config.foobar_success_rate:
+            raise ValueError("Robots can only be bought if FooBars earn money")
+        if robots < 1:
+            raise ValueError("The factory needs at least one robot")
+
+        sold = config.robot_cost_euros / config.foobar_price
+        attempts = sold / config.foobar_success_rate
+        # Greedy robots sell as soon as there are sell_min FooBars. About half of the
+        # time, another one was created meanwhile, and is also sold if sell_max allows
+        sale = (
+            config.foobar_sell_min
+            + min(config.foobar_sell_min + 1, config.foobar_sell_max)
+        ) / 2
+        sales = sold / sale
+        bar_mining = (config.bar_mining_min_delay + config.bar_mining_max_delay) / 2
+        activities = {
+            "harvest_foo": config.robot_cost_foo + attempts,
+            "harvest_bar": sold,
+            "create_foobar": attempts,
+            "sell_foobar": sales,
+            "buy_robot": 1,
+        }
+        durations = {
+            "harvest_foo": config.foo_mining_delay,
+            "harvest_bar": bar_mining,
+            "create_foobar": config.foobar_creation_delay,
+            "sell_foobar": config.foobar_sell_delay,
+            "buy_robot": 0,
+        }
+        work = sum(activities[name] * durations[name] for name in activities)
+        switches = 2 * attempts + sold + sales + PURCHASE_SWITCHES
+        # Robot seconds to create a FooBar. The first sale waits for sell_min FooBars,
+        # created by the robots of the start, whereas the fluid model sells each one
+        # as soon as it is created
+        foobar_attempts = 1 / config.foobar_success_rate
+        foobar_time = (
+            foobar_attempts * (config.foo_mining_delay + config.foobar_creation_delay)
+            + bar_mining
+            + (2 * foobar_attempts + 1) * config.switch_activity_delay
+        )
+        return cls(
+            config=config,
+            robots=robots,
+            work=OVERPRODUCTION * work,
+            switches=switches * config.switch_activity_delay,
+            lag=(config.foobar_sell_min - 1) * foobar_time / robots,
+        )
+
+    @property
+    def robot_time(self) -> float:
+        """Robot seconds needed to buy a robot."""
+
+        return self.work + self.switches
+
+    def time_to(self, robots: int) -> float:
+        """Expected factory seconds to reach ``robots`` robots."""
+
+        if robots <= self.robots:
+            return 0.0
+        return self.lag + self.robot_time * sum(
+            1 / n for n in range(self.robots, robots)
+        )
+
+    @property
+    def elapsed(self) -> float:
+        """Expected factory seconds to reach the maximum number of robots."""
+
+        return self.time_to(self.config.robot_max_number)
+
+    @property
+    def curve(self) -> List[Tuple[int, float]]:
+        """Expected factory seconds at which each robot is bought."""
+
+        curve, elapsed = [], self.lag
+        for robots in range(self.robots, self.config.robot_max_number):
+            elapsed += self.robot_time / robots
+            curve.append((robots + 1, elapsed))
+        return curve
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "elapsed": self.elapsed,
+            "robot_time": self.robot_time,
+            "work": self.work,
+            "switches": self.switches,
+            "lag": self.lag,
+            "curve": [{"robots": robots, "time": time} for robots, time in self.curve],
+        }
@@ -0,0 +1,154 @@
+import os
+import struct
+from typing import TYPE_CHECKING, Any, Optional
+
+from foobartory.config import ACTIVITIES
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MAGIC = b"FOOBAREV"
+VERSION = 1
+OUTCOMES = ("success", "failure", "skipped")
+SUCCESS, FAILURE, SKIPPED = range(len(OUTCOMES))
+
+_HEADER = struct.Struct("<8sHH4x")
+# End time, robot id, activity and outcome codes, changes of the foo, bar and
+# foobar stocks and of the account, time spent switching and performing the activity
+_RECORD = struct.Struct("<dIBBhhhiff")
+FIELDS = (
+    ("time", "<f8"),
+    ("robot", "<u4"),
+    ("activity", "u1"),
+    ("outcome", "u1"),
+    ("foo", "<i2"),
+    ("bar", "<i2"),
+    ("foobar", "<i2"),
+    ("euros", "<i4"),
+    ("switch", "<f4"),
+    ("duration", "<f4"),
+)
+
+
+class EventLog:
+    """Record every activity completed by the robots in a binary file.
+
+    Each event is a fixed-size record, packed into a buffer of ``buffer_size`` records
+    which is written in a single block when full. Times are in factory seconds.
+    The file can then be loaded with :func:`read`, as a NumPy structured array.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 4096) -> None:
+        self.buffer_size = buffer_size
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, VERSION, _RECORD.size))
+        self._buffer = bytearray(buffer_size * _RECORD.size)
+        self._count = 0
+        self._codes = {name: code for code, name in enumerate(ACTIVITIES)}
+
+    def __enter__(self) -> "EventLog":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def record(
+        self,
+        time: float,
+        robot: int,
+        activity: str,
+        outcome: int,
+        foo: int = 0,
+        bar: int = 0,
+        foobar: int = 0,
+        euros: int = 0,
+        switch: float = 0,
+        duration: float = 0,
+    ) -> None:
+        """Record that ``robot`` completed ``activity`` at ``time``, changing the
+        stocks and the account by the given amounts."""
+
+        _RECORD.pack_into(
+            self._buffer,
+            self._count * _RECORD.size,
+            time,
+            robot,
+            self._codes[activity],
+            outcome,
+            foo,
+            bar,
+            foobar,
+            euros,
+            switch,
+            duration,
+        )
+        self._count += 1
+        if self._count == self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self._file.write(memoryview(self._buffer)[: self._count * _RECORD.size])
+        self._count = 0
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+
+def read(path: str) -> "np.ndarray":
+    """Memory-map an event log as a structured array, with a field per column.
+
+    Records are only read from the disk when accessed, so that even huge logs open
+    instantly. A record truncated by an interrupted run is ignored.
+    """
+
+    import numpy as np
+
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+    try:
+        magic, version, record_size = _HEADER.unpack(header)
+    except struct.error:
+        raise ValueError("Not an event log")
+    if magic != MAGIC:
+        raise ValueError("Not an event log")
+    if version != VERSION:
+        raise ValueError(f"Unsupported event log version {version}")
+
+    dtype = np.dtype(list(FIELDS))
+    assert dtype.itemsize == record_size
+    size = (os.path.getsize(path) - _HEADER.size) // dtype.itemsize
+    if not size:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=_HEADER.size, shape=size)
+
+
+def throughput(
+    events: "np.ndarray", interval: float = 60, activity: Optional[str] = None
+) -> "np.ndarray":
+    """Number of successful events by period of ``interval`` factory seconds,
+    optionally only for ``activity``."""
+
+    import numpy as np
+
+    mask = events["outcome"] == SUCCESS
+    if activity is not None:
+        mask &= events["activity"] == ACTIVITIES.index(activity)
+    if not len(events):
+        return np.zeros(0, dtype=np.int64)
+    periods = (events["time"][mask] // interval).astype(np.int64)
+    return np.bincount(periods, minlength=int(events["time"].max() // interval) + 1)
+
+
+def utilization(events: "np.ndarray") -> "np.ndarray":
+    """Fraction of the time each robot spent performing activities, rather than
+    switching, indexed by robot id."""
+
+    import numpy as np
+
+    robots = events["robot"]
+    working = np.bincount(robots, weights=events["duration"])
+    busy = working + np.bincount(robots, weights=events["switch"])
+    return np.divide(working, busy, out=np.zeros_like(working), where=busy > 0)
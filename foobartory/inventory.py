@@ -0,0 +1,156 @@
+import asyncio
+import collections
+import dataclasses
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from foobartory.models import Factory
+
+
+class ItemQueue(asyncio.Queue):  # type: ignore
+    """A FIFO stock keeping every item, so that their provenance can be tracked."""
+
+    def __init__(self, item_type: Callable[..., Any]) -> None:
+        super().__init__()
+        self._item_type = item_type
+
+    def put_new(self, *parents: Any) -> None:
+        """Create a new item from its parents, and put it in stock."""
+
+        self.put_nowait(self._item_type(*parents))
+
+
+class Stock:
+    """A compact FIFO stock of items, held as a range of integer ids.
+
+    Items are not stored: putting an item only counts it, and getting one builds the
+    item on demand, identified by its rank of arrival in the stock. It offers the same
+    interface as :class:`ItemQueue`, without keeping any item alive.
+    """
+
+    __slots__ = ("_item_type", "_head", "_tail")
+
+    def __init__(self, item_type: Callable[..., Any]) -> None:
+        self._item_type = item_type
+        # Ids of the items in stock are in range(head, tail)
+        self._head = 0
+        self._tail = 0
+
+    def put_new(self, *parents: Any) -> None:
+        self._tail += 1
+
+    def put_nowait(self, item: Any) -> None:
+        self._tail += 1
+
+    def get_nowait(self) -> Any:
+        if self._head == self._tail:
+            raise asyncio.QueueEmpty
+        item = self._item_type(id=self._head)
+        self._head += 1
+        return item
+
+    def qsize(self) -> int:
+        return self._tail - self._head
+
+    def empty(self) -> bool:
+        return self._head == self._tail
+
+    def getstate(self) -> Tuple[int, int]:
+        return self._head, self._tail
+
+    def setstate(self, state: Tuple[int, int]) -> None:
+        self._head, self._tail = state
+
+
+@dataclasses.dataclass
+class Reservation:
+    """Resources taken out of the factory stocks and account, for a single recipe."""
+
+    foo: List[Any] = dataclasses.field(default_factory=list)
+    bar: List[Any] = dataclasses.field(default_factory=list)
+    foobar: List[Any] = dataclasses.field(default_factory=list)
+    euros: int = 0
+    settled: bool = False
+
+
+class Ledger:
+    """Atomic reservations of the factory stocks and account.
+
+    A reservation takes all the resources of a recipe at once, or nothing at all, so
+    that robots never need to lock the stocks while they prepare an activity. The
+    reserved resources are then either committed (consumed by the activity) or
+    released (put back in the factory).
+    """
+
+    def __init__(self, factory: "Factory") -> None:
+        self._factory = factory
+        # Resources currently reserved by recipes in progress
+        self.held: "collections.Counter[str]" = collections.Counter()
+
+    def reserve(
+        self, foo: int = 0, bar: int = 0, foobar: int = 0, euros: int = 0
+    ) -> Optional[Reservation]:
+        factory = self._factory
+        if (
+            factory.foo_queue.qsize() < foo
+            or factory.bar_queue.qsize() < bar
+            or factory.foobar_queue.qsize() < foobar
+            or factory.account < euros
+        ):
+            if factory.metrics is not None:
+                factory.metrics.reservations["refused"] += 1
+            return None
+
+        if factory.metrics is not None:
+            factory.metrics.reservations["granted"] += 1
+        held = self.held
+        held["foo"] += foo
+        held["bar"] += bar
+        held["foobar"] += foobar
+        held["euros"] += euros
+        factory.account -= euros
+        return Reservation(
+            foo=[factory.foo_queue.get_nowait() for _ in range(foo)],
+            bar=[factory.bar_queue.get_nowait() for _ in range(bar)],
+            foobar=[factory.foobar_queue.get_nowait() for _ in range(foobar)],
+            euros=euros,
+        )
+
+    def reserve_foobar(self, minimum: int, maximum: int) -> Optional[Reservation]:
+        """Reserve as many FooBars as possible, up to ``maximum``."""
+
+        factory = self._factory
+        available = factory.foobar_queue.qsize()
+        if available < minimum:
+            if factory.metrics is not None:
+                factory.metrics.reservations["refused"] += 1
+            return None
+        return self.reserve(foobar=min(available, maximum))
+
+    def commit(self, reservation: Reservation) -> None:
+        """Consume the reserved resources."""
+
+        self._settle(reservation)
+
+    def release(self, reservation: Reservation) -> None:
+        """Put the reserved resources back in the factory."""
+
+        self._settle(reservation)
+        factory = self._factory
+        for foo in reservation.foo:
+            factory.foo_queue.put_nowait(foo)
+        for bar in reservation.bar:
+            factory.bar_queue.put_nowait(bar)
+        for foobar in reservation.foobar:
+            factory.foobar_queue.put_nowait(foobar)
+        factory.account += reservation.euros
+
+    def _settle(self, reservation: Reservation) -> None:
+        if reservation.settled:
+            raise ValueError("Reservation already committed or released")
+        reservation.settled = True
+        held = self.held
+        held["foo"] -= len(reservation.foo)
+        held["bar"] -= len(reservation.bar)
+        held["foobar"] -= len(reservation.foobar)
+        held["euros"] -= reservation.euros
@@ -0,0 +1,142 @@
+import collections
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+import click
+
+_STOP = object()
+
+
+class ActivitySampler:
+    """Decide which activities are logged, to keep verbose runs cheap.
+
+    It is asked before each activity is logged, so that the activities left out cost
+    no log record. For each activity, only one out of ``sample`` is logged, and at
+    most ``rate`` per second. With ``summary``, none is logged: instead, a line
+    counting them is logged on ``logger`` every ``summary`` seconds.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        sample: int = 1,
+        rate: Optional[float] = None,
+        summary: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.logger = logger
+        self.sample = sample
+        self.rate = rate
+        self.summary = summary
+        self._clock = clock
+        self._seen: "collections.Counter[str]" = collections.Counter()
+        # Activities logged in the current second, for the rate limit
+        self._logged: "collections.Counter[str]" = collections.Counter()
+        self._window_start = clock()
+        # Activities counted since the last summary
+        self._counts: "collections.Counter[str]" = collections.Counter()
+        self._summarized_at = self._window_start
+
+    def keep(self, activity: str) -> bool:
+        """Whether to log this occurrence of ``activity``."""
+
+        if self.summary is not None:
+            self._counts[activity] += 1
+            if self._clock() - self._summarized_at >= self.summary:
+                self.flush()
+            return False
+
+        self._seen[activity] += 1
+        if (self._seen[activity] - 1) % self.sample:
+            return False
+        if self.rate is not None:
+            now = self._clock()
+            if now - self._window_start >= 1:
+                self._window_start = now
+                self._logged.clear()
+            if self._logged[activity] >= self.rate:
+                return False
+            self._logged[activity] += 1
+        return True
+
+    def flush(self) -> None:
+        """Log the summary of the activities counted since the last one, if any."""
+
+        if not self._counts:
+            return
+        now = self._clock()
+        counts = ", ".join(f"{name}={count}" for name, count in self._counts.items())
+        self.logger.info(
+            "[*] %d activities in %.1fs: %s",
+            sum(self._counts.values()),
+            now - self._summarized_at,
+            counts,
+        )
+        self._counts.clear()
+        self._summarized_at = now
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments right away, as they may change before the record is
+        # written, but leave the formatting to the thread
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+
+class LogWriter:
+    """Write the log records and the echoed messages from a background thread.
+
+    While started, the handlers of the root logger are replaced by a queue handler,
+    so that logging only costs putting the records in a queue: the handlers are
+    called by the thread, in order, with the messages passed to :meth:`echo`.
+    """
+
+    def __init__(self, echo: Callable[[str], None] = click.echo) -> None:
+        self._echo = echo
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._handlers: List[logging.Handler] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "LogWriter":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        root = logging.getLogger()
+        self._handlers = root.handlers
+        root.handlers = [_QueueHandler(self._queue)]
+        self._thread = threading.Thread(target=self._run, name="log-writer")
+        self._thread.start()
+
+    def echo(self, message: str) -> None:
+        self._queue.put(message)
+
+    def stop(self) -> None:
+        """Write the pending messages, and restore the handlers of the root logger."""
+
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        logging.getLogger().handlers = self._handlers
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if isinstance(item, str):
+                self._echo(item)
+                continue
+            for handler in self._handlers:
+                if item.levelno >= handler.level:
+                    handler.handle(item)
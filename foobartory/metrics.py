@@ -0,0 +1,190 @@
+import bisect
+import collections
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import click
+
+# Upper bounds of the histogram buckets, in factory seconds
+DURATION_BUCKETS = (0.5, 1, 2, 5, 10, 20, 60)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+
+# Sampled state of the factory: its stocks, and the resources held by reservations
+SAMPLE_FIELDS = (
+    "time",
+    "robots",
+    "account",
+    "foo",
+    "bar",
+    "foobar",
+    "reserved_foo",
+    "reserved_bar",
+    "reserved_foobar",
+    "reserved_euros",
+)
+
+
+class Histogram:
+    """A histogram with fixed buckets, counting observations up to each bound."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        # The last bucket counts observations above all the bounds
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        """Number of observations lower or equal to each bound, as in Prometheus."""
+
+        total = 0
+        result = []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else str(bound), total))
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets": dict(self.cumulative_counts()),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class Metrics:
+    """A registry of the metrics of a factory.
+
+    It is fed by the ``activity`` decorator and by the factory itself, and measures
+    durations in factory seconds, from the start of the run of the factory. Every
+    ``interval`` factory seconds, the factory samples its stocks and the lag of the
+    event loop, in seconds of the event loop.
+
+    The factory no longer locks its stocks: robots reserve the resources of a recipe
+    at once, so the contention is measured by the reservations refused, and by the
+    resources held by the recipes in progress.
+    """
+
+    def __init__(self, interval: float = 1) -> None:
+        self.interval = interval
+        # Set by the factory to the time since the start of its run, in factory seconds
+        self.clock: Callable[[], float] = time.monotonic
+
+        self.activities: "collections.Counter[str]" = collections.Counter()
+        self.durations: Dict[str, Histogram] = collections.defaultdict(
+            lambda: Histogram(DURATION_BUCKETS)
+        )
+        self.switches: "collections.Counter[str]" = collections.Counter()
+        self.switch_seconds: Dict[str, float] = collections.defaultdict(float)
+        self.reservations: "collections.Counter[str]" = collections.Counter()
+        self.loop_lag = Histogram(LAG_BUCKETS)
+        self.samples: List[Tuple[float, ...]] = []
+        # Last known values of the factory state, by name
+        self.gauges: Dict[str, float] = {}
+
+    def observe_activity(self, name: str, switch: float, duration: float) -> None:
+        """Record an activity, with the time spent switching to it, if any."""
+
+        self.activities[name] += 1
+        self.durations[name].observe(duration)
+        if switch:
+            self.switches[name] += 1
+            self.switch_seconds[name] += switch
+
+    def sample(self, lag: float, gauges: Dict[str, float]) -> None:
+        self.loop_lag.observe(lag)
+        self.gauges = gauges
+        self.samples.append(
+            (self.clock(),) + tuple(gauges[name] for name in SAMPLE_FIELDS[1:])
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "activities": dict(self.activities),
+            "activity_duration_seconds": {
+                name: histogram.to_dict() for name, histogram in self.durations.items()
+            },
+            "switches": dict(self.switches),
+            "switch_seconds": dict(self.switch_seconds),
+            "reservations": dict(self.reservations),
+            "event_loop_lag_seconds": self.loop_lag.to_dict(),
+            "gauges": self.gauges,
+            "samples": {
+                "fields": SAMPLE_FIELDS,
+                "values": self.samples,
+            },
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help: str) -> str:
+            name = f"foobartory_{name}"
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            return name
+
+        def histogram(name: str, histogram: Histogram, labels: str = "") -> None:
+            separator = "," if labels else ""
+            for bound, count in histogram.cumulative_counts():
+                lines.append(
+                    f'{name}_bucket{{{labels}{separator}le="{bound}"}} {count}'
+                )
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{name}_sum{suffix} {histogram.sum}")
+            lines.append(f"{name}_count{suffix} {histogram.count}")
+
+        name = family("activities_total", "counter", "Activities performed.")
+        for activity, count in sorted(self.activities.items()):
+            lines.append(f'{name}{{activity="{activity}"}} {count}')
+
+        name = family(
+            "activity_duration_seconds", "histogram", "Duration of the activities."
+        )
+        for activity, durations in sorted(self.durations.items()):
+            histogram(name, durations, f'activity="{activity}"')
+
+        name = family("switches_total", "counter", "Switches to another activity.")
+        for activity, count in sorted(self.switches.items()):
+            lines.append(f'{name}{{activity="{activity}"}} {count}')
+
+        name = family(
+            "switch_seconds_total", "counter", "Time lost to switch activities."
+        )
+        for activity, seconds in sorted(self.switch_seconds.items()):
+            lines.append(f'{name}{{activity="{activity}"}} {seconds}')
+
+        name = family("reservations_total", "counter", "Reservations of resources.")
+        for result, count in sorted(self.reservations.items()):
+            lines.append(f'{name}{{result="{result}"}} {count}')
+
+        name = family("event_loop_lag_seconds", "histogram", "Lag of the event loop.")
+        histogram(name, self.loop_lag)
+
+        for gauge, value in sorted(self.gauges.items()):
+            name = family(gauge, "gauge", f"Current value of {gauge}.")
+            lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, format: str = "json") -> None:
+        """Write a snapshot of the metrics to ``path``, or to stdout for ``-``."""
+
+        content = self.to_prometheus() if format == "prometheus" else self.to_json()
+        if path == "-":
+            click.echo(content, nl=False, file=sys.stdout)
+            return
+        with open(path, "w") as f:
+            f.write(content)
@@ -1,33 +1,97 @@
 import asyncio
+import collections
+import itertools
 import logging
 import random
 import uuid
-from typing import List
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Type,
+    Union,
+)
 
 import click
 
-from foobartory import config
+from foobartory.clock import VirtualClockEventLoop, cancel_pending_tasks
+from foobartory.config import FactoryConfig
 from foobartory.decorators import activity
+from foobartory.eventlog import FAILURE, SKIPPED, SUCCESS, EventLog
+from foobartory.inventory import ItemQueue, Ledger, Reservation, Stock
+from foobartory.logs import ActivitySampler
+from foobartory.metrics import Metrics
+from foobartory.rng import RandomStream
+from foobartory.strategy import Choice, Strategy, load
+from foobartory.tracing import Tracer
+
+if TYPE_CHECKING:
+    from foobartory.checkpoint import Checkpointer
 
 logger = logging.getLogger(__name__)
 
 
+ItemId = Union[int, uuid.UUID]
+
+
+class RobotState(NamedTuple):
+    current_activity: str
+    # Activity started by the robot, including the switch to it, if any
+    in_progress: Optional[str]
+    # Factory seconds left before the end of the current sleep
+    remaining: Optional[float]
+    # Numbers drawn from the random stream of the robot
+    random: int
+    reservation: Optional[Reservation]
+    # Rank of the last sleep or wait among those of all the robots: robots waking up
+    # at the same time wake up by rank
+    rank: int
+
+
 class Foo:
-    def __init__(self) -> None:
-        self.id = uuid.uuid4()
+    __slots__ = ("id",)
+
+    def __init__(self, id: Optional[ItemId] = None) -> None:
+        self.id = uuid.uuid4() if id is None else id
 
 
 class Bar:
-    def __init__(self) -> None:
-        self.id = uuid.uuid4()
+    __slots__ = ("id",)
+
+    def __init__(self, id: Optional[ItemId] = None) -> None:
+        self.id = uuid.uuid4() if id is None else id
 
 
 class FooBar:
-    def __init__(self, foo: Foo, bar: Bar) -> None:
+    """A FooBar is made from a Foo and a Bar.
+
+    Without provenance tracking, a FooBar only knows its id in the stock.
+    """
+
+    __slots__ = ("foo", "bar", "id")
+
+    def __init__(
+        self,
+        foo: Optional[Foo] = None,
+        bar: Optional[Bar] = None,
+        id: Optional[ItemId] = None,
+    ) -> None:
         self.foo = foo
         self.bar = bar
+        self.id = id
 
     def __str__(self) -> str:
+        if self.foo is None or self.bar is None:
+            return f"FooBar {self.id}"
         return f"{self.foo.id} - {self.bar.id}"
 
 
@@ -39,71 +103,231 @@ class Robot:
     * Sell FooBar
     * Buy a new robot
 
-    It has its own sets of rules to decide when to perform those actions, depending on
-    the factory stocks and locks.
+    The strategy of its factory decides when to perform those actions, depending on
+    the factory stocks. The resources needed by an activity are reserved as soon as
+    the robot decides to perform it.
+
+    A robot remembers the activity in progress, its reservation and when it wakes up,
+    so that it can be saved in a checkpoint, and finish this activity once restored.
     """
 
+    __slots__ = (
+        "_factory",
+        "_config",
+        "_delays",
+        "_current_activity",
+        "_id",
+        "_stopped",
+        "_random",
+        "_in_progress",
+        "_reservation",
+        "_wake_at",
+        "_rank",
+        "_remaining",
+    )
+
+    # Activities doing nothing when their resources cannot be reserved
+    _RESERVING = frozenset(("create_foobar", "sell_foobar", "buy_robot"))
+
     def __init__(self, factory: "Factory") -> None:
         self._factory = factory
+        self._config = factory.config
+        self._delays = factory.delays
         self._current_activity = self.harvest_foo.__name__
         self._id = len(self._factory.robots)
         self._stopped: bool = False
+        self._random = RandomStream(seed=factory.seed, key=self._id)
+        self._in_progress: Optional[str] = None
+        self._reservation: Optional[Reservation] = None
+        # Loop time at which the robot wakes up from its current sleep
+        self._wake_at = 0.0
+        self._rank = 0
+        # Factory seconds left for the activity in progress, when restored
+        self._remaining: Optional[float] = None
 
     def __str__(self) -> str:
         return f"Robot {self._id}"
 
+    @property
+    def current_activity(self) -> str:
+        return self._current_activity
+
     async def check_activity(self, new_activity: str) -> None:
         """Check if the robot is switching activity. If so, it must sleep."""
 
         if new_activity != self._current_activity:
-            await asyncio.sleep(config.SWITCH_ACTIVITY_DELAY / self._factory.speed)
+            tracer = self._factory.tracer
+            if tracer is not None:
+                tracer.span(
+                    "switch",
+                    self._id,
+                    self._factory.run_time(),
+                    self._config.switch_activity_delay,
+                )
+            await self._sleep(self._delays.switch_activity)
             self._current_activity = new_activity
 
     async def run(self) -> None:
         """Choose what what action to perform, and perform it, until stopped."""
 
+        if self._remaining is not None:
+            await self._resume()
+
         while not self._stopped:
+            name, args = self.choose()
+            await getattr(self, name)(*args)
+
+    def choose(self) -> Choice:
+        """Choose the next activity with the strategy of the factory, and reserve its
+        resources right away.
+
+        Return the name of the activity, and the arguments to perform it with.
+        """
+
+        return self._factory.strategy.choose(self)
+
+    def stop(self) -> None:
+        self._stopped = True
+
+    async def wait(self) -> None:
+        """Wait for the next change of the factory, without switching activity."""
 
-            if self.must_buy_robot:
-                async with self._factory.buy_robot_lock:
-                    await self.buy_robot()
+        self._rank = next(self._factory.ranks)
+        await self._factory.changed()
 
-            elif self.must_harvest_foo:
-                await self.harvest_foo()
+    def getstate(self) -> RobotState:
+        """Return the state of the robot, from the running event loop."""
 
-            elif self.must_sell_foobar:
-                async with self._factory.sell_foobar_lock:
-                    await self.sell_foobar()
+        if self._in_progress is None:
+            remaining = None
+        elif self._remaining is not None:
+            # Restored, but not started yet
+            remaining = self._remaining
+        else:
+            now = asyncio.get_running_loop().time()
+            remaining = max(0.0, self._wake_at - now) * self._factory.speed
+        return RobotState(
+            current_activity=self._current_activity,
+            in_progress=self._in_progress,
+            remaining=remaining,
+            random=self._random.getstate(),
+            reservation=self._reservation,
+            rank=self._rank,
+        )
 
-            elif self.must_create_foobar:
-                await self.create_foobar()
+    def setstate(self, state: RobotState) -> None:
+        """Restore a state returned by :meth:`getstate`, before the robot starts."""
+
+        self._current_activity = state.current_activity
+        self._in_progress = state.in_progress
+        self._remaining = state.remaining
+        self._random.setstate(state.random)
+        self._reservation = state.reservation
+        self._rank = state.rank
+
+    def _record_event(
+        self,
+        event_log: EventLog,
+        name: str,
+        result: Optional[bool],
+        time: float,
+        switch: float,
+        duration: float,
+    ) -> None:
+        """Record a completed activity, with its changes of the stocks and account."""
+
+        reservation = self._reservation
+        if reservation is None and name in self._RESERVING:
+            event_log.record(
+                time, self._id, name, SKIPPED, switch=switch, duration=duration
+            )
+            return
 
+        foo = bar = foobar = euros = 0
+        if reservation is not None:
+            foo, bar = -len(reservation.foo), -len(reservation.bar)
+            foobar, euros = -len(reservation.foobar), -reservation.euros
+        if name == "harvest_foo":
+            foo += 1
+        elif name == "harvest_bar":
+            bar += 1
+        elif name == "create_foobar":
+            # On failure, the Bar is put back
+            if result:
+                foobar += 1
             else:
-                await self.harvest_bar()
+                bar += 1
+        elif name == "sell_foobar":
+            euros -= foobar * self._config.foobar_price
+        event_log.record(
+            time,
+            self._id,
+            name,
+            FAILURE if result is False else SUCCESS,
+            foo,
+            bar,
+            foobar,
+            euros,
+            switch,
+            duration,
+        )
 
-    def stop(self) -> None:
-        self._stopped = True
+    async def _sleep(self, delay: float) -> None:
+        self._wake_at = asyncio.get_running_loop().time() + delay
+        self._rank = next(self._factory.ranks)
+        await asyncio.sleep(delay)
+
+    async def _resume(self) -> None:
+        """Finish the activity that was in progress when the robot was saved."""
+
+        assert self._in_progress is not None and self._remaining is not None
+        name, reservation = self._in_progress, self._reservation
+        await self._sleep(self._remaining / self._factory.speed)
+        self._remaining = None
+        if name != self._current_activity:
+            # The robot was switching, the activity starts from the beginning
+            self._current_activity = name
+            perform = getattr(self, name)
+            await (perform() if reservation is None else perform(reservation))
+            return
+
+        end = getattr(self, f"_end_{name}")
+        end() if reservation is None else end(reservation)
+        self._factory.activities[name] += 1
+        self._in_progress = self._reservation = None
+        self._factory.notify_change()
 
     @property
     def must_harvest_foo(self) -> bool:
         """Robot must harvest Foo if they do not have enough Foo to create a Robot."""
 
-        return self._factory.foo_queue.qsize() < config.ROBOT_COST_FOO
+        return self._factory.foo_queue.qsize() < self._config.robot_cost_foo
 
     @activity
     async def harvest_foo(self) -> None:
         """Put a new Foo in Foo queue."""
 
-        await asyncio.sleep(config.FOO_MINING_DELAY / self._factory.speed)
-        self._factory.foo_queue.put_nowait(Foo())
+        await self._sleep(self._delays.foo_mining)
+        self._end_harvest_foo()
+
+    def _end_harvest_foo(self) -> None:
+        self._factory.foo_queue.put_new()
+        self._factory.produced["harvest_foo"] += 1
 
     @activity
     async def harvest_bar(self) -> None:
         """Put a new Bar in Bar queue."""
 
-        delay = random.uniform(config.BAR_MINING_MIN_DELAY, config.BAR_MINING_MAX_DELAY)
-        await asyncio.sleep(delay / self._factory.speed)
-        self._factory.bar_queue.put_nowait(Bar())
+        await self._sleep(
+            self._random.uniform(
+                self._delays.bar_mining_min, self._delays.bar_mining_max
+            )
+        )
+        self._end_harvest_bar()
+
+    def _end_harvest_bar(self) -> None:
+        self._factory.bar_queue.put_new()
+        self._factory.produced["harvest_bar"] += 1
 
     @property
     def must_create_foobar(self) -> bool:
@@ -114,71 +338,87 @@ class Robot:
         )
 
     @activity
-    async def create_foobar(self) -> None:
-        """Try to create a FooBar from a Foo and a Bar, and put it in FooBar queue."""
-
-        if self._factory.foo_queue.empty() or self._factory.bar_queue.empty():
-            return
+    async def create_foobar(
+        self, reservation: Optional[Reservation] = None
+    ) -> Optional[bool]:
+        """Try to create a FooBar from a Foo and a Bar, and put it in FooBar queue.
 
-        foo = self._factory.foo_queue.get_nowait()
-        bar = self._factory.bar_queue.get_nowait()
+        On failure, the Bar is put back in Bar queue. Return whether it succeeded, or
+        None if the Foo and the Bar could not be reserved.
+        """
 
-        await asyncio.sleep(config.FOOBAR_CREATION_DELAY / self._factory.speed)
-        if random.random() <= config.FOOBAR_SUCCESS_RATE:
-            self._factory.foobar_queue.put_nowait(FooBar(foo, bar))
+        ledger = self._factory.ledger
+        reservation = reservation or ledger.reserve(foo=1, bar=1)
+        if reservation is None:
+            return None
+        self._reservation = reservation
+
+        await self._sleep(self._delays.foobar_creation)
+        return self._end_create_foobar(reservation)
+
+    def _end_create_foobar(self, reservation: Reservation) -> bool:
+        (foo,), (bar,) = reservation.foo, reservation.bar
+        self._factory.ledger.commit(reservation)
+        if self._random.random() <= self._config.foobar_success_rate:
+            self._factory.foobar_queue.put_new(foo, bar)
+            self._factory.produced["create_foobar"] += 1
+            return True
         else:
             self._factory.bar_queue.put_nowait(bar)
+            return False
 
     @property
     def must_sell_foobar(self) -> bool:
-        """Robot must sell Foobar if at least 3 Foobar are available if no other
-        robot is already selling Foobar.
-        """
+        """Robot must sell Foobar if at least 3 Foobar are available."""
 
-        return (
-            self._factory.foobar_queue.qsize() >= 3
-            and not self._factory.sell_foobar_lock.locked()
-        )
+        return self._factory.foobar_queue.qsize() >= self._config.foobar_sell_min
 
     @activity
-    async def sell_foobar(self) -> None:
-        """Get FooBars from FooBar queue, and sell them to increase the factory
-        account.
-        """
+    async def sell_foobar(self, reservation: Optional[Reservation] = None) -> None:
+        """Sell up to 5 FooBars from FooBar queue, to increase the factory account."""
 
-        await asyncio.sleep(config.FOOBAR_SELL_DELAY / self._factory.speed)
-        for _ in range(config.FOOBAR_SELL_MAX):
-            try:
-                self._factory.foobar_queue.get_nowait()
-            except asyncio.QueueEmpty:
-                break
-            else:
-                self._factory.account += config.FOOBAR_PRICE
+        ledger = self._factory.ledger
+        reservation = reservation or ledger.reserve_foobar(
+            1, self._config.foobar_sell_max
+        )
+        if reservation is None:
+            return
+        self._reservation = reservation
+
+        await self._sleep(self._delays.foobar_sell)
+        self._end_sell_foobar(reservation)
+
+    def _end_sell_foobar(self, reservation: Reservation) -> None:
+        self._factory.ledger.commit(reservation)
+        sold = len(reservation.foobar)
+        self._factory.account += sold * self._config.foobar_price
+        self._factory.produced["sell_foobar"] += sold
 
     @property
     def must_buy_robot(self) -> bool:
-        """Robot must buy another robot if it has the correct amount of money, enough
-        Foo, and if no other robot is currently buying robot."""
+        """Robot must buy another robot if it has the correct amount of money and
+        enough Foo."""
 
         return (
-            self._factory.account >= config.ROBOT_COST_EUROS
-            and self._factory.foo_queue.qsize() >= config.ROBOT_COST_FOO
-            and not self._factory.buy_robot_lock.locked()
+            self._factory.account >= self._config.robot_cost_euros
+            and self._factory.foo_queue.qsize() >= self._config.robot_cost_foo
         )
 
     @activity
-    async def buy_robot(self) -> None:
+    async def buy_robot(self, reservation: Optional[Reservation] = None) -> None:
         """Create a new Robot, and it to the factory."""
 
-        if (
-            self._factory.account < config.ROBOT_COST_EUROS
-            or self._factory.foo_queue.qsize() < config.ROBOT_COST_FOO
-        ):
+        ledger = self._factory.ledger
+        reservation = reservation or ledger.reserve(
+            foo=self._config.robot_cost_foo, euros=self._config.robot_cost_euros
+        )
+        if reservation is None:
             return
-        self._factory.account -= config.ROBOT_COST_EUROS
-        for _ in range(config.ROBOT_COST_FOO):
-            self._factory.foo_queue.get_nowait()
+        self._reservation = reservation
+
+        ledger.commit(reservation)
         self._factory.add_robot(Robot(factory=self._factory))
+        self._factory.produced["buy_robot"] += 1
 
 
 class Factory:
@@ -186,23 +426,99 @@ class Factory:
 
     It contains all the application shared data, and offers basic control over the
     robots.
+
+    With ``virtual_clock``, the factory runs on a simulated clock: robots never really
+    sleep, and the whole run completes as fast as the decisions can be computed.
+    Progress messages are sent to ``echo``, which can be set to None to run silently.
+
+    By default, stocks only count their items. With ``provenance``, every item is
+    kept, so that each FooBar knows the Foo and the Bar it is made of.
+
+    The rules of the factory are set by ``config``, the delays of the activities being
+    divided by ``speed`` once and for all. The run ends when the factory has
+    ``config.robot_max_number`` robots.
+
+    Each robot draws its random numbers from its own stream, derived from ``seed``, so
+    that runs on a virtual clock with the same seed are identical. Without seed, a
+    random one is chosen.
+
+    With ``metrics``, the activities and the state of the factory are recorded in the
+    given registry during the run. With ``tracer``, the activities of each robot and
+    the stocks of the factory are recorded on a timeline. With ``event_log``, every
+    completed activity is recorded in a binary log. With ``log_sampler``, only some
+    of the activities are logged. With ``checkpointer``, the factory is regularly
+    saved, to be resumed later.
+
+    The robots choose their activities with ``strategy``, a :class:`Strategy` class or
+    its name (``greedy`` by default, or ``dispatch``), created with the given
+    ``strategy_parameters``.
     """
 
-    def __init__(self, speed: float = 1) -> None:
+    def __init__(
+        self,
+        speed: float = 1,
+        virtual_clock: bool = False,
+        echo: Optional[Callable[[str], None]] = click.echo,
+        provenance: bool = False,
+        config: FactoryConfig = FactoryConfig(),
+        seed: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[Tracer] = None,
+        event_log: Optional[EventLog] = None,
+        log_sampler: Optional[ActivitySampler] = None,
+        checkpointer: Optional["Checkpointer"] = None,
+        strategy: Union[str, Type[Strategy]] = "greedy",
+        strategy_parameters: Optional[Mapping[str, float]] = None,
+    ) -> None:
         self.speed = speed
+        self.config = config
+        self.delays = config.delays(speed)
+        self.seed = random.getrandbits(64) if seed is None else seed
         self.robots: List[Robot] = []
         self.account = 0
+        self.echo = echo
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.clock = self.run_time
+        self.tracer = tracer
+        self.event_log = event_log
+        self.log_sampler = log_sampler
+        self.checkpointer = checkpointer
+
+        # Number of times each activity was performed, and of items it produced
+        self.activities: "collections.Counter[str]" = collections.Counter()
+        self.produced: "collections.Counter[str]" = collections.Counter()
+
+        # Time spent to reach the maximum number of robots, in factory seconds
+        self.elapsed: Optional[float] = None
+        self._started_at: Optional[float] = None
+        # Event loop timing the run, kept to read its clock outside of the loop
+        self._run_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Factory seconds already run, when the factory is restored from a checkpoint
+        self.resumed_at = 0.0
+        # Ranks of the sleeps and waits of the robots, in the order they started
+        self.ranks = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = (
+            VirtualClockEventLoop() if virtual_clock else None
+        )
 
         # queues
-        self.foo_queue: asyncio.Queue[Foo] = asyncio.Queue()
-        self.bar_queue: asyncio.Queue[Bar] = asyncio.Queue()
-        self.foobar_queue: asyncio.Queue[FooBar] = asyncio.Queue()
+        stock = ItemQueue if provenance else Stock
+        self.foo_queue: Union[ItemQueue, Stock] = stock(Foo)
+        self.bar_queue: Union[ItemQueue, Stock] = stock(Bar)
+        self.foobar_queue: Union[ItemQueue, Stock] = stock(FooBar)
 
-        # locks
-        self.sell_foobar_lock = asyncio.Lock()
-        self.buy_robot_lock = asyncio.Lock()
+        self.ledger = Ledger(self)
+        self.strategy = load(strategy)(self, **(strategy_parameters or {}))
 
         self._stopped = True
+        # Resolved when the run is over
+        self._done: Optional[asyncio.Future] = None
+        # Resolved at the next change of the factory state, if someone waits for it
+        self._change: Optional[asyncio.Future] = None
+        # Tasks of the running robots, and of the metrics sampler. Robots added before
+        # the run only start with it.
+        self._tasks: Set[asyncio.Future] = set()
 
     def __str__(self) -> str:
         return f"""robots: {len(self.robots)},
@@ -211,27 +527,176 @@ foo: {self.foo_queue.qsize()},
 bar: {self.bar_queue.qsize()},
 foobar: {self.foobar_queue.qsize()}"""
 
-    def run(self) -> None:
+    def run(self, *observers: Callable[["Factory"], Awaitable[None]]) -> None:
+        """Run the factory until it is stopped, on its own event loop.
+
+        Each of the ``observers`` is called with the factory, and the coroutine it
+        returns runs alongside, on the same loop: the run also waits for them.
+        """
+
+        main = self._run_with(observers)
+        if self._loop is None:
+            asyncio.run(main)
+            return
+
+        try:
+            self._loop.run_until_complete(main)
+        finally:
+            cancel_pending_tasks(self._loop)
+            self._loop.close()
+
+    async def run_async(self) -> None:
+        """Run the factory until it is stopped, on the running event loop.
+
+        Several factories can run concurrently on the same loop: they share its clock,
+        so ``virtual_clock`` is ignored, and their elapsed times are measured from the
+        start of each run.
+        """
+
+        loop = asyncio.get_running_loop()
         self._stopped = False
-        asyncio.get_event_loop().run_until_complete(self._run_until_stopped())
+        self._run_loop = loop
+        self._started_at = loop.time() - self.resumed_at / self.speed
+        self._done = loop.create_future()
+        if len(self.robots) >= self.config.robot_max_number:
+            # Robots added before the run already reached the maximum
+            self._stop()
+            return
+        # Restored robots resume their sleeps and waits in the order they started
+        # them, so that those waking up at the same time wake up in the same order
+        for robot in sorted(self.robots, key=lambda robot: robot._rank):
+            self._start(robot.run())
+        if self.metrics is not None:
+            self._start(self._sample_metrics(self.metrics))
+        if self.checkpointer is not None:
+            self._start(self.checkpointer.run(self))
+        try:
+            await self._done
+        finally:
+            # Whatever the reason of the end of the run, no robot must outlive it
+            self._stop_robots()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
 
     def add_robot(self, robot: Robot) -> None:
+        """Add a robot, which starts working right away if the factory is running."""
+
         self.robots.append(robot)
-        if len(self.robots) == config.ROBOT_MAX_NUMBER:
+        if len(self.robots) >= self.config.robot_max_number:
             self._stop()
         else:
-            click.echo(f"[*] You now have {len(self.robots)} robots")
-            asyncio.ensure_future(robot.run())
+            self._echo(f"[*] You now have {len(self.robots)} robots")
+            if not self._stopped:
+                self._start(robot.run())
 
-    async def _run_until_stopped(self) -> None:
-        while not self._stopped:
-            await asyncio.sleep(0.1)
+    def stop(self) -> None:
+        """Stop all the robots right away, and end the run."""
 
-    def _stop(self) -> None:
-        click.echo("[+] Congratulation, you have 30 robots!")
+        if self.finished:
+            return
         self._stopped = True
+        if self._started_at is not None:
+            self.elapsed = self.run_time()
         self._stop_robots()
+        if self.metrics is not None:
+            self.metrics.gauges = self._gauges()
+        self.trace_counters()
+        if self._done is not None and not self._done.done():
+            self._done.set_result(None)
+        self.notify_change()
+
+    @property
+    def finished(self) -> bool:
+        """Whether the run is over."""
+
+        return self._done is not None and self._done.done()
+
+    def run_time(self) -> float:
+        """Factory seconds since the start of the run, or its duration once over.
+
+        Events, spans and metrics samples are timed with it, from the start of the run
+        whatever the clock of the loop.
+        """
+
+        if self.elapsed is not None:
+            return self.elapsed
+        if self._started_at is None or self._run_loop is None:
+            return 0
+        return (self._run_loop.time() - self._started_at) * self.speed
+
+    def changed(self) -> "asyncio.Future[None]":
+        """A future resolved at the next change of the factory state.
+
+        Robots notify a change after each activity, and the factory when it stops.
+        """
+
+        if self._change is None or self._change.done():
+            self._change = asyncio.get_running_loop().create_future()
+        return self._change
+
+    def notify_change(self) -> None:
+        if self._change is not None and not self._change.done():
+            self._change.set_result(None)
+
+    def trace_counters(self) -> None:
+        """Record the current stocks of the factory on the tracer, if any."""
+
+        if self.tracer is None:
+            return
+        self.tracer.counters(
+            self.run_time(),
+            foo=self.foo_queue.qsize(),
+            bar=self.bar_queue.qsize(),
+            foobar=self.foobar_queue.qsize(),
+            account=self.account,
+            robots=len(self.robots),
+        )
+
+    async def _run_with(
+        self, observers: Sequence[Callable[["Factory"], Awaitable[None]]]
+    ) -> None:
+        await asyncio.gather(
+            self.run_async(), *(observer(self) for observer in observers)
+        )
+
+    def _start(self, coroutine: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _sample_metrics(self, metrics: Metrics) -> None:
+        loop = asyncio.get_running_loop()
+        delay = metrics.interval / self.speed
+        while True:
+            expected_at = loop.time() + delay
+            await asyncio.sleep(delay)
+            metrics.sample(lag=loop.time() - expected_at, gauges=self._gauges())
+
+    def _gauges(self) -> Dict[str, float]:
+        held = self.ledger.held
+        return {
+            "robots": len(self.robots),
+            "account": self.account,
+            "foo": self.foo_queue.qsize(),
+            "bar": self.bar_queue.qsize(),
+            "foobar": self.foobar_queue.qsize(),
+            "reserved_foo": held["foo"],
+            "reserved_bar": held["bar"],
+            "reserved_foobar": held["foobar"],
+            "reserved_euros": held["euros"],
+        }
+
+    def _stop(self) -> None:
+        self._echo(
+            f"[+] Congratulation, you have {self.config.robot_max_number} robots!"
+        )
+        self.stop()
+
+    def _echo(self, message: str) -> None:
+        if self.echo is not None:
+            self.echo(message)
 
     def _stop_robots(self) -> None:
         for robot in self.robots:
             robot.stop()
+        for task in self._tasks:
+            task.cancel()
@@ -0,0 +1,341 @@
+import asyncio
+import concurrent.futures
+import multiprocessing
+import random
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from foobartory.batch import RunResult
+from foobartory.config import FactoryConfig
+from foobartory.inventory import Ledger, Reservation
+from foobartory.models import Bar, Factory, Foo, FooBar, Robot
+
+# Slots of the shared counters. Each stock is a range of item ids, from its head to
+# its tail, as in :class:`foobartory.inventory.Stock`.
+ACCOUNT = 0
+FOO_HEAD, FOO_TAIL = 1, 2
+BAR_HEAD, BAR_TAIL = 3, 4
+FOOBAR_HEAD, FOOBAR_TAIL = 5, 6
+# Robots of the factory, including the ones not adopted by a worker yet
+ROBOTS = 7
+# Workers ready to start, and whether they can
+READY, STARTED = 8, 9
+STOPPED = 10
+# Account when the run stopped
+FINAL_ACCOUNT = 11
+_COUNTERS = 12
+# Slots of the shared floats: start of the run on the monotonic clock, and elapsed
+# factory seconds when it stopped
+START, ELAPSED = 0, 1
+_FLOATS = 2
+
+# Wall seconds between two checks of the shared state by the workers
+POLL_INTERVAL = 0.001
+
+
+class SharedInventory:
+    """The account, stocks and robots of a factory, shared by several processes.
+
+    Counters are 64-bit integers in a shared memory block. They can be read at any
+    time, but only changed under ``lock``, so that a reservation takes all of its
+    resources at once, or nothing at all. Without ``name``, a new block is created.
+    """
+
+    def __init__(self, lock: Any, name: Optional[str] = None) -> None:
+        self.lock = lock
+        self._memory = shared_memory.SharedMemory(
+            name=name, create=name is None, size=8 * (_COUNTERS + _FLOATS)
+        )
+        buffer = self._memory.buf
+        assert buffer is not None
+        floats_offset = 8 * _COUNTERS
+        self._counters = buffer[:floats_offset].cast("q")
+        self._floats = buffer[floats_offset:].cast("d")
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    def __getitem__(self, slot: int) -> int:
+        return self._counters[slot]
+
+    def seconds(self, slot: int) -> float:
+        return self._floats[slot]
+
+    def add(self, slot: int, amount: int) -> int:
+        """Add ``amount`` to a counter, and return its new value."""
+
+        with self.lock:
+            value = self._counters[slot] + amount
+            self._counters[slot] = value
+            return value
+
+    def take(self, foo: int, bar: int, foobar: int, euros: int) -> Optional[List[int]]:
+        """Take resources from the stocks and the account, if they are all available,
+        and return the id of the first item taken from each stock."""
+
+        counters = self._counters
+        with self.lock:
+            if (
+                counters[FOO_TAIL] - counters[FOO_HEAD] < foo
+                or counters[BAR_TAIL] - counters[BAR_HEAD] < bar
+                or counters[FOOBAR_TAIL] - counters[FOOBAR_HEAD] < foobar
+                or counters[ACCOUNT] < euros
+            ):
+                return None
+            heads = [counters[FOO_HEAD], counters[BAR_HEAD], counters[FOOBAR_HEAD]]
+            counters[FOO_HEAD] += foo
+            counters[BAR_HEAD] += bar
+            counters[FOOBAR_HEAD] += foobar
+            counters[ACCOUNT] -= euros
+            return heads
+
+    def pop(self, head: int, tail: int) -> Optional[int]:
+        """Take the first item of a stock, and return its id, if it is not empty."""
+
+        counters = self._counters
+        with self.lock:
+            id = counters[head]
+            if id == counters[tail]:
+                return None
+            counters[head] = id + 1
+            return id
+
+    def start(self) -> None:
+        with self.lock:
+            self._floats[START] = time.monotonic()
+            self._counters[STARTED] = 1
+
+    def stop(self, speed: float) -> None:
+        """Stop the run, recording its duration and final account, unless it was
+        already stopped."""
+
+        with self.lock:
+            if self._counters[STOPPED]:
+                return
+            self._counters[STOPPED] = 1
+            self._counters[FINAL_ACCOUNT] = self._counters[ACCOUNT]
+            self._floats[ELAPSED] = (time.monotonic() - self._floats[START]) * speed
+
+    def close(self) -> None:
+        self._counters.release()
+        self._floats.release()
+        self._memory.close()
+
+    def unlink(self) -> None:
+        self._memory.unlink()
+
+
+class SharedStock:
+    """A stock held in a shared inventory, with the interface of
+    :class:`foobartory.inventory.Stock`."""
+
+    __slots__ = ("_inventory", "_item_type", "_head", "_tail")
+
+    def __init__(
+        self,
+        inventory: SharedInventory,
+        item_type: Callable[..., Any],
+        head: int,
+        tail: int,
+    ) -> None:
+        self._inventory = inventory
+        self._item_type = item_type
+        self._head = head
+        self._tail = tail
+
+    def put_new(self, *parents: Any) -> None:
+        self._inventory.add(self._tail, 1)
+
+    def put_nowait(self, item: Any) -> None:
+        self._inventory.add(self._tail, 1)
+
+    def get_nowait(self) -> Any:
+        id = self._inventory.pop(self._head, self._tail)
+        if id is None:
+            raise asyncio.QueueEmpty
+        return self._item_type(id=id)
+
+    def qsize(self) -> int:
+        return self._inventory[self._tail] - self._inventory[self._head]
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+
+class SharedLedger(Ledger):
+    """Reservations taken atomically from a shared inventory."""
+
+    def __init__(self, factory: "WorkerFactory") -> None:
+        super().__init__(factory)
+        self._inventory = factory.inventory
+
+    def reserve(
+        self, foo: int = 0, bar: int = 0, foobar: int = 0, euros: int = 0
+    ) -> Optional[Reservation]:
+        factory = self._factory
+        heads = self._inventory.take(foo, bar, foobar, euros)
+        if heads is None:
+            if factory.metrics is not None:
+                factory.metrics.reservations["refused"] += 1
+            return None
+
+        if factory.metrics is not None:
+            factory.metrics.reservations["granted"] += 1
+        held = self.held
+        held["foo"] += foo
+        held["bar"] += bar
+        held["foobar"] += foobar
+        held["euros"] += euros
+        foo_head, bar_head, foobar_head = heads
+        return Reservation(
+            foo=[Foo(id=id) for id in range(foo_head, foo_head + foo)],
+            bar=[Bar(id=id) for id in range(bar_head, bar_head + bar)],
+            foobar=[FooBar(id=id) for id in range(foobar_head, foobar_head + foobar)],
+            euros=euros,
+        )
+
+
+class WorkerFactory(Factory):
+    """The part of a factory running in one of several worker processes.
+
+    The account, the stocks and the number of robots live in a shared inventory, and
+    robots are spread over the workers by id: the worker ``index`` adopts the robots
+    whose id modulo ``workers`` is ``index``, whichever worker bought them. Robots
+    keep their decision rules, and only see the shared stocks.
+    """
+
+    def __init__(
+        self, inventory: SharedInventory, index: int, workers: int, **options: Any
+    ) -> None:
+        self.inventory = inventory
+        # Account read by this worker, to turn its updates into increments
+        self._account = 0
+        super().__init__(**options)
+        self.index = index
+        self.workers = workers
+        self.foo_queue = SharedStock(inventory, Foo, FOO_HEAD, FOO_TAIL)  # type: ignore
+        self.bar_queue = SharedStock(inventory, Bar, BAR_HEAD, BAR_TAIL)  # type: ignore
+        self.foobar_queue = SharedStock(  # type: ignore
+            inventory, FooBar, FOOBAR_HEAD, FOOBAR_TAIL
+        )
+        self.ledger = SharedLedger(self)
+        # Number of robots of the factory already seen by this worker
+        self._seen_robots = 0
+
+    @property  # type: ignore
+    def account(self) -> int:
+        self._account = self.inventory[ACCOUNT]
+        return self._account
+
+    @account.setter
+    def account(self, value: int) -> None:
+        # Robots update the account with ``factory.account += amount``: only apply
+        # the amount, as other workers may have changed the account meanwhile
+        self.inventory.add(ACCOUNT, value - self._account)
+        self._account = value
+
+    async def run_async(self) -> None:
+        inventory = self.inventory
+        inventory.add(READY, 1)
+        while not inventory[STARTED]:
+            await asyncio.sleep(POLL_INTERVAL)
+        self._start(self._adopt_robots())
+        await super().run_async()
+
+    def add_robot(self, robot: Robot) -> None:
+        """Count a robot bought in this worker: it starts in the worker adopting it."""
+
+        if self.inventory.add(ROBOTS, 1) >= self.config.robot_max_number:
+            self.inventory.stop(self.speed)
+            self.stop()
+
+    async def _adopt_robots(self) -> None:
+        inventory = self.inventory
+        while not inventory[STOPPED]:
+            robots = inventory[ROBOTS]
+            for id in range(self._seen_robots, robots):
+                if id % self.workers == self.index:
+                    robot = Robot(factory=self)
+                    self.robots.append(robot)
+                    self._start(robot.run())
+            self._seen_robots = robots
+            await asyncio.sleep(POLL_INTERVAL)
+        self.stop()
+
+
+_inventory: Optional[SharedInventory] = None
+
+
+def _init_worker(name: str, lock: Any) -> None:
+    global _inventory
+    _inventory = SharedInventory(lock, name=name)
+
+
+def _run_worker(
+    index: int, workers: int, config: FactoryConfig, speed: float, seed: int
+) -> Tuple[Dict[str, int], Dict[str, int]]:
+    assert _inventory is not None
+    factory = WorkerFactory(
+        _inventory,
+        index,
+        workers,
+        speed=speed,
+        echo=None,
+        config=config,
+        seed=seed * workers + index,
+    )
+    factory.run()
+    return dict(factory.activities), dict(factory.produced)
+
+
+def run_multiprocess(
+    workers: int,
+    config: FactoryConfig = FactoryConfig(),
+    speed: float = 1,
+    seed: Optional[int] = None,
+) -> RunResult:
+    """Run a factory from 2 robots to the maximum, with its robots spread over
+    ``workers`` processes sharing the inventory.
+
+    The workers run on the real clock, at ``speed``: unlike on a virtual clock, runs
+    cannot be reproduced. The activities completed by the other workers while they
+    notice the end of the run are counted in the result.
+    """
+
+    seed = random.getrandbits(32) if seed is None else seed
+    context = multiprocessing.get_context()
+    lock = context.Lock()
+    inventory = SharedInventory(lock)
+    try:
+        inventory.add(ROBOTS, 2)
+        with concurrent.futures.ProcessPoolExecutor(
+            workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(inventory.name, lock),
+        ) as executor:
+            futures = [
+                executor.submit(_run_worker, index, workers, config, speed, seed)
+                for index in range(workers)
+            ]
+            # Start all the workers at once, and fail early if one of them did
+            while inventory[READY] < workers and not any(f.done() for f in futures):
+                time.sleep(POLL_INTERVAL)
+            inventory.start()
+            results = [future.result() for future in futures]
+
+        produced: Dict[str, int] = {}
+        for _, worker_produced in results:
+            for name, count in worker_produced.items():
+                produced[name] = produced.get(name, 0) + count
+        return RunResult(
+            seed=seed,
+            elapsed=inventory.seconds(ELAPSED),
+            account=inventory[FINAL_ACCOUNT],
+            produced=produced,
+        )
+    finally:
+        inventory.close()
+        inventory.unlink()
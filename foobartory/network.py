@@ -0,0 +1,642 @@
+import asyncio
+import collections
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
+
+from foobartory.batch import RunResult
+from foobartory.config import FactoryConfig
+from foobartory.rng import RandomStream
+from foobartory.strategy import Strategy, load
+
+if TYPE_CHECKING:
+    from foobartory.models import Factory, Robot
+
+ITEMS = ("foo", "bar", "foobar")
+# Activity producing each item
+PRODUCERS = {"foo": "harvest_foo", "bar": "harvest_bar", "foobar": "create_foobar"}
+# Operations deferred by a robot before they are sent, by default
+BATCH_SIZE = 8
+# Wall seconds between two requests of a worker for robots to adopt
+POLL_INTERVAL = 0.01
+# Wall seconds a worker waits for the coordinator to listen
+CONNECT_TIMEOUT = 10
+# Connections waiting to be accepted by the coordinator
+BACKLOG = 1024
+# Wall seconds the coordinator of run_networked waits for a worker to adopt a robot
+START_TIMEOUT = 60
+
+
+class Coordinator:
+    """The factory as a server, owning the stocks, the account and the robots, for
+    robots running in worker processes.
+
+    Workers connect to the Unix socket at ``path``, and send messages of commands
+    separated by ``;``, one message per line. Each message gets a one-line reply:
+    the results of the commands which have one, followed by the account, the stocks
+    and whether the run is over. The commands are:
+
+    * ``deposit N ITEM``: put N new items in stock
+    * ``restore N ITEM``: put back N items taken from the stock
+    * ``sold N``: credit the account with the price of N FooBars
+    * ``reserve FOO BAR FOOBAR EUROS``: take resources if they are all available,
+      with 1 as result, or 0
+    * ``sell MIN MAX``: take as many FooBars as possible, up to MAX but at least MIN,
+      with the number taken as result
+    * ``robot``: add a robot, to be adopted by a worker
+    * ``adopt``: with the id of a robot to run as result, or -1
+
+    The run starts when the first robot is adopted, and ends when the factory has
+    ``config.robot_max_number`` robots. It is abandoned if all the workers disconnect
+    before.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        config: FactoryConfig = FactoryConfig(),
+        speed: float = 1,
+        echo: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.path = path
+        self.config = config
+        self.speed = speed
+        self.echo = echo
+        self.account = 0
+        self.stocks: "collections.Counter[str]" = collections.Counter()
+        self.produced: "collections.Counter[str]" = collections.Counter()
+        self.robots = 2
+        # Time spent to reach the maximum number of robots, in factory seconds
+        self.elapsed: Optional[float] = None
+        # Messages and commands received
+        self.messages = 0
+        self.commands = 0
+        self._adopted = 0
+        self._started_at: Optional[float] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._started: Optional[asyncio.Event] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._handlers: Dict[str, Callable[..., Optional[int]]] = {
+            "deposit": self._deposit,
+            "restore": self._restore,
+            "sold": self._sold,
+            "reserve": self._reserve,
+            "sell": self._sell,
+            "robot": self._robot,
+            "adopt": self._adopt,
+        }
+
+    @property
+    def finished(self) -> bool:
+        """Whether the run is over."""
+
+        return self.elapsed is not None
+
+    async def start(self) -> None:
+        """Listen to the workers."""
+
+        self._started = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._server = await asyncio.start_unix_server(
+            self._serve, path=self.path, backlog=BACKLOG
+        )
+
+    async def run(self, timeout: Optional[float] = None) -> None:
+        """Serve the workers until the run is over, and they all disconnected.
+
+        Raise :class:`TimeoutError` if no worker adopts a robot within ``timeout``
+        wall seconds, and :class:`ConnectionError` if all the workers disconnect
+        before the end of the run.
+        """
+
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        assert self._started is not None and self._stopped is not None
+        try:
+            try:
+                await asyncio.wait_for(self._started.wait(), timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f"No worker adopted a robot within {timeout} seconds"
+                ) from None
+            await self._stopped.wait()
+            if not self.finished:
+                raise ConnectionError(
+                    "All the workers disconnected before the end of the run"
+                )
+            # Workers disconnect as soon as they learn that the run is over
+            while self._connections:
+                await asyncio.sleep(POLL_INTERVAL)
+        finally:
+            self._server.close()
+            await self._server.wait_closed()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def handle(self, message: str) -> str:
+        """Apply the commands of a message, and return its reply."""
+
+        self.messages += 1
+        results = []
+        for command in message.split(";"):
+            if not command.strip():
+                continue
+            name, *args = command.split()
+            self.commands += 1
+            try:
+                handler = self._handlers[name]
+            except KeyError:
+                raise ValueError(f"Unknown command {name!r}")
+            result = handler(*args)
+            if result is not None:
+                results.append(result)
+        stocks = self.stocks
+        state = [self.account, stocks["foo"], stocks["bar"], stocks["foobar"]]
+        return " ".join(map(str, results + state + [int(self.finished)])) + "\n"
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = self.handle(line.decode())
+                except (ValueError, TypeError) as e:
+                    reply = f"error {e}\n"
+                writer.write(reply.encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+            if self._started_at is not None and not self._connections:
+                # The robots are gone with their workers: the run can never end
+                assert self._stopped is not None
+                self._stopped.set()
+
+    def _deposit(self, amount: str, item: str) -> None:
+        self._restore(amount, item)
+        self.produced[PRODUCERS[item]] += int(amount)
+
+    def _restore(self, amount: str, item: str) -> None:
+        if item not in ITEMS:
+            raise ValueError(f"Unknown item {item!r}")
+        self.stocks[item] += int(amount)
+
+    def _sold(self, amount: str) -> None:
+        self.account += int(amount) * self.config.foobar_price
+        self.produced["sell_foobar"] += int(amount)
+
+    def _reserve(self, foo: str, bar: str, foobar: str, euros: str) -> int:
+        wanted = {"foo": int(foo), "bar": int(bar), "foobar": int(foobar)}
+        stocks = self.stocks
+        if self.finished or self.account < int(euros):
+            return 0
+        if any(stocks[item] < amount for item, amount in wanted.items()):
+            return 0
+        stocks.subtract(wanted)
+        self.account -= int(euros)
+        return 1
+
+    def _sell(self, minimum: str, maximum: str) -> int:
+        available = self.stocks["foobar"]
+        if self.finished or available < int(minimum):
+            return 0
+        sold = min(available, int(maximum))
+        self.stocks["foobar"] -= sold
+        return sold
+
+    def _robot(self) -> None:
+        if self.finished:
+            return
+        self.robots += 1
+        self.produced["buy_robot"] += 1
+        if self.robots >= self.config.robot_max_number:
+            assert self._started_at is not None
+            self.elapsed = (time.monotonic() - self._started_at) * self.speed
+            self._echo(
+                f"[+] Congratulation, you have {self.config.robot_max_number} robots!"
+            )
+            if self._stopped is not None:
+                self._stopped.set()
+        else:
+            self._echo(f"[*] You now have {self.robots} robots")
+
+    def _adopt(self) -> int:
+        if self.finished or self._adopted == self.robots:
+            return -1
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+            if self._started is not None:
+                self._started.set()
+        self._adopted += 1
+        return self._adopted - 1
+
+    def _echo(self, message: str) -> None:
+        if self.echo is not None:
+            self.echo(message)
+
+
+class Connection:
+    """A connection to the coordinator, deferring the operations that need no reply.
+
+    Deposits, restorations and sales are sent along with the next request, or once
+    ``batch_size`` of them are pending, merged by item: a robot harvesting does not
+    wait for a round-trip after each item. The state of the factory known from the
+    last reply, with the pending operations, is the robot's view of the factory.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        batch_size: int = BATCH_SIZE,
+    ) -> None:
+        self.batch_size = batch_size
+        self.account = 0
+        self.stopped = False
+        # Round-trips to the coordinator
+        self.requests = 0
+        self._reader = reader
+        self._writer = writer
+        self._stocks: "collections.Counter[str]" = collections.Counter()
+        self._pending: "collections.Counter[Tuple[str, str]]" = collections.Counter()
+        self._deferred = 0
+
+    @classmethod
+    async def open(
+        cls, path: str, batch_size: int = BATCH_SIZE, timeout: float = 0
+    ) -> "Connection":
+        """Connect to the coordinator listening at ``path``, waiting up to
+        ``timeout`` wall seconds for it to listen."""
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(path)
+                return cls(reader, writer, batch_size)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise
+                await asyncio.sleep(POLL_INTERVAL)
+
+    def qsize(self, item: str) -> int:
+        pending = self._pending
+        return self._stocks[item] + pending["deposit", item] + pending["restore", item]
+
+    def defer(self, command: str, amount: int = 1, item: str = "") -> None:
+        self._pending[command, item] += amount
+        self._deferred += 1
+
+    async def send(self, command: str, amount: int = 1, item: str = "") -> None:
+        """Defer an operation, and send the pending ones if there are enough."""
+
+        self.defer(command, amount, item)
+        if self._deferred >= self.batch_size:
+            await self.request()
+
+    async def request(self, *commands: str) -> List[int]:
+        """Send the pending operations and ``commands``, and return the results of
+        the commands."""
+
+        pending = [
+            f"{command} {amount} {item}".rstrip()
+            for (command, item), amount in self._pending.items()
+        ]
+        self._pending.clear()
+        self._deferred = 0
+        self._writer.write((";".join(pending + list(commands)) + "\n").encode())
+        await self._writer.drain()
+        reply = (await self._reader.readline()).decode()
+        self.requests += 1
+        if not reply:
+            raise ConnectionError("The coordinator closed the connection")
+        if reply.startswith("error"):
+            raise ValueError(reply.partition(" ")[2].strip())
+
+        *results, self.account, foo, bar, foobar, stopped = map(int, reply.split())
+        self._stocks["foo"], self._stocks["bar"] = foo, bar
+        self._stocks["foobar"] = foobar
+        self.stopped = bool(stopped)
+        return results
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+class RemoteFactory:
+    """The factory as seen from a robot of a worker process, to choose its activities
+    with a :class:`Strategy`.
+
+    Strategies get the rules of the factory, the sizes of its stocks known from the
+    coordinator, and a ledger whose reservations are the commands sending them to the
+    coordinator, once the activity is chosen.
+    """
+
+    def __init__(self, connection: Connection, config: FactoryConfig) -> None:
+        self.config = config
+        self.ledger = self
+        self.foo_queue = RemoteStock(connection, "foo")
+        self.bar_queue = RemoteStock(connection, "bar")
+        self.foobar_queue = RemoteStock(connection, "foobar")
+
+    def reserve(
+        self, foo: int = 0, bar: int = 0, foobar: int = 0, euros: int = 0
+    ) -> str:
+        return f"reserve {foo} {bar} {foobar} {euros}"
+
+    def reserve_foobar(self, minimum: int, maximum: int) -> str:
+        return f"sell {minimum} {maximum}"
+
+
+class RemoteStock:
+    """A stock of the coordinator, as known from the last reply of a connection."""
+
+    def __init__(self, connection: Connection, item: str) -> None:
+        self._connection = connection
+        self._item = item
+
+    def qsize(self) -> int:
+        return self._connection.qsize(self._item)
+
+    def empty(self) -> bool:
+        return not self.qsize()
+
+
+class RemoteRobot:
+    """A robot running in a worker process, following ``strategy`` with the stocks of
+    the coordinator.
+
+    Strategies whose robots wait for changes of the factory are not supported: the
+    coordinator does not notify them.
+    """
+
+    def __init__(
+        self,
+        id: int,
+        connection: Connection,
+        config: FactoryConfig,
+        speed: float,
+        seed: int,
+        strategy: Union[str, Type[Strategy]] = "greedy",
+        strategy_parameters: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        self.id = id
+        self._connection = connection
+        self._config = config
+        self._delays = config.delays(speed)
+        self._random = RandomStream(seed=seed, key=id)
+        self._current_activity = "harvest_foo"
+        self._stopped = False
+        _check_strategy(strategy, strategy_parameters, config)
+        factory = cast("Factory", RemoteFactory(connection, config))
+        self._strategy = load(strategy)(factory, **(strategy_parameters or {}))
+
+    @property
+    def must_buy_robot(self) -> bool:
+        connection, config = self._connection, self._config
+        return (
+            connection.account >= config.robot_cost_euros
+            and connection.qsize("foo") >= config.robot_cost_foo
+        )
+
+    @property
+    def must_create_foobar(self) -> bool:
+        return bool(self._connection.qsize("foo") and self._connection.qsize("bar"))
+
+    def stop(self) -> None:
+        self._stopped = True
+
+    async def run(self) -> None:
+        """Choose what action to perform, and perform it, until the run is over."""
+
+        connection = self._connection
+        while not self._stopped and not connection.stopped:
+            name, args = self._strategy.choose(cast("Robot", self))
+            await getattr(self, name)(*args)
+
+    async def harvest_foo(self) -> None:
+        await self._switch("harvest_foo")
+        await asyncio.sleep(self._delays.foo_mining)
+        await self._connection.send("deposit", 1, "foo")
+
+    async def harvest_bar(self) -> None:
+        await self._switch("harvest_bar")
+        delays = self._delays
+        await asyncio.sleep(
+            self._random.uniform(delays.bar_mining_min, delays.bar_mining_max)
+        )
+        await self._connection.send("deposit", 1, "bar")
+
+    async def create_foobar(self, reservation: str = "reserve 1 1 0 0") -> None:
+        connection = self._connection
+        (reserved,) = await connection.request(reservation)
+        await self._switch("create_foobar")
+        if reserved:
+            await asyncio.sleep(self._delays.foobar_creation)
+            if self._random.random() <= self._config.foobar_success_rate:
+                await connection.send("deposit", 1, "foobar")
+            else:
+                await connection.send("restore", 1, "bar")
+
+    async def sell_foobar(self, reservation: Optional[str] = None) -> None:
+        connection = self._connection
+        (sold,) = await connection.request(
+            reservation or f"sell 1 {self._config.foobar_sell_max}"
+        )
+        await self._switch("sell_foobar")
+        if sold:
+            await asyncio.sleep(self._delays.foobar_sell)
+            await connection.send("sold", sold)
+
+    async def buy_robot(self, reservation: Optional[str] = None) -> None:
+        connection, config = self._connection, self._config
+        (reserved,) = await connection.request(
+            reservation
+            or f"reserve {config.robot_cost_foo} 0 0 {config.robot_cost_euros}"
+        )
+        await self._switch("buy_robot")
+        if reserved:
+            await connection.request("robot")
+
+    async def _switch(self, activity: str) -> None:
+        if activity != self._current_activity:
+            await asyncio.sleep(self._delays.switch_activity)
+            self._current_activity = activity
+
+
+def _check_strategy(
+    strategy: Union[str, Type[Strategy]],
+    parameters: Optional[Mapping[str, float]],
+    config: FactoryConfig,
+) -> None:
+    strategy_class = load(strategy)
+    if strategy_class.waits:
+        raise ValueError(f"Unsupported strategy for workers: {strategy_class.__name__}")
+    unknown = sorted(set(parameters or {}) - set(strategy_class.defaults(config)))
+    if unknown:
+        raise ValueError(f"Unknown parameters for {strategy_class.__name__}: {unknown}")
+
+
+class Worker:
+    """A process running the robots it adopts from the coordinator listening at
+    ``path``, each robot with its own connection, and following ``strategy``."""
+
+    def __init__(
+        self,
+        path: str,
+        config: FactoryConfig = FactoryConfig(),
+        speed: float = 1,
+        seed: int = 0,
+        batch_size: int = BATCH_SIZE,
+        strategy: Union[str, Type[Strategy]] = "greedy",
+        strategy_parameters: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        self.path = path
+        self.config = config
+        self.speed = speed
+        self.seed = seed
+        self.batch_size = batch_size
+        self.strategy = strategy
+        self.strategy_parameters = strategy_parameters
+        _check_strategy(strategy, strategy_parameters, config)
+        self.robots: List[RemoteRobot] = []
+        self._tasks: Set[asyncio.Future] = set()
+
+    async def run(self) -> None:
+        """Adopt robots and run them, until the run is over."""
+
+        loop = asyncio.get_running_loop()
+        control = await Connection.open(self.path, timeout=CONNECT_TIMEOUT)
+        try:
+            while True:
+                (id,) = await control.request("adopt")
+                if control.stopped:
+                    break
+                if id < 0:
+                    await asyncio.sleep(POLL_INTERVAL)
+                    continue
+                connection = await Connection.open(self.path, self.batch_size)
+                robot = RemoteRobot(
+                    id,
+                    connection,
+                    self.config,
+                    self.speed,
+                    self.seed,
+                    self.strategy,
+                    self.strategy_parameters,
+                )
+                self.robots.append(robot)
+                task = loop.create_task(self._run_robot(robot, connection))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        finally:
+            for robot in self.robots:
+                robot.stop()
+            for future in self._tasks:
+                future.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            await control.close()
+
+    async def _run_robot(self, robot: RemoteRobot, connection: Connection) -> None:
+        try:
+            await robot.run()
+        finally:
+            await connection.close()
+
+
+def run_worker(
+    path: str,
+    config: FactoryConfig = FactoryConfig(),
+    speed: float = 1,
+    seed: int = 0,
+    batch_size: int = BATCH_SIZE,
+    strategy: Union[str, Type[Strategy]] = "greedy",
+    strategy_parameters: Optional[Mapping[str, float]] = None,
+) -> None:
+    worker = Worker(
+        path, config, speed, seed, batch_size, strategy, strategy_parameters
+    )
+    asyncio.run(worker.run())
+
+
+def run_networked(
+    workers: int,
+    config: FactoryConfig = FactoryConfig(),
+    speed: float = 1,
+    seed: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    strategy: Union[str, Type[Strategy]] = "greedy",
+    strategy_parameters: Optional[Mapping[str, float]] = None,
+) -> RunResult:
+    """Run a coordinator and ``workers`` worker processes, from 2 robots to the
+    maximum, on the real clock.
+
+    Raise :class:`TimeoutError` if the workers do not start within
+    ``START_TIMEOUT`` wall seconds, and :class:`ConnectionError` if they all exit
+    before the end of the run.
+    """
+
+    _check_strategy(strategy, strategy_parameters, config)
+    seed = random.getrandbits(32) if seed is None else seed
+    context = multiprocessing.get_context()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "foobartory.sock")
+        coordinator = Coordinator(path, config, speed)
+        processes = [
+            context.Process(
+                target=run_worker,
+                args=(
+                    path,
+                    config,
+                    speed,
+                    seed,
+                    batch_size,
+                    strategy,
+                    strategy_parameters,
+                ),
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            asyncio.run(coordinator.run(START_TIMEOUT))
+        except BaseException:
+            for process in processes:
+                process.terminate()
+            raise
+        finally:
+            for process in processes:
+                process.join()
+
+    assert coordinator.elapsed is not None
+    return RunResult(
+        seed=seed,
+        elapsed=coordinator.elapsed,
+        account=coordinator.account,
+        produced=dict(coordinator.produced),
+    )
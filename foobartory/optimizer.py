@@ -0,0 +1,234 @@
+import concurrent.futures
+import dataclasses
+import functools
+import itertools
+import math
+import os
+import random
+import statistics
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from foobartory.batch import Distribution, RunResult, run_factory
+from foobartory.cache import ResultCache
+from foobartory.config import FactoryConfig
+from foobartory.strategy import Strategy, load
+
+# Probability that the confidence interval of a mean holds the true mean
+CONFIDENCE = 0.95
+
+Parameters = Dict[str, float]
+
+
+@dataclasses.dataclass(frozen=True)
+class Evaluation:
+    """The times a strategy set with ``parameters`` needed to reach the maximum number
+    of robots, over the runs of a search."""
+
+    parameters: Parameters
+    elapsed: Distribution
+
+    @property
+    def confidence_interval(self) -> Tuple[float, float]:
+        """Interval holding the true mean time with a probability of ``CONFIDENCE``,
+        by the normal approximation."""
+
+        z = statistics.NormalDist().inv_cdf((1 + CONFIDENCE) / 2)
+        margin = z * self.elapsed.stdev / math.sqrt(self.elapsed.count)
+        return self.elapsed.mean - margin, self.elapsed.mean + margin
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "parameters": self.parameters,
+            "elapsed": dataclasses.asdict(self.elapsed),
+            "confidence_interval": list(self.confidence_interval),
+        }
+
+    def __str__(self) -> str:
+        low, high = self.confidence_interval
+        parameters = " ".join(
+            f"{name}={value:g}" for name, value in self.parameters.items()
+        )
+        return (
+            f"{parameters or '(defaults)'}: mean={self.elapsed.mean:.2f} "
+            f"[{low:.2f}, {high:.2f}] stdev={self.elapsed.stdev:.2f}"
+        )
+
+
+def _run(
+    parameters: Parameters,
+    seed: int,
+    config: FactoryConfig,
+    strategy: Union[str, Type[Strategy]],
+) -> RunResult:
+    return run_factory(seed, config, strategy, parameters)
+
+
+class Search:
+    """Evaluate parameter sets of ``strategy`` with ``runs`` seeded factories each, in
+    a pool of ``workers`` processes.
+
+    Every parameter set is run with the same seeds, from ``seed`` onwards, so that
+    they are compared on the same random draws. Parameter sets already evaluated are
+    not run again, nor are the runs held by ``cache``.
+    """
+
+    def __init__(
+        self,
+        strategy: Union[str, Type[Strategy]] = "greedy",
+        runs: int = 100,
+        seed: int = 0,
+        workers: Optional[int] = None,
+        config: FactoryConfig = FactoryConfig(),
+        cache: Optional[ResultCache] = None,
+    ) -> None:
+        self.strategy = strategy
+        self.seeds = range(seed, seed + runs)
+        self.workers = workers or os.cpu_count() or 1
+        self.config = config
+        self.cache = cache
+        self.defaults = load(strategy).defaults(config)
+        self.evaluations: Dict[Tuple[Tuple[str, float], ...], Evaluation] = {}
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "Search":
+        if self.workers > 1:
+            self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def evaluate(self, candidates: Iterable[Mapping[str, float]]) -> List[Evaluation]:
+        """Evaluate each of the parameter sets of ``candidates``."""
+
+        parameter_sets = [dict(candidate) for candidate in candidates]
+        new: Dict[Tuple[Tuple[str, float], ...], Parameters] = {}
+        for candidate in parameter_sets:
+            unknown = sorted(set(candidate) - set(self.defaults))
+            if unknown:
+                raise ValueError(f"Unknown parameters for the strategy: {unknown}")
+            if _key(candidate) not in self.evaluations:
+                new[_key(candidate)] = candidate
+
+        runs = [(candidate, seed) for candidate in new.values() for seed in self.seeds]
+        # Results by index of their run
+        results: Dict[int, RunResult] = {}
+        keys: List[str] = []
+        if self.cache is not None:
+            keys = [
+                self.cache.key(seed, self.config, self.strategy, candidate)
+                for candidate, seed in runs
+            ]
+            found = self.cache.get_many(keys)
+            results = {
+                index: found[key] for index, key in enumerate(keys) if key in found
+            }
+        missing = [index for index in range(len(runs)) if index not in results]
+
+        run = functools.partial(_run, config=self.config, strategy=self.strategy)
+        arguments = ([runs[i][0] for i in missing], [runs[i][1] for i in missing])
+        ran: Iterator[RunResult]
+        if self._executor is None:
+            ran = map(run, *arguments)
+        else:
+            chunksize = max(1, len(missing) // (self.workers * 4))
+            ran = self._executor.map(run, *arguments, chunksize=chunksize)
+        computed = dict(zip(missing, ran))
+        if self.cache is not None:
+            self.cache.put_many(
+                (keys[index], result) for index, result in computed.items()
+            )
+        results.update(computed)
+
+        elapsed = (results[index].elapsed for index in range(len(runs)))
+        for key, candidate in new.items():
+            values = list(itertools.islice(elapsed, len(self.seeds)))
+            self.evaluations[key] = Evaluation(
+                parameters=candidate, elapsed=Distribution.from_values(values)
+            )
+        return [self.evaluations[_key(candidate)] for candidate in parameter_sets]
+
+    @property
+    def ranking(self) -> List[Evaluation]:
+        """All the parameter sets evaluated, from the fastest to the slowest."""
+
+        return sorted(self.evaluations.values(), key=lambda e: e.elapsed.mean)
+
+
+def _key(parameters: Mapping[str, float]) -> Tuple[Tuple[str, float], ...]:
+    return tuple(sorted(parameters.items()))
+
+
+def grid_search(search: Search, space: Mapping[str, Sequence[float]]) -> Evaluation:
+    """Evaluate every combination of the values of ``space``, and return the best."""
+
+    names = list(space)
+    search.evaluate(
+        dict(zip(names, values))
+        for values in itertools.product(*(space[name] for name in names))
+    )
+    return search.ranking[0]
+
+
+def evolve(
+    search: Search,
+    bounds: Mapping[str, Tuple[float, float]],
+    population: int = 8,
+    generations: int = 5,
+    seed: int = 0,
+) -> Evaluation:
+    """Search the parameters within ``bounds`` by evolution, and return the best.
+
+    The first generation holds the defaults of the strategy, and random parameter
+    sets. Each next generation keeps the best half of the previous one, and mutates
+    them with a gaussian noise shrinking over generations. Parameters whose bounds are
+    integers stay integers.
+    """
+
+    rng = random.Random(seed)
+
+    def clip(name: str, value: float) -> float:
+        low, high = bounds[name]
+        value = min(high, max(low, value))
+        return round(value) if isinstance(low, int) and isinstance(high, int) else value
+
+    def mutate(parameters: Parameters, scale: float) -> Parameters:
+        mutated = {}
+        for name, value in parameters.items():
+            low, high = bounds[name]
+            mutated[name] = clip(name, value + rng.gauss(0, scale * (high - low)))
+        return mutated
+
+    unknown = sorted(set(bounds) - set(search.defaults))
+    if unknown:
+        raise ValueError(f"Unknown parameters for the strategy: {unknown}")
+    candidates = [{name: clip(name, search.defaults[name]) for name in bounds}]
+    while len(candidates) < population:
+        candidates.append(
+            {name: clip(name, rng.uniform(*bounds[name])) for name in bounds}
+        )
+    survivors = max(1, population // 2)
+    for generation in range(1, generations + 1):
+        evaluated = sorted(search.evaluate(candidates), key=lambda e: e.elapsed.mean)
+        if generation == generations:
+            break
+        parents = [evaluation.parameters for evaluation in evaluated[:survivors]]
+        # Standard deviation of the mutations, relative to the width of the bounds
+        scale = 0.25 * (1 - generation / generations)
+        candidates = parents + [
+            mutate(rng.choice(parents), scale) for _ in range(population - len(parents))
+        ]
+    return search.ranking[0]
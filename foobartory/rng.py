@@ -0,0 +1,46 @@
+import random
+
+
+class RandomStream:
+    """A reproducible stream of random numbers.
+
+    The numbers of a stream only depend on its seed and key, so that each robot can
+    have its own stream, whatever the order in which robots draw. The stream keeps a
+    generator seeded once with both, and counts the numbers drawn: its position is a
+    single number, and drawing one costs a call to the generator.
+    """
+
+    __slots__ = ("_seed", "_key", "_generator", "_random", "_drawn")
+
+    def __init__(self, seed: int, key: int) -> None:
+        self._seed = seed
+        self._key = key
+        self._generator = random.Random(f"{seed}:{key}")
+        self._random = self._generator.random
+        self._drawn = 0
+
+    def random(self) -> float:
+        """Return the next random number in [0, 1)."""
+
+        self._drawn += 1
+        return self._random()
+
+    def uniform(self, a: float, b: float) -> float:
+        """Return the next random number in [a, b]."""
+
+        self._drawn += 1
+        return a + (b - a) * self._random()
+
+    def getstate(self) -> int:
+        """Return the position of the stream, as the number of numbers drawn."""
+
+        return self._drawn
+
+    def setstate(self, drawn: int) -> None:
+        """Move the stream to a position returned by :meth:`getstate`."""
+
+        self._generator.seed(f"{self._seed}:{self._key}")
+        if drawn:
+            # Each number drawn consumes 64 random bits: skip them all in one call
+            self._generator.getrandbits(64 * drawn)
+        self._drawn = drawn
@@ -0,0 +1,61 @@
+import asyncio
+import collections
+import dataclasses
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from foobartory.models import Factory
+
+
+@dataclasses.dataclass(frozen=True)
+class Snapshot:
+    """The state of a factory at a given time of its run, in factory seconds."""
+
+    time: float
+    robots: int
+    account: int
+    foo: int
+    bar: int
+    foobar: int
+    # Number of activities completed since the start of the run
+    actions: int
+    # Current activity of each robot, by robot id
+    activities: Tuple[str, ...]
+
+    @classmethod
+    def from_factory(cls, factory: "Factory") -> "Snapshot":
+        return cls(
+            time=factory.run_time(),
+            robots=len(factory.robots),
+            account=factory.account,
+            foo=factory.foo_queue.qsize(),
+            bar=factory.bar_queue.qsize(),
+            foobar=factory.foobar_queue.qsize(),
+            actions=sum(factory.activities.values()),
+            activities=tuple(robot.current_activity for robot in factory.robots),
+        )
+
+    @property
+    def activity_counts(self) -> Dict[str, int]:
+        """Number of robots per activity."""
+
+        return dict(collections.Counter(self.activities))
+
+
+async def watch(
+    factory: "Factory", interval: Optional[float] = None
+) -> AsyncIterator[Snapshot]:
+    """Yield snapshots of a factory until the end of its run, the last snapshot
+    being its final state.
+
+    With ``interval``, a snapshot is taken every ``interval`` factory seconds.
+    Otherwise, a snapshot is taken whenever the state of the factory changes:
+    changes happening during the same iteration of the event loop are merged.
+    """
+
+    while not factory.finished:
+        if interval is None:
+            await factory.changed()
+        else:
+            await asyncio.sleep(interval / factory.speed)
+        yield Snapshot.from_factory(factory)
@@ -0,0 +1,144 @@
+import abc
+import importlib
+import inspect
+import math
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Type, Union
+
+from foobartory.config import FactoryConfig
+from foobartory.inventory import Reservation
+
+if TYPE_CHECKING:
+    from foobartory.models import Factory, Robot
+
+# Name of a method of the robot, and the arguments to call it with
+Choice = Tuple[str, Tuple[Optional[Reservation], ...]]
+
+# Strategies shipped with the package, by name
+STRATEGIES = {
+    "greedy": "foobartory.strategy:Greedy",
+    "dispatch": "foobartory.dispatcher:Dispatcher",
+}
+
+
+class Strategy(abc.ABC):
+    """The rules choosing the next activity of each robot of a factory.
+
+    A strategy is created for each factory, with values for some of its parameters,
+    the others keeping their :meth:`defaults`. It may keep a state of its own, such as
+    the roles of the robots. Its :meth:`choose` is called by each robot to pick its
+    next activity, and must reserve the resources of this activity right away.
+
+    Other strategies can be plugged in by subclassing it and implementing
+    :meth:`choose`, and loaded by their import path (``package.module:Class``) with
+    :func:`load`.
+    """
+
+    # Whether robots may be told to wait for a change of the factory
+    waits = False
+
+    def __init__(self, factory: "Factory", **parameters: float) -> None:
+        defaults = self.defaults(factory.config)
+        unknown = sorted(set(parameters) - set(defaults))
+        if unknown:
+            raise ValueError(f"Unknown parameters for {type(self).__name__}: {unknown}")
+        self.factory = factory
+        self.parameters = {**defaults, **parameters}
+
+    @classmethod
+    def defaults(cls, config: FactoryConfig) -> Dict[str, float]:
+        """The parameters of the strategy, with their default values for ``config``."""
+
+        return {}
+
+    @abc.abstractmethod
+    def choose(self, robot: "Robot") -> Choice:
+        """Choose the next activity of ``robot``, and reserve its resources.
+
+        Return the name of the activity, and the arguments to perform it with. The
+        robot can also be told to ``wait`` for the next change of the factory.
+        """
+
+    def getstate(self) -> Dict[str, Any]:
+        """Return the state of the strategy, which must be serializable to JSON."""
+
+        return {}
+
+    def setstate(self, state: Dict[str, Any]) -> None:
+        """Restore a state returned by :meth:`getstate`, once the robots of the
+        factory are restored."""
+
+
+class Greedy(Strategy):
+    """Each robot performs the first activity it can, by order of priority: buy a
+    robot, harvest Foo while there are fewer than ``foo_stock`` Foo, sell FooBars once
+    there are ``sell_min`` of them, create a FooBar, and harvest Bar.
+
+    By default, ``foo_stock`` is the Foo cost of a robot, and ``sell_min`` the minimum
+    sale of the factory rules.
+    """
+
+    def __init__(self, factory: "Factory", **parameters: float) -> None:
+        super().__init__(factory, **parameters)
+        config = factory.config
+        self._foo_stock = self.parameters["foo_stock"]
+        self._sell_min = math.ceil(self.parameters["sell_min"])
+        if self._foo_stock < config.robot_cost_foo:
+            # Otherwise, FooBars would take the Foo needed to buy robots
+            raise ValueError("foo_stock must be at least robot_cost_foo")
+        if not 1 <= self._sell_min <= config.foobar_sell_max:
+            raise ValueError("sell_min must be between 1 and foobar_sell_max")
+
+    @classmethod
+    def defaults(cls, config: FactoryConfig) -> Dict[str, float]:
+        return {"foo_stock": config.robot_cost_foo, "sell_min": config.foobar_sell_min}
+
+    def choose(self, robot: "Robot") -> Choice:
+        factory = self.factory
+        config, ledger = factory.config, factory.ledger
+        if robot.must_buy_robot:
+            return "buy_robot", (
+                ledger.reserve(
+                    foo=config.robot_cost_foo, euros=config.robot_cost_euros
+                ),
+            )
+        if factory.foo_queue.qsize() < self._foo_stock:
+            return "harvest_foo", ()
+        if factory.foobar_queue.qsize() >= self._sell_min:
+            return "sell_foobar", (
+                ledger.reserve_foobar(self._sell_min, config.foobar_sell_max),
+            )
+        if robot.must_create_foobar:
+            return "create_foobar", (ledger.reserve(foo=1, bar=1),)
+        return "harvest_bar", ()
+
+
+def import_path(strategy: Type[Strategy]) -> str:
+    """Return the import path of a strategy class, which :func:`load` accepts."""
+
+    return f"{strategy.__module__}:{strategy.__qualname__}"
+
+
+def load(strategy: Union[str, Type[Strategy]]) -> Type[Strategy]:
+    """Return the strategy class with the given name, or import path
+    (``package.module:Class``)."""
+
+    if isinstance(strategy, str):
+        path = STRATEGIES.get(strategy, strategy)
+        module_name, separator, class_name = path.partition(":")
+        if not separator:
+            raise ValueError(
+                f"Unknown strategy {strategy!r}: expected one of "
+                f"{sorted(STRATEGIES)}, or package.module:Class"
+            )
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            raise ValueError(f"Cannot import strategy {strategy!r}: {e}") from None
+        loaded = getattr(module, class_name, None)
+        if not (isinstance(loaded, type) and issubclass(loaded, Strategy)):
+            raise ValueError(f"{path} is not a strategy")
+        strategy = loaded
+    if inspect.isabstract(strategy):
+        missing = ", ".join(sorted(strategy.__abstractmethods__))
+        raise ValueError(f"{strategy.__qualname__} does not implement {missing}")
+    return strategy
@@ -0,0 +1,224 @@
+import concurrent.futures
+import heapq
+import itertools
+import queue
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Callable, Iterator, List, Optional, Tuple, cast
+
+from foobartory.inventory import Reservation
+from foobartory.models import Factory, Robot
+
+# Options of Factory which need an event loop
+_UNSUPPORTED = (
+    "virtual_clock",
+    "metrics",
+    "tracer",
+    "event_log",
+    "checkpointer",
+)
+_STOP = object()
+
+
+def gil_enabled() -> bool:
+    """Whether the interpreter runs with a global interpreter lock."""
+
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+class ThreadRobot(Robot):
+    """A robot performing its activities synchronously, in a thread of a
+    :class:`ThreadFactory`.
+
+    It chooses its activities with the rules of :class:`Robot`, and ends them the same
+    way, under the lock of the factory. Instead of sleeping, it yields the delays of
+    its activities to the thread running it, which runs other robots meanwhile.
+    """
+
+    __slots__ = ()
+
+    def steps(self) -> Iterator[float]:
+        """Perform activities until stopped, yielding the wall seconds to wait
+        between them."""
+
+        factory = cast(ThreadFactory, self._factory)
+        while not self._stopped:
+            with factory.lock:
+                name, args = self.choose()
+            if name != self._current_activity:
+                yield self._delays.switch_activity
+                self._current_activity = name
+            yield from getattr(self, f"_{name}_steps")(*args)
+            with factory.lock:
+                factory.activities[name] += 1
+
+    def _harvest_foo_steps(self) -> Iterator[float]:
+        yield self._delays.foo_mining
+        with cast(ThreadFactory, self._factory).lock:
+            self._end_harvest_foo()
+
+    def _harvest_bar_steps(self) -> Iterator[float]:
+        delays = self._delays
+        yield self._random.uniform(delays.bar_mining_min, delays.bar_mining_max)
+        with cast(ThreadFactory, self._factory).lock:
+            self._end_harvest_bar()
+
+    def _create_foobar_steps(
+        self, reservation: Optional[Reservation]
+    ) -> Iterator[float]:
+        factory = cast(ThreadFactory, self._factory)
+        with factory.lock:
+            reservation = reservation or factory.ledger.reserve(foo=1, bar=1)
+        if reservation is None:
+            return
+        yield self._delays.foobar_creation
+        with factory.lock:
+            self._end_create_foobar(reservation)
+
+    def _sell_foobar_steps(self, reservation: Optional[Reservation]) -> Iterator[float]:
+        factory = cast(ThreadFactory, self._factory)
+        with factory.lock:
+            reservation = reservation or factory.ledger.reserve_foobar(
+                1, self._config.foobar_sell_max
+            )
+        if reservation is None:
+            return
+        yield self._delays.foobar_sell
+        with factory.lock:
+            self._end_sell_foobar(reservation)
+
+    def _buy_robot_steps(self, reservation: Optional[Reservation]) -> Iterator[float]:
+        factory = cast(ThreadFactory, self._factory)
+        config = self._config
+        with factory.lock:
+            reservation = reservation or factory.ledger.reserve(
+                foo=config.robot_cost_foo, euros=config.robot_cost_euros
+            )
+            if reservation is None:
+                return
+            factory.ledger.commit(reservation)
+            factory.add_robot(ThreadRobot(factory=factory))
+            factory.produced["buy_robot"] += 1
+        yield from ()
+
+
+class ThreadFactory(Factory):
+    """A factory whose robots run in a pool of ``threads`` threads, on the real clock.
+
+    Each thread runs a share of the robots, the robot ``n`` being run by the thread
+    ``n % threads``, and waits until the next of its robots wakes up. The stocks, the
+    account and the robots only change under ``lock``, so that the decisions and
+    reservations of the robots stay atomic, with or without a global interpreter
+    lock. Robots must be :class:`ThreadRobot` instances.
+
+    Options needing an event loop (a virtual clock, metrics, a tracer, an event log,
+    checkpoints, or a strategy making robots wait) are not supported.
+    """
+
+    def __init__(self, threads: int, **options: Any) -> None:
+        unsupported = [name for name in _UNSUPPORTED if options.get(name)]
+        if unsupported:
+            raise ValueError(f"Unsupported options for threads: {unsupported}")
+        super().__init__(**options)
+        if self.strategy.waits:
+            raise ValueError(
+                f"Unsupported strategy for threads: {type(self.strategy).__name__}"
+            )
+        self.threads = threads
+        self.lock = threading.RLock()
+        self._inboxes: List["queue.SimpleQueue[Any]"] = [
+            queue.SimpleQueue() for _ in range(threads)
+        ]
+        self._finished = threading.Event()
+
+    def run(self, *observers: Callable[["Factory"], Awaitable[None]]) -> None:
+        """Run the factory in the thread pool until it is stopped."""
+
+        if observers:
+            raise ValueError("Observers need an event loop")
+        self._stopped = False
+        self._started_at = time.monotonic() - self.resumed_at / self.speed
+        for id, robot in enumerate(self.robots):
+            self._inboxes[id % self.threads].put(robot)
+        with concurrent.futures.ThreadPoolExecutor(
+            self.threads, thread_name_prefix="robots"
+        ) as executor:
+            futures = [
+                executor.submit(self._work, index) for index in range(self.threads)
+            ]
+            for future in futures:
+                future.result()
+
+    def add_robot(self, robot: Robot) -> None:
+        """Add a robot, which starts working right away if the factory is running."""
+
+        with self.lock:
+            self.robots.append(robot)
+            if len(self.robots) >= self.config.robot_max_number:
+                self._stop()
+                return
+            self._echo(f"[*] You now have {len(self.robots)} robots")
+            if not self._stopped:
+                self._inboxes[(len(self.robots) - 1) % self.threads].put(robot)
+
+    def stop(self) -> None:
+        """Stop all the robots, and end the run."""
+
+        with self.lock:
+            if self._finished.is_set():
+                return
+            self._stopped = True
+            if self._started_at is not None:
+                self.elapsed = (time.monotonic() - self._started_at) * self.speed
+            self._stop_robots()
+            self._finished.set()
+        for inbox in self._inboxes:
+            inbox.put(_STOP)
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def _work(self, index: int) -> None:
+        """Run the robots of a thread, until the factory stops."""
+
+        inbox = self._inboxes[index]
+        # Steps of the robots, by wall time at which they wake up
+        schedule: List[Tuple[float, int, Iterator[float]]] = []
+        order = itertools.count()
+        try:
+            while not self._finished.is_set():
+                while not inbox.empty():
+                    self._schedule(schedule, order, inbox.get())
+                if schedule and schedule[0][0] <= time.monotonic():
+                    _, _, steps = heapq.heappop(schedule)
+                    try:
+                        delay = next(steps)
+                    except StopIteration:
+                        continue
+                    heapq.heappush(
+                        schedule, (time.monotonic() + delay, next(order), steps)
+                    )
+                    continue
+                timeout = (
+                    max(0.0, schedule[0][0] - time.monotonic()) if schedule else None
+                )
+                try:
+                    self._schedule(schedule, order, inbox.get(timeout=timeout))
+                except queue.Empty:
+                    pass
+        except BaseException:
+            self.stop()
+            raise
+
+    def _schedule(
+        self,
+        schedule: List[Tuple[float, int, Iterator[float]]],
+        order: Iterator[int],
+        robot: Any,
+    ) -> None:
+        if robot is not _STOP:
+            steps = robot.steps()
+            heapq.heappush(schedule, (time.monotonic(), next(order), steps))
@@ -0,0 +1,93 @@
+from typing import Any, List, Set, Tuple
+
+# Process id of the factory in the trace, robots being its threads
+PID = 0
+
+
+class Tracer:
+    """Record the activities of the robots in the trace event format.
+
+    The trace opens in Perfetto or chrome://tracing: each robot has its own track,
+    with a span per activity and per switch of activity, and counter tracks show the
+    stocks, the account and the number of robots. Times are in factory seconds.
+
+    Events are buffered as tuples, and only formatted and written to ``path`` by
+    batches of ``buffer_size`` events, so that tracing a long run stays cheap. The
+    file is a JSON array, which the viewers accept even if the run is interrupted
+    before the tracer is closed.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 10000) -> None:
+        self.buffer_size = buffer_size
+        self._file = open(path, "w")
+        self._file.write('[{"name":"process_name","ph":"M","pid":0,')
+        self._file.write('"args":{"name":"Factory"}}')
+        self._buffer: List[Tuple[Any, ...]] = []
+        self._robots: Set[int] = set()
+
+    def __enter__(self) -> "Tracer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def span(self, name: str, robot: int, start: float, duration: float) -> None:
+        """Record that ``robot`` spent ``duration`` seconds on ``name``."""
+
+        self._buffer.append(("X", name, robot, start, duration))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def counters(
+        self, time: float, foo: int, bar: int, foobar: int, account: int, robots: int
+    ) -> None:
+        """Record the stocks, account and number of robots of the factory."""
+
+        self._buffer.append(("C", time, foo, bar, foobar, account, robots))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        lines = []
+        for event in self._buffer:
+            if event[0] == "X":
+                _, name, robot, start, duration = event
+                if robot not in self._robots:
+                    self._robots.add(robot)
+                    lines.append(
+                        f'{{"name":"thread_name","ph":"M","pid":{PID},"tid":{robot},'
+                        f'"args":{{"name":"Robot {robot}"}}}}'
+                    )
+                lines.append(
+                    f'{{"name":"{name}","ph":"X","pid":{PID},"tid":{robot},'
+                    f'"ts":{_microseconds(start)},"dur":{_microseconds(duration)}}}'
+                )
+            else:
+                _, time, foo, bar, foobar, account, robots = event
+                ts = _microseconds(time)
+                lines.append(
+                    f'{{"name":"stocks","ph":"C","pid":{PID},"ts":{ts},'
+                    f'"args":{{"foo":{foo},"bar":{bar},"foobar":{foobar}}}}}'
+                )
+                lines.append(
+                    f'{{"name":"account","ph":"C","pid":{PID},"ts":{ts},'
+                    f'"args":{{"euros":{account}}}}}'
+                )
+                lines.append(
+                    f'{{"name":"robots","ph":"C","pid":{PID},"ts":{ts},'
+                    f'"args":{{"robots":{robots}}}}}'
+                )
+        if lines:
+            self._file.write(",\n" + ",\n".join(lines))
+        self._buffer.clear()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.write("]\n")
+        self._file.close()
+
+
+def _microseconds(seconds: float) -> int:
+    return round(seconds * 1_000_000)
@@ -0,0 +1,232 @@
+import dataclasses
+from typing import Optional
+
+import numpy as np
+
+from foobartory.batch import BatchResult, RunResult
+from foobartory.config import ACTIVITIES, FactoryConfig
+
+# Activity codes, in the same order as ``foobartory.config.ACTIVITIES``
+HARVEST_FOO, HARVEST_BAR, CREATE_FOOBAR, SELL_FOOBAR, BUY_ROBOT = range(5)
+
+# Robot phases
+DECIDE = 0  # the robot must choose its next activity
+SWITCH = 1  # the robot is switching activity
+START = 2  # the robot is starting its activity
+WORK = 3  # the robot is performing its activity
+
+
+@dataclasses.dataclass(frozen=True)
+class VectorizedResult:
+    """The outcome of every simulated factory, as arrays indexed by factory.
+
+    The factories draw their random numbers together, from a single generator: a
+    run can only be reproduced with all the others, from the ``seed`` of the
+    simulation. Their :class:`RunResult` have no seed of their own.
+    """
+
+    seed: Optional[int]
+    elapsed: np.ndarray
+    account: np.ndarray
+    # Shape (factories, activities)
+    produced: np.ndarray
+
+    def to_batch_result(self) -> BatchResult:
+        return BatchResult(
+            runs=[
+                RunResult(
+                    seed=None,
+                    elapsed=float(self.elapsed[index]),
+                    account=int(self.account[index]),
+                    produced={
+                        name: int(self.produced[index, code])
+                        for code, name in enumerate(ACTIVITIES)
+                    },
+                )
+                for index in range(len(self.elapsed))
+            ]
+        )
+
+
+class VectorizedFactories:
+    """A lockstep simulator of ``count`` independent factories, using NumPy arrays.
+
+    Instead of one coroutine per robot, the state of all factories is stored as
+    arrays, and every step advances each factory to its next robot event with batched
+    operations. Robots follow the same rules as :class:`foobartory.models.Robot`, so
+    the results are statistically equivalent to factories run on a virtual clock.
+    All the factories follow the rules of ``config``.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        seed: Optional[int] = None,
+        config: FactoryConfig = FactoryConfig(),
+    ) -> None:
+        self.config = config
+        self.seed = seed
+        robots = config.robot_max_number
+        self._rng = np.random.default_rng(seed)
+
+        # Per factory state
+        self.foo = np.zeros(count, dtype=np.int64)
+        self.bar = np.zeros(count, dtype=np.int64)
+        self.foobar = np.zeros(count, dtype=np.int64)
+        self.account = np.zeros(count, dtype=np.int64)
+        self.robots = np.full(count, 2, dtype=np.int64)
+        self.now = np.zeros(count)
+        self.done = np.zeros(count, dtype=bool)
+        self.produced = np.zeros((count, len(ACTIVITIES)), dtype=np.int64)
+
+        # Per robot state. Robots that do not exist yet never wake up.
+        self.activity = np.full((count, robots), HARVEST_FOO, dtype=np.int8)
+        self.phase = np.full((count, robots), DECIDE, dtype=np.int8)
+        self.next_time = np.full((count, robots), np.inf)
+        self.next_time[:, :2] = 0
+        # Number of FooBars reserved by each selling robot
+        self.reserved = np.zeros((count, robots), dtype=np.int64)
+
+    def run(self) -> VectorizedResult:
+        """Advance all the factories until they all reach the maximum of robots."""
+
+        while not self.done.all():
+            self.step()
+        return VectorizedResult(
+            seed=self.seed,
+            elapsed=self.now.copy(),
+            account=self.account.copy(),
+            produced=self.produced.copy(),
+        )
+
+    def step(self) -> None:
+        """Process the next robot event of every running factory."""
+
+        factories = np.flatnonzero(~self.done)
+        robots = self.next_time[factories].argmin(axis=1)
+        self.now[factories] = self.next_time[factories, robots]
+
+        phase = self.phase[factories, robots]
+        working = phase == WORK
+        self._finish(factories[working], robots[working])
+        switching = phase == SWITCH
+        self.phase[factories[switching], robots[switching]] = START
+
+        # Like a robot coroutine, a robot keeps deciding and starting activities
+        # until it has to wait.
+        while len(factories):
+            self._decide(factories, robots)
+            self._start(factories, robots)
+            phase = self.phase[factories, robots]
+            pending = (phase == DECIDE) & ~self.done[factories]
+            factories, robots = factories[pending], robots[pending]
+
+    def _decide(self, factories: np.ndarray, robots: np.ndarray) -> None:
+        """Choose the next activity, following the priorities of ``Robot.run``."""
+
+        deciding = self.phase[factories, robots] == DECIDE
+        f, r = factories[deciding], robots[deciding]
+
+        foo = self.foo[f]
+        must_buy_robot = (self.account[f] >= self.config.robot_cost_euros) & (
+            foo >= self.config.robot_cost_foo
+        )
+        must_harvest_foo = foo < self.config.robot_cost_foo
+        must_sell_foobar = self.foobar[f] >= self.config.foobar_sell_min
+        must_create_foobar = (foo > 0) & (self.bar[f] > 0)
+        choice = np.select(
+            [must_buy_robot, must_harvest_foo, must_sell_foobar, must_create_foobar],
+            [BUY_ROBOT, HARVEST_FOO, SELL_FOOBAR, CREATE_FOOBAR],
+            default=HARVEST_BAR,
+        )
+
+        # Robots reserve the resources of their activity as soon as they choose it
+        buy = choice == BUY_ROBOT
+        self.account[f] -= buy * self.config.robot_cost_euros
+        self.foo[f] -= buy * self.config.robot_cost_foo
+        create = choice == CREATE_FOOBAR
+        self.foo[f] -= create
+        self.bar[f] -= create
+        sell = choice == SELL_FOOBAR
+        reserved = sell * np.minimum(self.foobar[f], self.config.foobar_sell_max)
+        self.foobar[f] -= reserved
+        self.reserved[f, r] = reserved
+
+        switch = choice != self.activity[f, r]
+        self.activity[f, r] = choice
+        self.phase[f, r] = np.where(switch, SWITCH, START)
+        self.next_time[f, r] = np.where(
+            switch,
+            self.now[f] + self.config.switch_activity_delay,
+            self.next_time[f, r],
+        )
+
+    def _start(self, factories: np.ndarray, robots: np.ndarray) -> None:
+        starting = self.phase[factories, robots] == START
+        f, r = factories[starting], robots[starting]
+        activity = self.activity[f, r]
+        now = self.now[f]
+
+        self.phase[f, r] = WORK
+        delay = np.select(
+            [activity == HARVEST_FOO, activity == CREATE_FOOBAR],
+            [self.config.foo_mining_delay, self.config.foobar_creation_delay],
+            default=self.config.foobar_sell_delay,
+        ).astype(float)
+        bar = activity == HARVEST_BAR
+        delay[bar] = self._rng.uniform(
+            self.config.bar_mining_min_delay,
+            self.config.bar_mining_max_delay,
+            size=bar.sum(),
+        )
+        self.next_time[f, r] = now + delay
+
+        buy = activity == BUY_ROBOT
+        self._buy_robot(f[buy], r[buy])
+
+    def _buy_robot(self, factories: np.ndarray, robots: np.ndarray) -> None:
+        """Add a robot to the factories, which already paid for it."""
+
+        self.phase[factories, robots] = DECIDE
+        self.produced[factories, BUY_ROBOT] += 1
+
+        new = self.robots[factories]
+        self.activity[factories, new] = HARVEST_FOO
+        self.phase[factories, new] = DECIDE
+        self.next_time[factories, new] = self.now[factories]
+        self.robots[factories] += 1
+        self.done[factories] = self.robots[factories] >= self.config.robot_max_number
+
+    def _finish(self, factories: np.ndarray, robots: np.ndarray) -> None:
+        """Apply the outcome of the activities that just ended."""
+
+        activity = self.activity[factories, robots]
+        self.phase[factories, robots] = DECIDE
+
+        f = factories[activity == HARVEST_FOO]
+        self.foo[f] += 1
+        self.produced[f, HARVEST_FOO] += 1
+
+        f = factories[activity == HARVEST_BAR]
+        self.bar[f] += 1
+        self.produced[f, HARVEST_BAR] += 1
+
+        f = factories[activity == CREATE_FOOBAR]
+        success = self._rng.random(len(f)) <= self.config.foobar_success_rate
+        self.foobar[f] += success
+        self.bar[f] += ~success
+        self.produced[f, CREATE_FOOBAR] += success
+
+        sell = activity == SELL_FOOBAR
+        f = factories[sell]
+        sold = self.reserved[f, robots[sell]]
+        self.account[f] += sold * self.config.foobar_price
+        self.produced[f, SELL_FOOBAR] += sold
+
+
+def simulate(
+    count: int, seed: Optional[int] = None, config: FactoryConfig = FactoryConfig()
+) -> VectorizedResult:
+    """Simulate ``count`` factories, from 2 robots to the maximum."""
+
+    return VectorizedFactories(count=count, seed=seed, config=config).run()
@@ -0,0 +1,105 @@
+import pytest
+
+from foobartory import batch
+
+
+def test_distribution_from_values():
+    distribution = batch.Distribution.from_values([4, 1, 3, 2, 5, 6, 7, 8, 9, 10])
+
+    assert distribution.count == 10
+    assert distribution.mean == 5.5
+    assert distribution.min == 1
+    assert distribution.p50 == 5
+    assert distribution.p90 == 9
+    assert distribution.max == 10
+
+
+def test_distribution_from_single_value():
+    distribution = batch.Distribution.from_values([3])
+
+    assert distribution.stdev == 0
+    assert distribution.p50 == distribution.p90 == 3
+
+
+def test_distribution_str():
+    distribution = batch.Distribution.from_values([1, 2])
+
+    assert str(distribution) == (
+        "mean=1.50 stdev=0.71 min=1.00 p50=1.00 p90=2.00 max=2.00"
+    )
+
+
+def test_run_factory():
+    result = batch.run_factory(seed=0)
+
+    assert result.seed == 0
+    assert result.elapsed > 0
+    assert result.produced["buy_robot"] == 28
+    assert result.produced["sell_foobar"] >= 28 * 3
+
+
+def test_run_factory_is_reproducible():
+    assert batch.run_factory(seed=3) == batch.run_factory(seed=3)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch(workers):
+    result = batch.run_batch(runs=3, seed=5, workers=workers)
+
+    assert [run.seed for run in result.runs] == [5, 6, 7]
+    assert result.runs[0] == batch.run_factory(seed=5)
+    assert result.elapsed.count == 3
+    assert set(result.produced) == set(batch.ACTIVITIES)
+
+
+def test_batch_result_to_dict():
+    result = batch.run_batch(runs=2, workers=1)
+
+    as_dict = result.to_dict()
+
+    assert as_dict["runs"] == 2
+    assert as_dict["elapsed"]["mean"] == result.elapsed.mean
+    assert as_dict["produced"]["buy_robot"]["min"] == 28
+
+
+def test_format_batch():
+    result = batch.run_batch(runs=2, workers=1)
+
+    lines = batch.format_batch(result).splitlines()
+
+    assert lines[0].startswith("time to 30 robots (s): mean=")
+    assert lines[1].startswith("final account (€): mean=")
+    assert len(lines) == 2 + len(batch.ACTIVITIES)
+
+
+def test_run_on_one_loop():
+    results = batch.run_on_one_loop(seeds=[0, 1, 2])
+
+    assert results == [batch.run_factory(seed=seed) for seed in (0, 1, 2)]
+
+
+def test_run_on_one_loop_isolates_output():
+    config = batch.FactoryConfig(robot_max_number=4)
+
+    first, second = batch.run_on_one_loop(
+        seeds=[0, 1], config=config, capture_output=True
+    )
+
+    assert (
+        first.output
+        == second.output
+        == (
+            "[*] You now have 1 robots",
+            "[*] You now have 2 robots",
+            "[*] You now have 3 robots",
+            "[+] Congratulation, you have 4 robots!",
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_factories():
+    results = await batch.run_factories(seeds=[4, 5], speed=1e9)
+
+    assert [result.seed for result in results] == [4, 5]
+    assert all(result.produced["buy_robot"] == 28 for result in results)
@@ -0,0 +1,73 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks import suite
+
+BASELINE = Path(suite.__file__).parent / "baseline.json"
+
+
+def results(**metrics):
+    return {
+        "metrics": {
+            name: {"value": value, "unit": unit, "better": better}
+            for name, (value, unit, better) in metrics.items()
+        }
+    }
+
+
+@pytest.mark.parametrize(
+    "value, better, regressed",
+    [
+        (115, "lower", False),
+        (125, "lower", True),
+        (50, "lower", False),
+        (85, "higher", False),
+        (75, "higher", True),
+        (150, "higher", False),
+    ],
+)
+def test_compare_relative(value, better, regressed):
+    baseline = results(metric=(100, "ns", better))
+    current = results(metric=(value, "ns", better))
+
+    assert suite.compare(baseline, current, threshold=0.2) == (
+        ["metric"] if regressed else []
+    )
+
+
+@pytest.mark.parametrize(
+    "value, unit, better, regressed",
+    [
+        (0.0, "bytes", "lower", False),
+        (0.1, "bytes", "lower", False),
+        (8.5, "bytes", "lower", True),
+        (0.1, "ns", "lower", True),
+        (0.1, "events/s", "higher", False),
+        (-0.1, "events/s", "higher", True),
+    ],
+)
+def test_compare_zero_baseline(value, unit, better, regressed, capsys):
+    baseline = results(metric=(0.0, unit, better))
+    current = results(metric=(value, unit, better))
+
+    assert suite.compare(baseline, current, threshold=0.2) == (
+        ["metric"] if regressed else []
+    )
+    assert "n/a" in capsys.readouterr().out
+
+
+def test_compare_missing_metric():
+    baseline = results(old=(1.0, "s", "lower"), kept=(1.0, "s", "lower"))
+    current = results(kept=(2.0, "s", "lower"), new=(1.0, "s", "lower"))
+
+    assert suite.compare(baseline, current, threshold=0.2) == ["kept"]
+
+
+def test_compare_baseline():
+    baseline = json.loads(BASELINE.read_text())
+    current = json.loads(BASELINE.read_text())
+    current["metrics"]["memory_per_item"]["value"] = 0.1
+
+    assert suite.compare(baseline, current, threshold=0.2) == []
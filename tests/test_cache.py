@@ -0,0 +1,113 @@
+import importlib
+import sys
+
+import pytest
+
+from foobartory import batch, optimizer
+from foobartory.cache import ResultCache, code_version
+from foobartory.config import FactoryConfig
+from foobartory.strategy import Greedy
+
+CONFIG = FactoryConfig(robot_max_number=6)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with ResultCache(str(tmp_path / "cache.sqlite")) as cache:
+        yield cache
+
+
+def result(seed):
+    return batch.RunResult(
+        seed=seed, elapsed=10.0 + seed, account=1, produced={"buy_robot": 4}
+    )
+
+
+def test_code_version():
+    assert len(code_version()) == 16
+    assert code_version() == code_version()
+
+
+def test_key():
+    key = ResultCache.key(0)
+
+    assert key == ResultCache.key(0, FactoryConfig(), Greedy, {"sell_min": 3.0})
+    assert key != ResultCache.key(1)
+    assert key != ResultCache.key(0, CONFIG)
+    assert key != ResultCache.key(0, strategy="dispatch")
+    assert key != ResultCache.key(0, parameters={"sell_min": 1})
+
+
+def test_key_changes_with_the_strategy_source(tmp_path, monkeypatch):
+    source = """from foobartory.strategy import Strategy
+
+
+class Plugged(Strategy):
+    def choose(self, robot):
+        return "harvest_{}", ()
+"""
+    (tmp_path / "plugged.py").write_text(source.format("foo"))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module("plugged")
+    monkeypatch.setitem(sys.modules, "plugged", module)
+    key = ResultCache.key(0, strategy="plugged:Plugged")
+    assert key == ResultCache.key(0, strategy="plugged:Plugged")
+
+    (tmp_path / "plugged.py").write_text(source.format("bar"))
+    importlib.reload(module)
+
+    assert ResultCache.key(0, strategy="plugged:Plugged") != key
+
+
+def test_get_and_put(cache):
+    cache.put_many([("a", result(0)), ("b", result(1))])
+
+    found = cache.get_many(["a", "c", "a"])
+
+    assert found == {"a": result(0)}
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(cache) == 2
+
+
+def test_least_recently_used_runs_are_evicted(tmp_path):
+    with ResultCache(str(tmp_path / "cache.sqlite"), max_entries=2) as cache:
+        cache.put_many([("a", result(0))])
+        cache.put_many([("b", result(1))])
+        cache.get_many(["a"])
+        cache.put_many([("c", result(2))])
+
+        assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+
+def test_prune(cache):
+    cache.put_many([(key, result(0)) for key in "abcd"])
+    cache._connection.execute("UPDATE runs SET version = 'old' WHERE key = 'a'")
+    assert cache.info().stale == 1
+
+    assert cache.prune(stale=True) == 1
+    assert cache.prune(max_entries=1) == 2
+    info = cache.info()
+    assert (info.entries, info.stale) == (1, 0)
+    assert info.size > 0
+
+
+def test_run_batch_skips_cached_runs(cache, mocker):
+    first = batch.run_batch(runs=3, workers=1, config=CONFIG, cache=cache)
+    run_factory = mocker.spy(batch, "run_factory")
+
+    second = batch.run_batch(runs=4, workers=1, config=CONFIG, cache=cache)
+
+    assert second.runs[:3] == first.runs
+    assert [call.args[0] for call in run_factory.call_args_list] == [3]
+    assert (cache.hits, cache.misses) == (3, 4)
+
+
+def test_search_skips_cached_runs(cache):
+    batch.run_batch(runs=2, workers=1, config=CONFIG, cache=cache)
+    search = optimizer.Search(runs=3, workers=1, config=CONFIG, cache=cache)
+
+    (evaluation,) = search.evaluate([{"sell_min": 3}])
+
+    assert evaluation.elapsed.count == 3
+    assert cache.hits == 2
+    assert len(cache) == 3
@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from foobartory import checkpoint, clock, models
+from foobartory.config import FactoryConfig
+from foobartory.dispatcher import Dispatcher
+
+
+def make_factory(**options):
+    factory = models.Factory(echo=None, virtual_clock=True, **options)
+    factory.add_robot(models.Robot(factory=factory))
+    factory.add_robot(models.Robot(factory=factory))
+    return factory
+
+
+def capture_at(factory, time):
+    """Run a factory on a virtual clock, and capture its state at ``time``."""
+
+    async def run():
+        run = asyncio.get_running_loop().create_task(factory.run_async())
+        await asyncio.sleep(time)
+        try:
+            return checkpoint.capture(factory)
+        finally:
+            factory.stop()
+            await run
+
+    loop = clock.VirtualClockEventLoop()
+    try:
+        return loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+def reserved(robot):
+    reservation = robot.reservation
+    if reservation is None:
+        return None
+    items = (reservation.foo, reservation.bar, reservation.foobar)
+    return [[item.id for item in stock] for stock in items], reservation.euros
+
+
+def test_encode_decode():
+    state = capture_at(make_factory(seed=3, config=FactoryConfig(foobar_price=2)), 150)
+
+    decoded = checkpoint.decode(checkpoint.encode(state))
+
+    assert decoded.config == state.config
+    assert (decoded.strategy, decoded.strategy_parameters) == (
+        "foobartory.strategy:Greedy",
+        {"foo_stock": 6, "sell_min": 3},
+    )
+    assert (decoded.seed, decoded.run_time, decoded.account) == (
+        state.seed,
+        state.run_time,
+        state.account,
+    )
+    assert decoded.stocks == state.stocks
+    assert decoded.produced == state.produced
+    assert decoded.activities == state.activities
+    assert [robot._replace(reservation=None) for robot in decoded.robots] == [
+        robot._replace(reservation=None) for robot in state.robots
+    ]
+    assert [reserved(robot) for robot in decoded.robots] == [
+        reserved(robot) for robot in state.robots
+    ]
+
+
+def test_capture_in_progress():
+    state = capture_at(make_factory(seed=0), 0.5)
+
+    assert state.run_time == 0.5
+    assert [robot.in_progress for robot in state.robots] == ["harvest_foo"] * 2
+    assert [robot.remaining for robot in state.robots] == [0.5, 0.5]
+
+
+def test_capture_provenance():
+    with pytest.raises(ValueError, match="provenance"):
+        capture_at(make_factory(provenance=True), 1)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_resume_continues_the_run(seed, tmp_path):
+    path = str(tmp_path / "factory.checkpoint")
+    factory = make_factory(seed=seed, checkpointer=checkpoint.Checkpointer(path, 50))
+    factory.run()
+
+    state = checkpoint.load(path)
+    resumed = checkpoint.restore(state, echo=None, virtual_clock=True)
+    assert len(resumed.robots) == len(state.robots)
+    resumed.run()
+
+    assert resumed.elapsed == pytest.approx(factory.elapsed)
+    assert resumed.account == factory.account
+    assert resumed.produced == factory.produced
+    assert resumed.activities == factory.activities
+    assert resumed.ledger.held == factory.ledger.held
+
+
+def test_resume_keeps_the_strategy(tmp_path):
+    path = str(tmp_path / "factory.checkpoint")
+    factory = make_factory(
+        seed=0,
+        checkpointer=checkpoint.Checkpointer(path, 50),
+        strategy="dispatch",
+        strategy_parameters={"min_fleet": 5},
+    )
+    factory.run()
+
+    state = checkpoint.decode(checkpoint.encode(checkpoint.load(path)))
+    resumed = checkpoint.restore(state, echo=None, virtual_clock=True)
+    assert isinstance(resumed.strategy, Dispatcher)
+    assert resumed.strategy.parameters["min_fleet"] == 5
+    assert resumed.strategy.getstate() == state.strategy_state
+    assert any(state.strategy_state["roles"])
+    resumed.run()
+
+    assert resumed.elapsed == pytest.approx(factory.elapsed)
+    assert resumed.produced == factory.produced
+
+
+def test_save_replaces_checkpoint(tmp_path):
+    path = tmp_path / "factory.checkpoint"
+    path.write_bytes(b"previous")
+
+    checkpoint.save(capture_at(make_factory(seed=0), 10), str(path))
+
+    assert checkpoint.load(str(path)).run_time == 10
+    assert [p.name for p in tmp_path.iterdir()] == ["factory.checkpoint"]
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        (b"", "Not a factory checkpoint"),
+        (b"x" * 16, "Not a factory checkpoint"),
+        (checkpoint._HEADER.pack(checkpoint.MAGIC, 1, 0), "Unsupported"),
+        (
+            checkpoint._HEADER.pack(checkpoint.MAGIC, checkpoint.VERSION, 0) + b"x",
+            "Corrupted",
+        ),
+    ],
+)
+def test_decode_invalid(data, message):
+    with pytest.raises(ValueError, match=message):
+        checkpoint.decode(data)
@@ -1,10 +1,11 @@
+import json
 import logging
 from pathlib import Path
 
 import pytest
 from click.testing import CliRunner
 
-from foobartory import cli
+from foobartory import cli, eventlog
 
 
 @pytest.mark.parametrize(
@@ -73,6 +74,304 @@ def test_cli():
     )
 
 
+def test_cli_virtual_clock():
+    result = CliRunner().invoke(cli.cli, ["--virtual-clock"])
+    assert result.exit_code == 0
+    assert "[+] Congratulation, you have 30 robots!\n" in result.output
+    assert "[*] Simulated time: " in result.output
+
+
+def test_cli_quiet_max_robots():
+    result = CliRunner().invoke(
+        cli.cli, ["--virtual-clock", "--quiet", "--max-robots=5"]
+    )
+    assert result.exit_code == 0
+    assert "[*] Starting factory...\n[*] Simulated time: " in result.output
+
+
+def test_cli_config(tmp_path, monkeypatch):
+    path = tmp_path / "factory.toml"
+    path.write_text("robot_max_number = 10\nfoobar_sell_max = 3\n")
+    monkeypatch.setenv("FOOBARTORY_ROBOT_MAX_NUMBER", "8")
+    result = CliRunner().invoke(
+        cli.cli,
+        ["--virtual-clock", f"--config={path}", "--set", "robot_max_number=6"],
+    )
+    assert result.exit_code == 0
+    assert "[+] Congratulation, you have 6 robots!\n" in result.output
+
+
+def test_cli_invalid_setting():
+    result = CliRunner().invoke(cli.cli, ["--set", "robot_max_number"])
+    assert result.exit_code == 2
+    assert "Expected NAME=VALUE" in result.output
+
+
+def test_cli_batch_config():
+    result = CliRunner().invoke(
+        cli.cli, ["--max-robots=5", "batch", "--runs=2", "--workers=1"]
+    )
+    assert result.exit_code == 0
+    assert result.output.startswith("time to 5 robots (s): mean=")
+
+
+def test_cli_seed():
+    args = ["--virtual-clock", "--quiet", "--seed=4"]
+    first = CliRunner().invoke(cli.cli, args)
+    second = CliRunner().invoke(cli.cli, args)
+    assert first.exit_code == second.exit_code == 0
+    assert first.output == second.output
+
+
+def test_cli_dispatch():
+    result = CliRunner().invoke(
+        cli.cli, ["--virtual-clock", "--quiet", "--seed=1", "--strategy=dispatch"]
+    )
+    assert result.exit_code == 0
+    elapsed = float(result.output.split("Simulated time: ")[1].split()[0])
+    assert elapsed < 386.6
+
+
+def test_cli_metrics(tmp_path):
+    path = tmp_path / "metrics.json"
+    result = CliRunner().invoke(
+        cli.cli, ["--virtual-clock", "--quiet", "--metrics", str(path)]
+    )
+    assert result.exit_code == 0
+    assert json.loads(path.read_text())["gauges"]["robots"] == 30
+
+
+def test_cli_metrics_prometheus():
+    result = CliRunner().invoke(
+        cli.cli,
+        ["--virtual-clock", "--quiet", "--metrics=-", "--metrics-format=prometheus"],
+    )
+    assert result.exit_code == 0
+    assert "# TYPE foobartory_activities_total counter\n" in result.output
+
+
+def test_cli_trace(tmp_path):
+    path = tmp_path / "trace.json"
+    result = CliRunner().invoke(
+        cli.cli, ["--virtual-clock", "--quiet", "--trace", str(path)]
+    )
+    assert result.exit_code == 0
+    assert json.loads(path.read_text())[0]["args"] == {"name": "Factory"}
+
+
+def test_cli_log_summary(caplog):
+    caplog.set_level("INFO")
+    result = CliRunner().invoke(
+        cli.cli, ["--virtual-clock", "-q", "-v", "--log-summary=60", "--log-async"]
+    )
+    assert result.exit_code == 0
+    messages = [
+        record.getMessage()
+        for record in caplog.records
+        if record.name == "foobartory.decorators"
+    ]
+    assert len(messages) == 1
+    assert messages[0].startswith("[*] ")
+    assert " activities in " in messages[0]
+
+
+def test_cli_dashboard():
+    result = CliRunner().invoke(cli.cli, ["--virtual-clock", "--dashboard"])
+    assert result.exit_code == 0
+    assert "[*] You now have" not in result.output
+    assert "Robots      ############################## 30/30" in result.output
+
+
+def test_cli_events(tmp_path):
+    path = tmp_path / "events.bin"
+    result = CliRunner().invoke(
+        cli.cli, ["--virtual-clock", "--quiet", "--events", str(path)]
+    )
+    assert result.exit_code == 0
+    assert eventlog.read(str(path))["activity"].max() == 4
+
+
+def test_cli_checkpoint_and_resume(tmp_path):
+    path = tmp_path / "factory.checkpoint"
+    result = CliRunner().invoke(
+        cli.cli,
+        [
+            "--virtual-clock",
+            "--quiet",
+            "--seed=1",
+            "--checkpoint",
+            str(path),
+            "--checkpoint-interval=100",
+        ],
+    )
+    assert result.exit_code == 0
+
+    result = CliRunner().invoke(
+        cli.cli, ["--virtual-clock", "--quiet", "--resume", str(path)]
+    )
+    assert result.exit_code == 0
+    assert "[*] Resuming after " in result.output
+    assert result.output.endswith("[*] Simulated time: 386.6 seconds\n")
+
+
+def test_cli_resume_invalid_checkpoint(tmp_path):
+    path = tmp_path / "factory.checkpoint"
+    path.write_bytes(b"not a checkpoint")
+    result = CliRunner().invoke(cli.cli, ["--virtual-clock", "--resume", str(path)])
+    assert result.exit_code == 2
+    assert "Not a factory checkpoint" in result.output
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        ["--seed=1"],
+        ["--set", "foobar_sell_max=4"],
+        ["--max-robots=10"],
+        ["--strategy=greedy"],
+        ["--strategy-param", "sell_min=5"],
+    ],
+)
+def test_cli_resume_saved_options(tmp_path, options):
+    path = tmp_path / "factory.checkpoint"
+    path.write_bytes(b"not a checkpoint")
+    result = CliRunner().invoke(cli.cli, ["--resume", str(path), *options])
+    assert result.exit_code == 2
+    assert f"{options[0].split('=')[0]} cannot be used with --resume" in result.output
+
+
+def test_cli_batch():
+    result = CliRunner().invoke(cli.cli, ["batch", "--runs=2", "--workers=1"])
+    assert result.exit_code == 0
+    assert result.output.startswith("time to 30 robots (s): mean=")
+
+
+def test_cli_batch_json():
+    result = CliRunner().invoke(cli.cli, ["batch", "-n", "2", "-w", "1", "--json"])
+    assert result.exit_code == 0
+    assert json.loads(result.output)["runs"] == 2
+
+
+def test_cli_batch_vectorized():
+    result = CliRunner().invoke(cli.cli, ["batch", "-n", "3", "--engine=vectorized"])
+    assert result.exit_code == 0
+    assert result.output.startswith("time to 30 robots (s): mean=")
+
+
+def test_cli_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    runner = CliRunner(mix_stderr=False)
+
+    result = runner.invoke(cli.cli, ["batch", "-n", "2", "-w", "1", "--cache", path])
+    assert result.exit_code == 0
+    assert result.stderr == f"[*] 0 of 2 runs found in {path}\n"
+
+    result = runner.invoke(
+        cli.cli,
+        ["batch", "-n", "3", "-w", "1"],
+        env={"FOOBARTORY_CACHE": path},
+    )
+    assert result.stderr == f"[*] 2 of 3 runs found in {path}\n"
+
+    result = runner.invoke(cli.cli, ["cache", "info", "--cache", path])
+    assert result.output.startswith(f"{path}: 3 runs, 0 from other code versions")
+
+    result = runner.invoke(
+        cli.cli, ["cache", "prune", "--cache", path, "--max-entries=1"]
+    )
+    assert result.output.startswith("[*] Removed 2 runs\n")
+
+
+def test_cli_cache_missing():
+    result = CliRunner().invoke(
+        cli.cli, ["cache", "info"], env={"FOOBARTORY_CACHE": None}
+    )
+    assert result.exit_code == 2
+    assert "Missing option '--cache'" in result.output
+
+
+def test_cli_estimate():
+    result = CliRunner().invoke(cli.cli, ["--max-robots=4", "estimate", "--curve"])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert lines[0].startswith("time to 4 robots (s): ")
+    assert lines[1].startswith("robot time per robot bought (s): ")
+    assert lines[2].startswith("lag of the first sale (s): ")
+    assert [line.split(":")[0] for line in lines[3:]] == ["3 robots", "4 robots"]
+
+
+def test_cli_estimate_json():
+    result = CliRunner().invoke(cli.cli, ["--max-robots=4", "estimate", "--json"])
+    assert result.exit_code == 0
+    estimate = json.loads(result.output)
+    assert estimate["curve"][-1]["robots"] == 4
+    assert estimate["curve"][-1]["time"] == pytest.approx(estimate["elapsed"])
+
+
+def test_cli_invalid_strategy():
+    result = CliRunner().invoke(cli.cli, ["--strategy-param=sell_min=x"])
+    assert result.exit_code == 2
+    assert "--strategy-param" in result.output
+
+    result = CliRunner().invoke(cli.cli, ["--strategy-param=sell_max=3"])
+    assert result.exit_code == 2
+    assert "Unknown parameters" in result.output
+
+
+def test_cli_optimize():
+    result = CliRunner().invoke(
+        cli.cli,
+        ["--max-robots=5", "optimize", "-p", "sell_min=1,3", "-n", "2", "-w", "1"],
+    )
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert lines[0].startswith("2 parameter sets of greedy, 2 runs each")
+    assert len(lines) == 3
+
+
+def test_cli_optimize_evolve_json():
+    result = CliRunner().invoke(
+        cli.cli,
+        [
+            "--max-robots=5",
+            "optimize",
+            "--strategy=dispatch",
+            "-p",
+            "switch_margin=0:4",
+            "-p",
+            "min_fleet=4",
+            "-n",
+            "2",
+            "-w",
+            "1",
+            "--population=2",
+            "--generations=2",
+            "--top=1",
+            "--json",
+        ],
+    )
+    assert result.exit_code == 0
+    (best,) = json.loads(result.output)
+    assert best["parameters"]["min_fleet"] == 4
+    assert set(best) == {"parameters", "elapsed", "confidence_interval"}
+
+
+def test_cli_optimize_mixed_space():
+    result = CliRunner().invoke(
+        cli.cli, ["optimize", "-p", "sell_min=1,3", "-p", "foo_stock=6:8"]
+    )
+    assert result.exit_code == 2
+    assert "Cannot mix" in result.output
+
+
+def test_cli_batch_dispatch_vectorized():
+    result = CliRunner().invoke(
+        cli.cli, ["batch", "-n", "3", "--engine=vectorized", "--strategy=dispatch"]
+    )
+    assert result.exit_code == 2
+    assert "only runs the default greedy strategy" in result.output
+
+
 def test_main(mocker):
     # This is just to reach 100% coverage
     mock = mocker.patch.object(cli, "cli")
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from foobartory import clock, models
+
+
+@pytest.fixture
+def loop():
+    loop = clock.VirtualClockEventLoop()
+    yield loop
+    loop.close()
+
+
+def test_virtual_clock_starts_at_zero(loop):
+    assert loop.time() == 0
+
+
+def test_virtual_clock_sleep(loop):
+    start = time.monotonic()
+
+    loop.run_until_complete(asyncio.sleep(3600))
+
+    assert loop.time() == pytest.approx(3600)
+    assert time.monotonic() - start < 1
+
+
+def test_virtual_clock_timers_order(loop):
+    calls = []
+    loop.call_later(2, calls.append, 2)
+    loop.call_later(1, calls.append, 1)
+    loop.call_later(3, loop.stop)
+
+    loop.run_forever()
+
+    assert calls == [1, 2]
+    assert loop.time() == pytest.approx(3)
+
+
+def test_virtual_clock_simultaneous_timers_order(loop):
+    calls = []
+    for index in range(20):
+        loop.call_later(1, calls.append, index)
+    loop.call_later(2, loop.stop)
+
+    loop.run_forever()
+
+    assert calls == list(range(20))
+
+
+def test_virtual_clock_advances_exactly(loop):
+    async def sleep_many():
+        for _ in range(10):
+            await asyncio.sleep(0.1)
+
+    loop.run_until_complete(sleep_many())
+
+    assert loop.time() == sum([0.1] * 10)
+
+
+def test_virtual_clock_does_not_advance_with_ready_callbacks(loop):
+    async def yield_many():
+        for _ in range(100):
+            await asyncio.sleep(0)
+
+    loop.run_until_complete(yield_many())
+
+    assert loop.time() == 0
+
+
+def test_virtual_clock_wakes_up_from_other_threads(loop):
+    future = loop.create_future()
+    timer = threading.Timer(0.01, loop.call_soon_threadsafe, (future.set_result, 1))
+    timer.start()
+
+    assert loop.run_until_complete(future) == 1
+    assert loop.time() == 0
+
+
+def test_cancel_pending_tasks(loop):
+    task = loop.create_task(asyncio.sleep(10))
+
+    clock.cancel_pending_tasks(loop)
+
+    assert task.cancelled()
+
+
+def test_cancel_pending_tasks_without_tasks(loop):
+    clock.cancel_pending_tasks(loop)
+
+    assert not loop.is_closed()
+
+
+def run_virtual_factory(seed):
+    factory = models.Factory(virtual_clock=True, seed=seed)
+    factory.add_robot(models.Robot(factory))
+    factory.add_robot(models.Robot(factory))
+    factory.run()
+    return factory
+
+
+def test_virtual_factory_run():
+    factory = run_virtual_factory(seed=0)
+
+    assert len(factory.robots) == 30
+    # A run can not be shorter than the time needed to mine the Foo of 28 robots
+    assert factory.elapsed > 28 * 6
+
+
+def test_virtual_factory_is_reproducible():
+    first = run_virtual_factory(seed=1)
+    second = run_virtual_factory(seed=1)
+
+    assert first.elapsed == second.elapsed
+    assert first.account == second.account
+    assert first.foo_queue.qsize() == second.foo_queue.qsize()
+
+
+def test_virtual_factory_leaves_no_task():
+    factory = run_virtual_factory(seed=0)
+
+    assert not factory._tasks
+
+
+def test_factory_stop_does_not_wait_for_robots():
+    factory = models.Factory(virtual_clock=True, echo=None)
+    factory.add_robot(models.Robot(factory))
+    factory._loop.call_later(0.5, factory.stop)
+
+    factory.run()
+
+    # The robot was still harvesting Foo, which takes 1 second
+    assert factory.elapsed == pytest.approx(0.5)
+    assert factory.foo_queue.empty()
+    assert not factory._tasks
+
+
+def test_factory_stop_after_run():
+    factory = run_virtual_factory(seed=0)
+    elapsed = factory.elapsed
+
+    factory.stop()
+
+    assert factory.elapsed == elapsed
+    assert factory.run_time() == elapsed
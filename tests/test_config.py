@@ -0,0 +1,76 @@
+import pytest
+
+from foobartory import config
+
+
+def test_factory_config_defaults():
+    factory_config = config.FactoryConfig()
+
+    assert factory_config.robot_max_number == config.ROBOT_MAX_NUMBER
+    assert factory_config.foobar_sell_delay == config.FOOBAR_SELL_DELAY
+
+
+def test_factory_config_is_frozen():
+    with pytest.raises(AttributeError):
+        config.FactoryConfig().foobar_price = 2
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {"foo_mining_delay": -1},
+        {"robot_max_number": 2},
+        {"bar_mining_min_delay": 3},
+        {"foobar_sell_min": 0},
+        {"foobar_sell_min": 6},
+        {"foobar_success_rate": 1.5},
+    ],
+)
+def test_factory_config_invalid(values):
+    with pytest.raises(ValueError):
+        config.FactoryConfig(**values)
+
+
+def test_update():
+    factory_config = config.FactoryConfig().update(
+        {"foobar_sell_max": "4", "FOO_MINING_DELAY": "0.5"}
+    )
+
+    assert factory_config.foobar_sell_max == 4
+    assert factory_config.foo_mining_delay == 0.5
+
+
+@pytest.mark.parametrize(
+    "values",
+    [{"unknown": 1}, {"foobar_sell_max": "four"}, {"foobar_sell_max": 4.5}],
+)
+def test_update_invalid(values):
+    with pytest.raises(ValueError):
+        config.FactoryConfig().update(values)
+
+
+def test_update_from_env():
+    factory_config = config.FactoryConfig().update_from_env(
+        {"FOOBARTORY_ROBOT_COST_FOO": "4", "ROBOT_COST_EUROS": "1"}
+    )
+
+    assert factory_config.robot_cost_foo == 4
+    assert factory_config.robot_cost_euros == config.ROBOT_COST_EUROS
+
+
+def test_from_toml(tmp_path):
+    path = tmp_path / "factory.toml"
+    path.write_text("robot_max_number = 10\nfoobar_success_rate = 0.8\n")
+
+    factory_config = config.FactoryConfig.from_toml(str(path))
+
+    assert factory_config == config.FactoryConfig(
+        robot_max_number=10, foobar_success_rate=0.8
+    )
+
+
+def test_delays():
+    delays = config.FactoryConfig(foo_mining_delay=2).delays(speed=4)
+
+    assert delays.foo_mining == 0.5
+    assert delays.switch_activity == config.SWITCH_ACTIVITY_DELAY / 4
@@ -0,0 +1,58 @@
+from foobartory import dashboard, models
+from foobartory.snapshots import Snapshot
+
+
+def snapshot(time, robots, actions):
+    return Snapshot(
+        time=time,
+        robots=robots,
+        account=4,
+        foo=5,
+        bar=2,
+        foobar=1,
+        actions=actions,
+        activities=("harvest_foo",) * (robots - 1) + ("sell_foobar",),
+    )
+
+
+def test_render():
+    panel = dashboard.Dashboard(interval=1)
+
+    panel.render(snapshot(time=10, robots=2, actions=20), ceiling=30)
+    text = panel.render(snapshot(time=20, robots=4, actions=70), ceiling=30, speed=10)
+
+    assert text.splitlines() == [
+        "Foobartory  time 20.0s  speed x10",
+        "Robots      ####.......................... 4/30",
+        "Account     4 EUR",
+        "Stocks      foo 5  bar 2  foobar 1",
+        "Activities  harvest_foo 3  harvest_bar 0  create_foobar 0  sell_foobar 1  "
+        "buy_robot 0",
+        "Actions/s   5.0",
+        "ETA         130s",
+    ]
+
+
+def test_render_rates_window():
+    panel = dashboard.Dashboard(interval=1)
+
+    panel.render(snapshot(time=0, robots=2, actions=0), ceiling=30)
+    text = panel.render(snapshot(time=1, robots=2, actions=5), ceiling=30)
+    assert text.splitlines()[-2:] == ["Actions/s   5.0", "ETA         -"]
+
+    text = panel.render(snapshot(time=100, robots=30, actions=5), ceiling=30)
+    assert text.splitlines()[-2:] == ["Actions/s   0.0", "ETA         reached"]
+
+
+def test_dashboard_is_throttled():
+    panels = []
+    factory = models.Factory(echo=None, virtual_clock=True, seed=0)
+    factory.add_robot(models.Robot(factory=factory))
+    factory.add_robot(models.Robot(factory=factory))
+    panel = dashboard.Dashboard(interval=1, draw=panels.append, clock=lambda: 0)
+
+    factory.run(panel.run)
+
+    # The clock never moves: only the first and the final panels are drawn
+    assert len(panels) == 2
+    assert "30/30" in panels[-1]
@@ -0,0 +1,108 @@
+import collections
+
+import pytest
+
+from foobartory import dispatcher
+from foobartory.batch import run_factory
+from foobartory.config import FactoryConfig
+from foobartory.models import Factory, Robot
+from foobartory.strategy import Greedy
+
+
+def make_factory(robots, **options):
+    factory = Factory(echo=None, strategy="dispatch", **options)
+    for _ in range(robots):
+        factory.robots.append(Robot(factory))
+    return factory
+
+
+def test_workload():
+    weights = dispatcher.workload(FactoryConfig())
+
+    assert sum(weights.values()) == pytest.approx(1)
+    assert max(weights, key=weights.get) == "harvest_foo"
+    assert min(weights, key=weights.get) == "buy_robot"
+
+
+def test_invalid_config():
+    with pytest.raises(ValueError, match="earn money"):
+        Factory(strategy="dispatch", config=FactoryConfig(foobar_success_rate=0))
+
+
+def test_small_fleet():
+    factory = make_factory(2)
+    first, second = factory.robots
+    for _ in range(6):
+        factory.foo_queue.put_new()
+
+    assert first.choose() == ("harvest_foo", ())
+    assert second.choose() == Greedy(factory).choose(second)
+    assert factory.strategy.roles == {}
+
+
+def test_roles_follow_workload():
+    factory = make_factory(30)
+
+    roles = [robot.choose()[0] for robot in factory.robots]
+
+    counts = factory.strategy.counts
+    assert sum(counts.values()) == 30
+    assert counts["harvest_foo"] > counts["create_foobar"] > counts["harvest_bar"]
+    assert counts["buy_robot"] == 1
+    # Robots with nothing to create, sell or buy wait, instead of switching
+    assert set(roles) == {"harvest_foo", "harvest_bar", "wait"}
+
+
+def test_roles_are_kept():
+    factory = make_factory(10)
+    robot = factory.robots[5]
+    role = robot.choose()[0]
+
+    for _ in range(3):
+        assert robot.choose()[0] == role
+    assert sum(factory.strategy.counts.values()) == 1
+
+
+def test_reassign_on_surplus():
+    factory = make_factory(4)
+    roles = factory.strategy.roles
+    for robot in factory.robots:
+        robot.choose()
+    harvester = next(robot for robot, role in roles.items() if role == "harvest_foo")
+    other = factory.robots[-1]
+    roles[other] = "harvest_foo"
+    factory.strategy.counts = collections.Counter(roles.values())
+    for _ in range(50):
+        factory.foo_queue.put_new()
+
+    name, _ = harvester.choose()
+
+    assert roles[harvester] != "harvest_foo"
+    assert name != "harvest_foo"
+
+
+def test_sellers_wait_for_full_sales():
+    factory = make_factory(8)
+    for robot in factory.robots:
+        robot.choose()
+    roles = factory.strategy.roles
+    seller = next(robot for robot, role in roles.items() if role == "sell_foobar")
+    assert seller.choose() == ("wait", ())
+
+    for _ in range(4):
+        factory.foobar_queue.put_new()
+    assert seller.choose() == ("wait", ())
+    factory.foobar_queue.put_new()
+    name, (reservation,) = seller.choose()
+
+    assert name == "sell_foobar"
+    assert len(reservation.foobar) == 5
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_dispatch_reaches_ceiling_faster(seed):
+    greedy = run_factory(seed)
+    dispatched = run_factory(seed, strategy="dispatch")
+
+    assert dispatched.produced["buy_robot"] == greedy.produced["buy_robot"] == 28
+    assert dispatched.elapsed < greedy.elapsed * 0.8
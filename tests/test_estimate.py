@@ -0,0 +1,96 @@
+import pytest
+
+from foobartory.batch import run_batch
+from foobartory.config import FactoryConfig
+from foobartory.estimate import Estimate
+
+# Largest relative error of the estimate, against the mean of simulated runs
+ERROR_BOUND = 0.08
+
+
+def test_robot_time():
+    estimate = Estimate.from_config(FactoryConfig(switch_activity_delay=0))
+
+    assert estimate.switches == 0
+    # 11 Foo, 3 Bar, 5 attempts to create FooBars, and 3 FooBars sold by 3 or 4
+    assert estimate.work == pytest.approx(1.2 * (11 + 3 * 1.25 + 5 * 2 + 3 / 3.5 * 10))
+    assert estimate.robot_time == estimate.work
+    # The 2 robots create 2 more FooBars before the first sale
+    assert estimate.lag == pytest.approx(2 * (1 / 0.6 * (1 + 2) + 1.25) / 2)
+
+
+@pytest.mark.parametrize(
+    "settings, sale",
+    [
+        ({"foobar_sell_min": 1, "foobar_sell_max": 1}, 1),
+        ({"foobar_sell_min": 5, "foobar_sell_max": 5}, 5),
+        ({"foobar_sell_min": 3, "foobar_sell_max": 10}, 3.5),
+    ],
+)
+def test_sale_size(settings, sale):
+    config = FactoryConfig(switch_activity_delay=0).update(settings)
+    defaults = FactoryConfig(switch_activity_delay=0)
+
+    # Only the time spent selling changes
+    work = Estimate.from_config(config).work - Estimate.from_config(defaults).work
+    assert work == pytest.approx(1.2 * 3 * (1 / sale - 1 / 3.5) * 10)
+
+
+def test_switches():
+    estimate = Estimate.from_config(FactoryConfig(robot_cost_foo=12))
+
+    # 2 switches per attempt, 1 per FooBar and per sale, whatever the cost in Foo
+    assert estimate.switches == pytest.approx((2 * 5 + 3 + 3 / 3.5 + 4) * 5)
+
+
+def test_curve():
+    estimate = Estimate.from_config(FactoryConfig(robot_max_number=5), robots=2)
+
+    assert [robots for robots, _ in estimate.curve] == [3, 4, 5]
+    assert estimate.curve[-1][1] == pytest.approx(estimate.elapsed)
+    assert estimate.elapsed == pytest.approx(
+        estimate.lag + estimate.robot_time * (1 / 2 + 1 / 3 + 1 / 4)
+    )
+    assert estimate.time_to(2) == 0
+
+
+@pytest.mark.parametrize(
+    "config, message",
+    [
+        (FactoryConfig(foobar_price=0), "earn money"),
+        (FactoryConfig(foobar_success_rate=0), "earn money"),
+    ],
+)
+def test_invalid(config, message):
+    with pytest.raises(ValueError, match=message):
+        Estimate.from_config(config)
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {},
+        {"robot_max_number": 10},
+        {"robot_max_number": 60},
+        {"robot_cost_foo": 3},
+        {"robot_cost_foo": 12},
+        {"foobar_sell_min": 1},
+        {"foobar_sell_min": 5, "foobar_sell_max": 5},
+        {"foobar_sell_min": 8, "foobar_sell_max": 10},
+        {"switch_activity_delay": 0},
+        {"switch_activity_delay": 10},
+        {"foobar_price": 2},
+        {"robot_cost_euros": 6},
+        {"foobar_success_rate": 0.9},
+        {"foobar_sell_delay": 2},
+        {"bar_mining_min_delay": 2, "bar_mining_max_delay": 4},
+    ],
+)
+def test_matches_simulation(settings):
+    config = FactoryConfig().update(settings)
+
+    simulated = run_batch(runs=20, workers=1, config=config).elapsed.mean
+
+    assert Estimate.from_config(config).elapsed == pytest.approx(
+        simulated, rel=ERROR_BOUND
+    )
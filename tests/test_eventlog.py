@@ -0,0 +1,105 @@
+import pytest
+
+from foobartory import eventlog
+from foobartory.config import FactoryConfig
+from foobartory.models import Factory, Robot
+
+np = pytest.importorskip("numpy")
+
+
+def test_event_log(tmp_path):
+    path = str(tmp_path / "events.bin")
+
+    with eventlog.EventLog(path, buffer_size=2) as log:
+        log.record(1.5, 0, "harvest_foo", eventlog.SUCCESS, foo=1, duration=1)
+        log.record(2, 1, "sell_foobar", eventlog.SUCCESS, foobar=-3, euros=3)
+        log.record(9, 1, "create_foobar", eventlog.FAILURE, foo=-1, switch=5)
+
+    events = eventlog.read(path)
+    assert isinstance(events, np.memmap)
+    assert events["time"].tolist() == [1.5, 2, 9]
+    assert events["robot"].tolist() == [0, 1, 1]
+    assert events["activity"].tolist() == [0, 3, 2]
+    assert events["outcome"].tolist() == [0, 0, 1]
+    assert events["foo"].tolist() == [1, 0, -1]
+    assert events["foobar"].tolist() == [0, -3, 0]
+    assert events["euros"].tolist() == [0, 3, 0]
+    assert events["switch"].tolist() == [0, 0, 5]
+    assert events["duration"].tolist() == [1, 0, 0]
+
+
+def test_read_ignores_truncated_record(tmp_path):
+    path = tmp_path / "events.bin"
+    with eventlog.EventLog(str(path)) as log:
+        log.record(1, 0, "harvest_bar", eventlog.SUCCESS, bar=1)
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 5)
+
+    assert len(eventlog.read(str(path))) == 1
+
+
+def test_read_empty(tmp_path):
+    path = str(tmp_path / "events.bin")
+    eventlog.EventLog(path).close()
+
+    assert len(eventlog.read(path)) == 0
+
+
+def test_read_invalid(tmp_path):
+    path = tmp_path / "events.bin"
+    path.write_bytes(b"not an event log")
+
+    with pytest.raises(ValueError, match="Not an event log"):
+        eventlog.read(str(path))
+
+
+def test_throughput_and_utilization(tmp_path):
+    path = str(tmp_path / "events.bin")
+    with eventlog.EventLog(path) as log:
+        log.record(1, 0, "harvest_foo", eventlog.SUCCESS, duration=1)
+        log.record(7, 0, "harvest_bar", eventlog.SUCCESS, switch=5, duration=1)
+        log.record(12, 1, "create_foobar", eventlog.FAILURE, duration=2)
+        log.record(25, 1, "harvest_foo", eventlog.SUCCESS, switch=5, duration=1)
+    events = eventlog.read(path)
+
+    assert eventlog.throughput(events, interval=10).tolist() == [2, 0, 1]
+    assert eventlog.throughput(events, 10, "harvest_foo").tolist() == [1, 0, 1]
+    assert eventlog.utilization(events).tolist() == pytest.approx([2 / 7, 3 / 8])
+
+
+def test_factory_events_balance_the_stocks(tmp_path):
+    path = str(tmp_path / "events.bin")
+    with eventlog.EventLog(path) as log:
+        factory = Factory(echo=None, virtual_clock=True, seed=0, event_log=log)
+        factory.add_robot(Robot(factory=factory))
+        factory.add_robot(Robot(factory=factory))
+        factory.run()
+
+    events = eventlog.read(path)
+    assert len(events) == sum(factory.activities.values())
+    held = factory.ledger.held
+    assert events["foo"].sum() == factory.foo_queue.qsize() + held["foo"]
+    assert events["bar"].sum() == factory.bar_queue.qsize() + held["bar"]
+    assert events["foobar"].sum() == factory.foobar_queue.qsize() + held["foobar"]
+    assert events["euros"].sum() == factory.account + held["euros"]
+    failures = events[events["outcome"] == eventlog.FAILURE]
+    assert set(failures["activity"].tolist()) == {2}
+
+
+def test_factory_events_are_timed_from_the_start_of_the_run(tmp_path):
+    path = str(tmp_path / "events.bin")
+    with eventlog.EventLog(path) as log:
+        factory = Factory(
+            speed=1e4,
+            echo=None,
+            seed=0,
+            event_log=log,
+            config=FactoryConfig(robot_max_number=3),
+        )
+        factory.add_robot(Robot(factory=factory))
+        factory.add_robot(Robot(factory=factory))
+        factory.run()
+
+    events = eventlog.read(path)
+    assert 0 < events["time"].min()
+    assert events["time"].max() <= factory.elapsed
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from foobartory import inventory
+from foobartory.models import Foo, FooBar
+
+
+@pytest.mark.asyncio
+async def test_item_queue_put_new():
+    queue = inventory.ItemQueue(FooBar)
+    foo = Foo()
+
+    queue.put_new(foo, None)
+
+    foobar = await queue.get()
+    assert foobar.foo is foo
+    assert queue.empty()
+
+
+def test_stock_starts_empty():
+    stock = inventory.Stock(Foo)
+
+    assert stock.empty()
+    assert stock.qsize() == 0
+
+
+def test_stock_put():
+    stock = inventory.Stock(Foo)
+
+    stock.put_new()
+    stock.put_nowait(Foo())
+
+    assert not stock.empty()
+    assert stock.qsize() == 2
+
+
+def test_stock_get_builds_items_in_order():
+    stock = inventory.Stock(Foo)
+    for _ in range(3):
+        stock.put_new()
+
+    items = [stock.get_nowait(), stock.get_nowait()]
+
+    assert all(isinstance(item, Foo) for item in items)
+    assert [item.id for item in items] == [0, 1]
+    assert stock.qsize() == 1
+
+
+def test_stock_get_empty():
+    stock = inventory.Stock(Foo)
+
+    with pytest.raises(asyncio.QueueEmpty):
+        stock.get_nowait()
+
+
+def test_stock_does_not_keep_items():
+    stock = inventory.Stock(FooBar)
+
+    stock.put_nowait(FooBar(Foo(), None))
+
+    assert not hasattr(stock, "__dict__")
+    assert str(stock.get_nowait()) == "FooBar 0"
+
+
+@pytest.fixture
+def ledger(factory):
+    for _ in range(6):
+        factory.foo_queue.put_new()
+    factory.bar_queue.put_new()
+    for _ in range(4):
+        factory.foobar_queue.put_new()
+    factory.account = 5
+    return factory.ledger
+
+
+def test_ledger_reserve(factory, ledger):
+    reservation = ledger.reserve(foo=6, euros=3)
+
+    assert len(reservation.foo) == 6
+    assert reservation.euros == 3
+    assert factory.foo_queue.empty()
+    assert factory.account == 2
+
+
+def test_ledger_reserve_is_all_or_nothing(factory, ledger):
+    assert ledger.reserve(foo=1, bar=2) is None
+
+    assert factory.foo_queue.qsize() == 6
+    assert factory.bar_queue.qsize() == 1
+
+
+def test_ledger_reserve_not_enough_euros(factory, ledger):
+    assert ledger.reserve(foo=6, euros=6) is None
+
+    assert factory.account == 5
+
+
+def test_ledger_reserve_foobar(factory, ledger):
+    reservation = ledger.reserve_foobar(3, 5)
+
+    assert len(reservation.foobar) == 4
+    assert factory.foobar_queue.empty()
+
+
+def test_ledger_reserve_foobar_below_minimum(factory, ledger):
+    ledger.reserve(foobar=2)
+
+    assert ledger.reserve_foobar(3, 5) is None
+    assert factory.foobar_queue.qsize() == 2
+
+
+def test_ledger_commit(factory, ledger):
+    reservation = ledger.reserve(foo=1, bar=1)
+
+    ledger.commit(reservation)
+
+    assert reservation.settled
+    assert factory.foo_queue.qsize() == 5
+    assert factory.bar_queue.empty()
+
+
+def test_ledger_release(factory, ledger):
+    reservation = ledger.reserve(foo=2, bar=1, foobar=1, euros=3)
+
+    ledger.release(reservation)
+
+    assert reservation.settled
+    assert factory.foo_queue.qsize() == 6
+    assert factory.bar_queue.qsize() == 1
+    assert factory.foobar_queue.qsize() == 4
+    assert factory.account == 5
+
+
+def test_ledger_settle_twice(ledger):
+    reservation = ledger.reserve(foo=1)
+    ledger.commit(reservation)
+
+    with pytest.raises(ValueError):
+        ledger.release(reservation)
+
+
+def test_ledger_held(ledger):
+    reservation = ledger.reserve(foo=2, bar=1, euros=3)
+    assert ledger.held == {"foo": 2, "bar": 1, "foobar": 0, "euros": 3}
+
+    ledger.commit(reservation)
+
+    assert not +ledger.held
@@ -0,0 +1,93 @@
+import logging
+
+import pytest
+
+from foobartory import decorators, logs, models
+
+
+class Clock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_sampler_sample(clock):
+    sampler = logs.ActivitySampler(logging.getLogger(), sample=3, clock=clock)
+
+    kept = [sampler.keep(name) for name in ["harvest_foo", "harvest_bar"] * 4]
+
+    assert kept == [True, True, False, False, False, False, True, True]
+
+
+def test_sampler_rate(clock):
+    sampler = logs.ActivitySampler(logging.getLogger(), rate=2, clock=clock)
+
+    kept = [sampler.keep("harvest_foo") for _ in range(3)]
+    clock.time = 1
+    kept.append(sampler.keep("harvest_foo"))
+
+    assert kept == [True, True, False, True]
+
+
+def test_sampler_summary(caplog, clock):
+    caplog.set_level("INFO")
+    sampler = logs.ActivitySampler(logging.getLogger(), summary=10, clock=clock)
+
+    kept = [sampler.keep("harvest_foo"), sampler.keep("harvest_bar")]
+    clock.time = 10
+    kept.append(sampler.keep("harvest_foo"))
+    sampler.keep("sell_foobar")
+    clock.time = 12
+    sampler.flush()
+    sampler.flush()
+
+    assert kept == [False, False, False]
+    assert caplog.messages == [
+        "[*] 3 activities in 10.0s: harvest_foo=2, harvest_bar=1",
+        "[*] 1 activities in 2.0s: sell_foobar=1",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_activity_logs_sampled(caplog, mocker):
+    mocker.patch.object(models.asyncio, "sleep")
+    caplog.set_level("INFO")
+    factory = models.Factory(
+        log_sampler=logs.ActivitySampler(decorators.logger, sample=2)
+    )
+    robot = models.Robot(factory)
+    factory.robots.append(robot)
+
+    for _ in range(3):
+        await robot.harvest_foo()
+
+    assert caplog.messages == ["[*] Robot 0 did harvest_foo"] * 2
+
+
+def test_log_writer(capsys):
+    logger = logging.getLogger("foobartory.test")
+    root = logging.getLogger()
+    handlers = root.handlers
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    root.handlers = [handler]
+    try:
+        with logs.LogWriter(echo=print) as writer:
+            assert root.handlers != [handler]
+            logger.warning("first %s", "record")
+            writer.echo("message")
+            logger.warning("second record")
+        assert root.handlers == [handler]
+    finally:
+        root.handlers = handlers
+
+    captured = capsys.readouterr()
+    assert captured.err == "WARNING first record\nWARNING second record\n"
+    assert captured.out == "message\n"
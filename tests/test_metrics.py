@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from foobartory import metrics
+from foobartory.models import Factory, Robot
+
+
+def test_histogram():
+    histogram = metrics.Histogram([1, 5])
+
+    for value in (0.5, 1, 2, 10):
+        histogram.observe(value)
+
+    assert histogram.cumulative_counts() == [("1", 2), ("5", 3), ("+Inf", 4)]
+    assert histogram.to_dict() == {
+        "buckets": {"1": 2, "5": 3, "+Inf": 4},
+        "sum": 13.5,
+        "count": 4,
+    }
+
+
+def test_observe_activity():
+    registry = metrics.Metrics()
+
+    registry.observe_activity("harvest_foo", switch=0, duration=1)
+    registry.observe_activity("harvest_foo", switch=5, duration=1)
+
+    assert registry.activities["harvest_foo"] == 2
+    assert registry.durations["harvest_foo"].count == 2
+    assert registry.switches["harvest_foo"] == 1
+    assert registry.switch_seconds["harvest_foo"] == 5
+
+
+@pytest.fixture
+def registry():
+    factory = Factory(virtual_clock=True, echo=None, seed=0, metrics=metrics.Metrics())
+    factory.add_robot(Robot(factory=factory))
+    factory.add_robot(Robot(factory=factory))
+    factory.run()
+    return factory.metrics
+
+
+def test_factory_metrics(registry):
+    assert sum(registry.activities.values()) > 0
+    assert registry.reservations["granted"] > 0
+    assert registry.gauges["robots"] == 30
+    # Durations are in factory seconds
+    assert registry.durations["harvest_foo"].sum == registry.activities["harvest_foo"]
+    assert (
+        registry.switch_seconds["sell_foobar"] == 5 * registry.switches["sell_foobar"]
+    )
+
+
+def test_factory_samples(registry):
+    times = [sample[0] for sample in registry.samples]
+    assert times == [float(t) for t in range(1, len(times) + 1)]
+    # The event loop never lags on a virtual clock
+    assert registry.loop_lag.sum == 0
+
+
+def test_metrics_do_not_change_the_run(registry):
+    factory = Factory(virtual_clock=True, echo=None, seed=0)
+    factory.add_robot(Robot(factory=factory))
+    factory.add_robot(Robot(factory=factory))
+    factory.run()
+
+    assert factory.activities == registry.activities
+
+
+def test_to_json(registry):
+    snapshot = json.loads(registry.to_json())
+
+    assert snapshot["activities"] == dict(registry.activities)
+    assert snapshot["samples"]["fields"][:2] == ["time", "robots"]
+    assert len(snapshot["samples"]["values"]) == len(registry.samples)
+
+
+def test_to_prometheus(registry):
+    text = registry.to_prometheus()
+
+    assert "# TYPE foobartory_activities_total counter\n" in text
+    assert (
+        'foobartory_activity_duration_seconds_bucket{activity="harvest_foo",le="+Inf"}'
+        in text
+    )
+    assert "foobartory_event_loop_lag_seconds_count " in text
+    assert "foobartory_robots 30\n" in text
+
+
+def test_write(tmp_path, capsys):
+    registry = metrics.Metrics()
+    path = tmp_path / "metrics.prom"
+
+    registry.write(str(path), "prometheus")
+    registry.write("-", "json")
+
+    assert path.read_text() == registry.to_prometheus()
+    assert capsys.readouterr().out == registry.to_json()
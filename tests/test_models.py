@@ -1,7 +1,9 @@
 import pytest
 
 import foobartory
+from foobartory.config import FactoryConfig
 from foobartory.models import Bar, Foo, FooBar, Robot, asyncio
+from foobartory.rng import RandomStream
 
 
 @pytest.fixture(autouse=True)
@@ -45,6 +47,7 @@ async def test_harvest_foo(factory, robot, mock_sleep):
     foo = factory.foo_queue.get_nowait()
     assert isinstance(foo, Foo)
     assert factory.foo_queue.empty()
+    assert factory.produced["harvest_foo"] == 1
     mock_sleep.assert_awaited_once_with(1)
 
 
@@ -82,15 +85,14 @@ def test_must_create_foobar_no_bar(factory, robot):
 
 @pytest.fixture
 def mock_random(mocker):
-    return mocker.patch.object(foobartory.models.random, "random")
+    return mocker.patch.object(RandomStream, "random")
 
 
 @pytest.mark.asyncio
 async def test_create_foobar_success(factory, robot, mock_random, mock_sleep):
     robot._current_activity = "create_foobar"
-    foo, bar = Foo(), Bar()
-    factory.foo_queue.put_nowait(foo)
-    factory.bar_queue.put_nowait(bar)
+    factory.foo_queue.put_nowait(Foo())
+    factory.bar_queue.put_nowait(Bar())
     mock_random.return_value = 0.5
 
     await robot.create_foobar()
@@ -100,10 +102,28 @@ async def test_create_foobar_success(factory, robot, mock_random, mock_sleep):
     foobar = factory.foobar_queue.get_nowait()
     assert factory.foobar_queue.empty()
     assert isinstance(foobar, FooBar)
-    assert str(foobar) == f"{foo.id} - {bar.id}"
+    assert str(foobar) == "FooBar 0"
     mock_sleep.assert_awaited_once_with(2)
 
 
+@pytest.mark.asyncio
+async def test_create_foobar_provenance(mock_random):
+    factory = foobartory.models.Factory(provenance=True)
+    robot = Robot(factory)
+    robot._current_activity = "create_foobar"
+    foo, bar = Foo(), Bar()
+    factory.foo_queue.put_nowait(foo)
+    factory.bar_queue.put_nowait(bar)
+    mock_random.return_value = 0.5
+
+    await robot.create_foobar()
+
+    foobar = factory.foobar_queue.get_nowait()
+    assert foobar.foo is foo
+    assert foobar.bar is bar
+    assert str(foobar) == f"{foo.id} - {bar.id}"
+
+
 @pytest.mark.asyncio
 async def test_create_foobar_failure(factory, robot, mock_random, mock_sleep):
     robot._current_activity = "create_foobar"
@@ -146,7 +166,6 @@ def test_must_sell_foobar(factory, robot):
     for _ in range(3):
         factory.foobar_queue.put_nowait(FooBar(Foo(), Bar()))
 
-    assert not factory.sell_foobar_lock.locked()
     assert robot.must_sell_foobar
 
 
@@ -154,17 +173,25 @@ def test_must_sell_foobar_not_enough_foobar(factory, robot):
     for _ in range(1):
         factory.foobar_queue.put_nowait(FooBar(Foo(), Bar()))
 
-    assert not factory.sell_foobar_lock.locked()
     assert not robot.must_sell_foobar
 
 
-@pytest.mark.asyncio
-async def test_must_sell_foobar_another_robot_is_already_selling(factory, robot):
+def test_must_sell_foobar_another_robot_is_already_selling(factory, robot):
     for _ in range(3):
         factory.foobar_queue.put_nowait(FooBar(Foo(), Bar()))
 
-    async with factory.sell_foobar_lock:
-        assert not robot.must_sell_foobar
+    factory.ledger.reserve_foobar(3, 5)
+
+    assert not robot.must_sell_foobar
+
+
+def test_must_sell_foobar_several_robots(factory, robot):
+    for _ in range(8):
+        factory.foobar_queue.put_nowait(FooBar(Foo(), Bar()))
+
+    factory.ledger.reserve_foobar(3, 5)
+
+    assert robot.must_sell_foobar
 
 
 @pytest.mark.asyncio
@@ -179,15 +206,40 @@ async def test_sell_foobar(factory, robot, mock_sleep):
 
     assert factory.account == 5
     assert factory.foobar_queue.qsize() == 2
+    assert factory.produced["sell_foobar"] == 5
+    assert factory.activities["sell_foobar"] == 1
     mock_sleep.assert_awaited_once_with(10)
 
 
+@pytest.mark.asyncio
+async def test_sell_foobar_reserved(factory, robot):
+    robot._current_activity = "sell_foobar"
+    for _ in range(4):
+        factory.foobar_queue.put_nowait(FooBar(Foo(), Bar()))
+    reservation = factory.ledger.reserve(foobar=3)
+
+    await robot.sell_foobar(reservation)
+
+    assert reservation.settled
+    assert factory.account == 3
+    assert factory.foobar_queue.qsize() == 1
+
+
+@pytest.mark.asyncio
+async def test_sell_foobar_nothing_to_sell(factory, robot, mock_sleep):
+    robot._current_activity = "sell_foobar"
+
+    await robot.sell_foobar()
+
+    assert factory.account == 0
+    mock_sleep.assert_not_awaited()
+
+
 def test_must_buy_robot(factory, robot):
     factory.account = 3
     for _ in range(6):
         factory.foo_queue.put_nowait(Foo())
 
-    assert not factory.buy_robot_lock.locked()
     assert robot.must_buy_robot
 
 
@@ -196,7 +248,6 @@ def test_must_buy_robot_not_enough_cash(factory, robot):
     for _ in range(6):
         factory.foo_queue.put_nowait(Foo())
 
-    assert not factory.buy_robot_lock.locked()
     assert not robot.must_buy_robot
 
 
@@ -205,18 +256,29 @@ def test_must_buy_robot_not_enough_foo(factory, robot):
     for _ in range(5):
         factory.foo_queue.put_nowait(Foo())
 
-    assert not factory.buy_robot_lock.locked()
     assert not robot.must_buy_robot
 
 
-@pytest.mark.asyncio
-async def test_must_buy_robot_another_robot_is_already_buying(factory, robot):
+def test_must_buy_robot_another_robot_is_already_buying(factory, robot):
     factory.account = 3
     for _ in range(6):
         factory.foo_queue.put_nowait(Foo())
 
-    async with factory.buy_robot_lock:
-        assert not robot.must_buy_robot
+    factory.ledger.reserve(foo=6, euros=3)
+
+    assert not robot.must_buy_robot
+
+
+def test_choose_reserves_resources(factory, robot):
+    factory.account = 3
+    for _ in range(6):
+        factory.foo_queue.put_nowait(Foo())
+
+    name, (reservation,) = robot.choose()
+
+    assert name == "buy_robot"
+    assert (len(reservation.foo), reservation.euros) == (6, 3)
+    assert robot.choose() == ("harvest_foo", ())
 
 
 @pytest.mark.asyncio
@@ -262,14 +324,13 @@ async def test_buy_robot_not_enough_foo(factory, robot):
     assert len(factory.robots) == 1
 
 
-def test_add_robot(mocker, factory):
-    mock_create_task = mocker.patch.object(foobartory.models.asyncio, "ensure_future")
+def test_add_robot(factory):
     robot = Robot(factory)
     factory.add_robot(robot)
 
     assert len(factory.robots) == 1
-    mock_create_task.assert_called_once()
-    assert mock_create_task.call_args[0][0].__name__ == "run"
+    # The robot only starts with the run
+    assert not factory._tasks
 
 
 @pytest.mark.asyncio
@@ -282,5 +343,86 @@ async def test_add_robot_end_the_game(factory):
     assert all(robot._stopped for robot in factory.robots)
 
 
+def test_add_robot_silent(capsys):
+    factory = foobartory.models.Factory(echo=None)
+
+    factory.add_robot(Robot(factory))
+
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.asyncio
+async def test_run_async_stop_cancels_robots(factory):
+    factory.add_robot(Robot(factory))
+    tasks = []
+
+    def add_robot_and_stop():
+        # Robots added during the run start right away
+        factory.add_robot(Robot(factory))
+        tasks.extend(factory._tasks)
+        factory.stop()
+
+    asyncio.get_running_loop().call_soon(add_robot_and_stop)
+    await factory.run_async()
+
+    assert len(tasks) == 2
+    assert all(task.cancelled() for task in tasks)
+    assert all(robot._stopped for robot in factory.robots)
+    assert not factory._tasks
+    assert factory.elapsed < 1
+
+
+def test_add_robot_custom_max_robots(capsys):
+    factory = foobartory.models.Factory(config=FactoryConfig(robot_max_number=3))
+    for _ in range(3):
+        factory.add_robot(Robot(factory))
+
+    assert all(robot._stopped for robot in factory.robots)
+    assert capsys.readouterr().out.endswith("[+] Congratulation, you have 3 robots!\n")
+
+
+@pytest.mark.asyncio
+async def test_run_async_maximum_already_reached():
+    factory = foobartory.models.Factory(
+        echo=None, config=FactoryConfig(robot_max_number=3)
+    )
+    for _ in range(3):
+        factory.add_robot(Robot(factory))
+
+    await asyncio.wait_for(factory.run_async(), timeout=1)
+
+    assert factory.finished
+    assert not factory._tasks
+
+
+def test_factory_random_seed():
+    assert foobartory.models.Factory().seed != foobartory.models.Factory().seed
+
+
+def test_robots_have_distinct_streams():
+    factory = foobartory.models.Factory(seed=0)
+    first = Robot(factory)
+    factory.robots.append(first)
+    second = Robot(factory)
+
+    assert first._random.random() != second._random.random()
+
+
+@pytest.mark.asyncio
+async def test_factory_config(mock_sleep):
+    factory = foobartory.models.Factory(
+        speed=2, config=FactoryConfig(foo_mining_delay=3)
+    )
+    robot = Robot(factory)
+
+    await robot.harvest_foo()
+
+    mock_sleep.assert_awaited_once_with(1.5)
+
+
+def test_robot_has_no_dict(robot):
+    assert not hasattr(robot, "__dict__")
+
+
 def test_factory_str(factory):
     assert str(factory) == "robots: 0,\naccount: 0,\nfoo: 0,\nbar: 0,\nfoobar: 0"
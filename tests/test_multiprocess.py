@@ -0,0 +1,88 @@
+import asyncio
+import multiprocessing
+
+import pytest
+
+from foobartory import multiprocess
+from foobartory.config import FactoryConfig
+from foobartory.models import Foo
+
+
+@pytest.fixture
+def inventory():
+    inventory = multiprocess.SharedInventory(multiprocessing.Lock())
+    yield inventory
+    inventory.close()
+    inventory.unlink()
+
+
+def test_inventory_shared(inventory):
+    other = multiprocess.SharedInventory(inventory.lock, name=inventory.name)
+    try:
+        assert inventory.add(multiprocess.ACCOUNT, 5) == 5
+        assert other[multiprocess.ACCOUNT] == 5
+    finally:
+        other.close()
+
+
+def test_inventory_take(inventory):
+    inventory.add(multiprocess.FOO_TAIL, 2)
+    inventory.add(multiprocess.ACCOUNT, 3)
+
+    assert inventory.take(foo=3, bar=0, foobar=0, euros=0) is None
+    assert inventory.take(foo=1, bar=0, foobar=0, euros=4) is None
+    assert inventory.take(foo=1, bar=0, foobar=0, euros=3) == [0, 0, 0]
+    assert inventory.take(foo=1, bar=0, foobar=0, euros=0) == [1, 0, 0]
+    assert inventory[multiprocess.ACCOUNT] == 0
+    assert inventory.take(foo=1, bar=0, foobar=0, euros=0) is None
+
+
+def test_stock(inventory):
+    stock = multiprocess.SharedStock(
+        inventory, Foo, multiprocess.FOO_HEAD, multiprocess.FOO_TAIL
+    )
+    stock.put_new()
+    stock.put_nowait(Foo())
+
+    assert stock.qsize() == 2
+    assert stock.get_nowait().id == 0
+    assert stock.get_nowait().id == 1
+    assert stock.empty()
+    with pytest.raises(asyncio.QueueEmpty):
+        stock.get_nowait()
+
+
+def test_account_updates_are_increments(inventory):
+    factory = multiprocess.WorkerFactory(inventory, 0, 2, echo=None)
+    factory.account += 10
+    # Another worker sells meanwhile
+    inventory.add(multiprocess.ACCOUNT, 3)
+    factory.account -= 4
+
+    assert inventory[multiprocess.ACCOUNT] == 9
+    assert factory.account == 9
+
+
+def test_ledger_reserve(inventory):
+    factory = multiprocess.WorkerFactory(inventory, 0, 2, echo=None)
+    inventory.add(multiprocess.FOO_TAIL, 6)
+    inventory.add(multiprocess.ACCOUNT, 3)
+
+    reservation = factory.ledger.reserve(foo=6, euros=3)
+
+    assert [foo.id for foo in reservation.foo] == list(range(6))
+    assert factory.ledger.held["euros"] == 3
+    assert factory.account == 0
+    assert factory.ledger.reserve(foo=1) is None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_multiprocess(workers):
+    config = FactoryConfig(robot_max_number=10)
+
+    result = multiprocess.run_multiprocess(workers, config=config, speed=1e4, seed=0)
+
+    assert result.seed == 0
+    # Robots bought by several workers at once may exceed the maximum
+    assert result.produced["buy_robot"] >= 8
+    assert result.elapsed > 0
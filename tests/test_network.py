@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from foobartory import network
+from foobartory.config import FactoryConfig
+
+
+@pytest.fixture
+def coordinator(tmp_path):
+    return network.Coordinator(
+        str(tmp_path / "coordinator.sock"), FactoryConfig(robot_max_number=4)
+    )
+
+
+def test_handle_deposits(coordinator):
+    reply = coordinator.handle("deposit 12 foo;deposit 2 bar;restore 1 bar;sold 3")
+
+    assert reply == "3 12 3 0 0\n"
+    assert coordinator.produced == {
+        "harvest_foo": 12,
+        "harvest_bar": 2,
+        "sell_foobar": 3,
+    }
+    assert (coordinator.messages, coordinator.commands) == (1, 4)
+
+
+def test_handle_reservations(coordinator):
+    coordinator.handle("deposit 6 foo;deposit 4 foobar;sold 2")
+
+    assert coordinator.handle("reserve 6 0 0 3") == "0 2 6 0 4 0\n"
+    assert coordinator.handle("reserve 1 0 0 2;sell 3 5") == "1 4 0 5 0 0 0\n"
+    assert coordinator.handle("sell 1 5") == "0 0 5 0 0 0\n"
+
+
+def test_handle_robots(coordinator):
+    assert coordinator.handle("adopt;adopt;adopt") == "0 1 -1 0 0 0 0 0\n"
+    coordinator.handle("robot")
+    assert coordinator.handle("adopt") == "2 0 0 0 0 0\n"
+
+    assert coordinator.handle("robot") == "0 0 0 0 1\n"
+    assert coordinator.finished
+    assert coordinator.robots == 4
+    assert coordinator.handle("adopt;robot") == "-1 0 0 0 0 1\n"
+
+
+@pytest.mark.parametrize(
+    "message", ["destroy", "deposit 1 robot", "deposit foo", "reserve 1"]
+)
+def test_handle_invalid(coordinator, message):
+    with pytest.raises((ValueError, TypeError)):
+        coordinator.handle(message)
+
+
+def test_connection_batches_operations(coordinator):
+    async def run():
+        await coordinator.start()
+        serve = asyncio.get_running_loop().create_task(coordinator.run())
+        connection = await network.Connection.open(coordinator.path, batch_size=4)
+        for _ in range(3):
+            await connection.send("deposit", 1, "foo")
+        size = connection.qsize("foo")
+        await connection.send("deposit", 1, "bar")
+        (adopted,) = await connection.request("adopt")
+        with pytest.raises(ValueError, match="Unknown command"):
+            await connection.request("destroy")
+        await connection.close()
+        serve.cancel()
+        return size, adopted, connection.requests
+
+    assert asyncio.run(run()) == (3, 0, 3)
+    assert coordinator.stocks == {"foo": 3, "bar": 1}
+    assert coordinator.messages == 3
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_networked(workers):
+    config = FactoryConfig(robot_max_number=6)
+
+    result = network.run_networked(
+        workers,
+        config=config,
+        speed=1e3,
+        seed=0,
+        strategy_parameters={"foo_stock": 8},
+    )
+
+    assert result.produced["buy_robot"] == 4
+    assert result.elapsed > 0
+
+
+def test_coordinator_timeout(coordinator):
+    with pytest.raises(TimeoutError):
+        asyncio.run(coordinator.run(timeout=0.01))
+
+
+def test_coordinator_workers_disconnected(coordinator):
+    async def run():
+        await coordinator.start()
+        serve = asyncio.get_running_loop().create_task(coordinator.run())
+        connection = await network.Connection.open(coordinator.path)
+        await connection.request("adopt")
+        await connection.close()
+        await serve
+
+    with pytest.raises(ConnectionError, match="disconnected"):
+        asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "stocks, parameters, expected",
+    [
+        ({"foo": 6}, {}, ("harvest_bar", ())),
+        ({"foo": 6}, {"foo_stock": 8}, ("harvest_foo", ())),
+        ({"foo": 6, "bar": 1}, {}, ("create_foobar", ("reserve 1 1 0 0",))),
+        ({"foo": 6, "foobar": 3}, {}, ("sell_foobar", ("sell 3 5",))),
+        ({"foo": 6, "foobar": 3}, {"sell_min": 4}, ("harvest_bar", ())),
+    ],
+)
+def test_remote_robot_follows_the_strategy(stocks, parameters, expected):
+    connection = network.Connection(None, None)
+    connection._stocks.update(stocks)
+    robot = network.RemoteRobot(
+        0, connection, FactoryConfig(), 1, 0, strategy_parameters=parameters
+    )
+
+    assert robot._strategy.choose(robot) == expected
+    connection.account = 3
+    assert robot._strategy.choose(robot) == ("buy_robot", ("reserve 6 0 0 3",))
+
+
+@pytest.mark.parametrize(
+    "strategy, parameters", [("dispatch", {}), ("greedy", {"unknown": 1})]
+)
+def test_run_networked_invalid_strategy(strategy, parameters):
+    with pytest.raises(ValueError):
+        network.run_networked(1, strategy=strategy, strategy_parameters=parameters)
@@ -0,0 +1,68 @@
+import pytest
+
+from foobartory import optimizer
+from foobartory.batch import Distribution
+from foobartory.config import FactoryConfig
+
+CONFIG = FactoryConfig(robot_max_number=6)
+
+
+def test_confidence_interval():
+    evaluation = optimizer.Evaluation(
+        parameters={}, elapsed=Distribution.from_values([9, 10, 11, 10])
+    )
+
+    low, high = evaluation.confidence_interval
+
+    assert low == pytest.approx(10 - 1.96 * 0.8165 / 2, abs=1e-3)
+    assert high == pytest.approx(10 + 1.96 * 0.8165 / 2, abs=1e-3)
+    assert str(evaluation).startswith("(defaults): mean=10.00 [9.20, 10.80]")
+
+
+def test_evaluate_runs_each_parameter_set_once():
+    search = optimizer.Search(runs=3, workers=1, config=CONFIG)
+
+    first = search.evaluate([{"sell_min": 3}, {"sell_min": 1}, {"sell_min": 3}])
+    second = search.evaluate([{"sell_min": 1}])
+
+    assert first[0] is first[2]
+    assert second[0] is first[1]
+    assert len(search.evaluations) == 2
+    assert first[0].elapsed.count == 3
+
+
+def test_evaluate_unknown_parameter():
+    with pytest.raises(ValueError, match="switch_margin"):
+        optimizer.Search(workers=1).evaluate([{"switch_margin": 1}])
+
+
+def test_grid_search():
+    search = optimizer.Search(runs=3, workers=1, config=CONFIG)
+
+    best = optimizer.grid_search(search, {"foo_stock": [6, 8], "sell_min": [1, 3]})
+
+    assert len(search.evaluations) == 4
+    assert best is search.ranking[0]
+    assert best.elapsed.mean == min(e.elapsed.mean for e in search.ranking)
+
+
+def test_evolve():
+    search = optimizer.Search(runs=2, workers=1, config=CONFIG)
+
+    best = optimizer.evolve(
+        search, {"foo_stock": (6, 12), "sell_min": (1, 5)}, population=4
+    )
+
+    assert {"foo_stock": 6, "sell_min": 3} in [e.parameters for e in search.ranking]
+    for evaluation in search.ranking:
+        assert 6 <= evaluation.parameters["foo_stock"] <= 12
+        assert isinstance(evaluation.parameters["sell_min"], int)
+    assert best is search.ranking[0]
+
+
+def test_search_in_processes():
+    with optimizer.Search(runs=2, workers=2, config=CONFIG) as search:
+        (parallel,) = search.evaluate([{}])
+    (sequential,) = optimizer.Search(runs=2, workers=1, config=CONFIG).evaluate([{}])
+
+    assert parallel == sequential
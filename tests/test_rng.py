@@ -0,0 +1,47 @@
+import pytest
+
+from foobartory import rng
+
+
+def test_random_stream_is_reproducible():
+    first = rng.RandomStream(seed=1, key=2)
+    second = rng.RandomStream(seed=1, key=2)
+
+    assert [first.random() for _ in range(10)] == [second.random() for _ in range(10)]
+
+
+def test_random_stream_depends_on_key():
+    first = rng.RandomStream(seed=1, key=1)
+    second = rng.RandomStream(seed=1, key=2)
+
+    assert first.random() != second.random()
+
+
+def test_random_stream_counts_draws():
+    stream = rng.RandomStream(seed=0, key=0)
+
+    numbers = [stream.random() for _ in range(4)] + [stream.uniform(1, 2)]
+
+    assert all(0 <= number < 1 for number in numbers[:4])
+    assert len(set(numbers)) == 5
+    assert stream.getstate() == 5
+
+
+def test_random_stream_uniform():
+    stream = rng.RandomStream(seed=0, key=0)
+
+    assert all(0.5 <= stream.uniform(0.5, 2) <= 2 for _ in range(100))
+
+
+@pytest.mark.parametrize("drawn", [0, 1, 3, 1000])
+def test_random_stream_state(drawn):
+    stream = rng.RandomStream(seed=1, key=2)
+    for _ in range(drawn):
+        stream.random()
+
+    restored = rng.RandomStream(seed=1, key=2)
+    restored.uniform(0, 1)
+    restored.setstate(stream.getstate())
+
+    assert restored.getstate() == drawn
+    assert [restored.random() for _ in range(7)] == [stream.random() for _ in range(7)]
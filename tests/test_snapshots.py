@@ -0,0 +1,66 @@
+import pytest
+
+from foobartory import clock, models, snapshots
+
+
+@pytest.fixture
+def factory():
+    factory = models.Factory(echo=None, seed=0)
+    factory.add_robot(models.Robot(factory=factory))
+    factory.add_robot(models.Robot(factory=factory))
+    return factory
+
+
+def collect(factory, interval=None):
+    async def run():
+        run = loop.create_task(factory.run_async())
+        result = [snapshot async for snapshot in snapshots.watch(factory, interval)]
+        await run
+        return result
+
+    loop = clock.VirtualClockEventLoop()
+    try:
+        return loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+def test_snapshot_from_factory(factory):
+    factory.account = 3
+    factory.foo_queue.put_new()
+    factory.activities["harvest_foo"] = 4
+
+    snapshot = snapshots.Snapshot.from_factory(factory)
+
+    assert snapshot == snapshots.Snapshot(
+        time=0,
+        robots=2,
+        account=3,
+        foo=1,
+        bar=0,
+        foobar=0,
+        actions=4,
+        activities=("harvest_foo", "harvest_foo"),
+    )
+    assert snapshot.activity_counts == {"harvest_foo": 2}
+
+
+def test_watch_interval(factory):
+    result = collect(factory, interval=10)
+
+    assert [snapshot.time for snapshot in result[:3]] == [10, 20, 30]
+    assert result[-1].robots == 30
+    assert result[-1].time == factory.elapsed
+
+
+def test_watch_changes(factory):
+    result = collect(factory)
+
+    # The first activities are two Foo harvested at the same time
+    assert result[0].time == 1
+    assert result[0].foo == 2
+    assert len(result) < sum(factory.activities.values())
+    assert result[-1].robots == 30
+    assert all(
+        previous.time <= snapshot.time for previous, snapshot in zip(result, result[1:])
+    )
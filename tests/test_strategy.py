@@ -0,0 +1,98 @@
+import pytest
+
+from foobartory import strategy
+from foobartory.batch import run_factory
+from foobartory.dispatcher import Dispatcher
+from foobartory.models import Factory
+
+
+class Incomplete(strategy.Strategy):
+    pass
+
+
+class Lazy(strategy.Strategy):
+    @classmethod
+    def defaults(cls, config):
+        return {"activity": 0}
+
+    def choose(self, robot):
+        return "harvest_foo", ()
+
+
+def test_greedy_defaults(factory, robot):
+    greedy = factory.strategy
+
+    assert isinstance(greedy, strategy.Greedy)
+    assert greedy.parameters == {"foo_stock": 6, "sell_min": 3}
+    assert greedy.choose(robot) == ("harvest_foo", ())
+
+
+def test_greedy_parameters(robot):
+    factory = Factory(echo=None, strategy_parameters={"foo_stock": 8, "sell_min": 1})
+    robot._factory = factory
+    for _ in range(7):
+        factory.foo_queue.put_new()
+    factory.foobar_queue.put_new()
+
+    assert factory.strategy.choose(robot) == ("harvest_foo", ())
+    factory.foo_queue.put_new()
+    name, (reservation,) = factory.strategy.choose(robot)
+    assert name == "sell_foobar"
+    assert len(reservation.foobar) == 1
+
+
+@pytest.mark.parametrize(
+    "parameters, message",
+    [
+        ({"foo_stock": 5}, "foo_stock"),
+        ({"sell_min": 6}, "sell_min"),
+        ({"sell_max": 5}, "Unknown parameters"),
+    ],
+)
+def test_greedy_invalid_parameters(parameters, message):
+    with pytest.raises(ValueError, match=message):
+        Factory(strategy_parameters=parameters)
+
+
+def test_greedy_matches_the_robot_rules():
+    assert run_factory(1).elapsed == pytest.approx(386.6, abs=0.05)
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("greedy", strategy.Greedy),
+        ("dispatch", Dispatcher),
+        ("foobartory.strategy:Greedy", strategy.Greedy),
+        (Lazy, Lazy),
+    ],
+)
+def test_load(name, expected):
+    assert strategy.load(name) is expected
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "random",
+        "foobartory.missing:Greedy",
+        "foobartory.models:Factory",
+        "foobartory.strategy:Strategy",
+        Incomplete,
+    ],
+)
+def test_load_invalid(name):
+    with pytest.raises(ValueError):
+        strategy.load(name)
+
+
+def test_plugged_strategy(robot):
+    factory = Factory(echo=None, strategy=Lazy)
+
+    assert factory.strategy.parameters == {"activity": 0}
+    assert factory.strategy.choose(robot) == ("harvest_foo", ())
+
+
+def test_incomplete_strategy():
+    with pytest.raises(TypeError, match="choose"):
+        Incomplete(Factory(echo=None))
@@ -0,0 +1,70 @@
+import pytest
+
+from foobartory.config import FactoryConfig
+from foobartory.threads import ThreadFactory, ThreadRobot, gil_enabled
+
+
+def make_factory(threads, **options):
+    factory = ThreadFactory(threads, echo=None, **options)
+    factory.add_robot(ThreadRobot(factory=factory))
+    factory.add_robot(ThreadRobot(factory=factory))
+    return factory
+
+
+def test_steps():
+    factory = make_factory(1, seed=0)
+    factory.foo_queue.put_new()
+    factory.bar_queue.put_new()
+    steps = factory.robots[0].steps()
+
+    assert next(steps) == factory.delays.foo_mining
+    next(steps)
+
+    assert factory.foo_queue.qsize() == 2
+    assert factory.activities == {"harvest_foo": 1}
+
+
+@pytest.mark.parametrize("threads", [1, 2, 4])
+def test_run(threads):
+    factory = make_factory(
+        threads, speed=1e4, seed=0, config=FactoryConfig(robot_max_number=10)
+    )
+
+    factory.run()
+
+    assert factory.finished
+    assert len(factory.robots) == 10
+    assert factory.produced["buy_robot"] == 8
+    assert factory.elapsed > 0
+    assert factory.account >= 0
+
+
+def test_stopped_before_run():
+    factory = make_factory(2, config=FactoryConfig(robot_max_number=10))
+
+    factory.robots[0].stop()
+    factory.robots[1].stop()
+    factory.stop()
+    factory.run()
+
+    assert factory.activities == {}
+
+
+@pytest.mark.parametrize("option", ["virtual_clock", "metrics"])
+def test_unsupported_options(option):
+    with pytest.raises(ValueError, match=option):
+        ThreadFactory(2, **{option: True})
+
+
+def test_unsupported_strategy():
+    with pytest.raises(ValueError, match="Dispatcher"):
+        ThreadFactory(2, strategy="dispatch")
+
+
+def test_observers():
+    with pytest.raises(ValueError, match="event loop"):
+        make_factory(1).run(lambda factory: None)
+
+
+def test_gil_enabled():
+    assert isinstance(gil_enabled(), bool)
@@ -0,0 +1,74 @@
+import json
+
+from foobartory.models import Factory, Robot
+from foobartory.tracing import Tracer
+
+
+def test_tracer(tmp_path):
+    path = tmp_path / "trace.json"
+
+    with Tracer(str(path), buffer_size=2) as tracer:
+        tracer.span("harvest_foo", robot=1, start=0.5, duration=1)
+        tracer.counters(1.5, foo=1, bar=0, foobar=0, account=3, robots=2)
+
+    events = json.loads(path.read_text())
+    assert events[1] == {
+        "name": "thread_name",
+        "ph": "M",
+        "pid": 0,
+        "tid": 1,
+        "args": {"name": "Robot 1"},
+    }
+    assert events[2] == {
+        "name": "harvest_foo",
+        "ph": "X",
+        "pid": 0,
+        "tid": 1,
+        "ts": 500000,
+        "dur": 1000000,
+    }
+    assert [event["name"] for event in events[3:]] == ["stocks", "account", "robots"]
+    assert events[4]["args"] == {"euros": 3}
+
+
+def test_tracer_buffers_events(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer(str(path), buffer_size=3)
+
+    tracer.span("harvest_foo", robot=0, start=0, duration=1)
+    tracer.span("harvest_foo", robot=0, start=1, duration=1)
+    assert "harvest_foo" not in path.read_text()
+
+    tracer.span("harvest_foo", robot=0, start=2, duration=1)
+    tracer._file.flush()
+    assert path.read_text().count("harvest_foo") == 3
+
+    tracer.close()
+    tracer.close()
+    assert len(json.loads(path.read_text())) == 5
+
+
+def test_factory_trace(tmp_path):
+    path = tmp_path / "trace.json"
+    with Tracer(str(path)) as tracer:
+        factory = Factory(virtual_clock=True, echo=None, seed=0, tracer=tracer)
+        factory.add_robot(Robot(factory=factory))
+        factory.add_robot(Robot(factory=factory))
+        factory.run()
+
+    events = json.loads(path.read_text())
+    spans = [event for event in events if event["ph"] == "X"]
+    assert sum(event["name"] != "switch" for event in spans) == sum(
+        factory.activities.values()
+    )
+    assert all(
+        event["dur"] == 5_000_000 for event in spans if event["name"] == "switch"
+    )
+    assert {event["tid"] for event in spans} == set(range(29))
+    assert events[-1] == {
+        "name": "robots",
+        "ph": "C",
+        "pid": 0,
+        "ts": round(factory.elapsed * 1_000_000),
+        "args": {"robots": 30},
+    }
@@ -0,0 +1,156 @@
+import pytest
+
+from foobartory import batch
+
+np = pytest.importorskip("numpy")
+vectorized = pytest.importorskip("foobartory.vectorized")
+
+
+@pytest.fixture
+def factories():
+    return vectorized.VectorizedFactories(count=1, seed=0)
+
+
+def test_initial_state(factories):
+    assert factories.robots.tolist() == [2]
+    assert factories.next_time[0, :3].tolist() == [0, 0, np.inf]
+    assert (factories.activity == vectorized.HARVEST_FOO).all()
+
+
+def test_step_starts_harvesting_foo(factories):
+    factories.step()
+
+    assert factories.phase[0, 0] == vectorized.WORK
+    assert factories.next_time[0, 0] == 1
+
+
+@pytest.mark.parametrize(
+    "stock, expected",
+    [
+        ({"account": 3, "foo": 6}, vectorized.BUY_ROBOT),
+        ({"account": 2, "foo": 6, "foobar": 3}, vectorized.SELL_FOOBAR),
+        ({"foo": 5, "bar": 1, "foobar": 3}, vectorized.HARVEST_FOO),
+        ({"foo": 6, "bar": 1}, vectorized.CREATE_FOOBAR),
+        ({"foo": 6}, vectorized.HARVEST_BAR),
+    ],
+)
+def test_decision_priorities(factories, stock, expected):
+    for name, value in stock.items():
+        getattr(factories, name)[0] = value
+    factories.next_time[0, 1] = 1
+
+    factories.step()
+
+    assert factories.activity[0, 0] == expected
+
+
+def test_switching_activity_takes_time(factories):
+    factories.foo[0] = 6
+    factories.next_time[0, 1] = 100
+
+    factories.step()
+
+    assert factories.activity[0, 0] == vectorized.HARVEST_BAR
+    assert factories.phase[0, 0] == vectorized.SWITCH
+    assert factories.next_time[0, 0] == 5
+
+
+def test_reserve_on_decision(factories):
+    factories.foo[0] = 6
+    factories.account[0] = 3
+    factories.next_time[0, 1] = 100
+
+    factories.step()
+
+    # Resources are reserved while the robot switches to buying a robot
+    assert factories.activity[0, 0] == vectorized.BUY_ROBOT
+    assert factories.phase[0, 0] == vectorized.SWITCH
+    assert factories.account[0] == 0
+    assert factories.foo[0] == 0
+
+
+def test_buy_robot(factories):
+    factories.foo[0] = 6
+    factories.account[0] = 3
+    factories.activity[0, 0] = vectorized.BUY_ROBOT
+    factories.next_time[0, 1] = 100
+
+    factories.step()
+
+    assert factories.robots[0] == 3
+    assert factories.produced[0, vectorized.BUY_ROBOT] == 1
+    assert factories.phase[0, 2] == vectorized.DECIDE
+    assert factories.next_time[0, 2] == 0
+
+    factories.step()
+
+    # The new robot immediately starts harvesting Foo
+    assert factories.phase[0, 2] == vectorized.WORK
+    assert factories.next_time[0, 2] == 1
+
+
+def test_sell_foobar(factories):
+    factories.foobar[0] = 7
+    factories.foo[0] = 6
+    factories.activity[0, 0] = vectorized.SELL_FOOBAR
+    factories.next_time[0, 1] = 100
+
+    factories.step()
+    assert factories.reserved[0, 0] == 5
+    assert factories.foobar[0] == 2
+    assert factories.next_time[0, 0] == 10
+    factories.step()
+
+    assert factories.produced[0, vectorized.SELL_FOOBAR] == 5
+    # The robot immediately reserves 3 € to buy a new robot
+    assert factories.activity[0, 0] == vectorized.BUY_ROBOT
+    assert factories.account[0] == 5 - 3
+
+
+def test_create_foobar(factories):
+    factories.foo[0] = 6
+    factories.bar[0] = 1
+    factories.activity[0, 0] = vectorized.CREATE_FOOBAR
+    factories.next_time[0, 1] = 100
+
+    factories.step()
+    assert (factories.foo[0], factories.bar[0]) == (5, 0)
+    assert factories.next_time[0, 0] == 2
+    factories.step()
+
+    assert factories.foobar[0] + factories.bar[0] == 1
+    assert factories.produced[0, vectorized.CREATE_FOOBAR] == factories.foobar[0]
+
+
+def test_simulate_is_reproducible():
+    first = vectorized.simulate(count=5, seed=1)
+    second = vectorized.simulate(count=5, seed=1)
+
+    assert (first.elapsed == second.elapsed).all()
+    assert (first.produced == second.produced).all()
+
+
+def test_to_batch_result():
+    simulated = vectorized.simulate(count=3, seed=5)
+    result = simulated.to_batch_result()
+
+    assert simulated.seed == 5
+    assert len(result.runs) == 3
+    # Runs drawn together cannot be reproduced alone, with a seed of their own
+    assert [run.seed for run in result.runs] == [None, None, None]
+    assert result.produced["buy_robot"].mean == 28
+
+
+def test_matches_object_engine():
+    """Both engines must give the same distributions, within the sampling error."""
+
+    objects = batch.run_batch(runs=30, seed=0, workers=1)
+    arrays = vectorized.simulate(count=1000, seed=0).to_batch_result()
+
+    assert arrays.elapsed.mean == pytest.approx(objects.elapsed.mean, rel=0.03)
+    assert arrays.elapsed.stdev == pytest.approx(objects.elapsed.stdev, rel=0.5)
+    assert arrays.account.mean == pytest.approx(objects.account.mean, abs=1)
+    for name in batch.ACTIVITIES:
+        assert arrays.produced[name].mean == pytest.approx(
+            objects.produced[name].mean, rel=0.05
+        )